@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк графиков: время построения и размер JSON в зависимости от числа точек
+
+Строит technical_analysis (свечи + индикаторы) и performance (линия) по
+синтетическому ряду M1 с прореживанием и без него и выводит время
+построения фигуры, время сериализации и размер JSON, который Streamlit
+отправляет в браузер.
+
+Использование:
+    poetry run benchmark-charts
+    python scripts/benchmark_charts.py --points 10000 --points 500000
+"""
+
+import time
+from collections.abc import Callable
+from functools import partial
+
+import click
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from src.app.core.candles import Candles
+from src.app.interfaces.visualization import UniversalVisualizationEngine
+
+
+def generate_candles(n: int, seed: int) -> Candles:
+    rng = np.random.default_rng(seed)
+    timestamp = 1_704_067_200 + np.arange(n, dtype=np.int64) * 60
+    close = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    spread = rng.random(n) * 0.1
+    return Candles(
+        "BENCH@MISX",
+        "TIME_FRAME_M1",
+        timestamp,
+        np.roll(close, 1),
+        close + spread,
+        close - spread,
+        close,
+        rng.integers(1, 1000, n).astype(np.float64),
+    )
+
+
+def measure(build: Callable[[], go.Figure]) -> tuple[float, float, int]:
+    """Время построения (мс), время сериализации (мс), размер JSON (байт)"""
+    started = time.perf_counter()
+    fig = build()
+    built = time.perf_counter()
+    payload = fig.to_json()
+    return (built - started) * 1000, (time.perf_counter() - built) * 1000, len(payload)
+
+
+@click.command()
+@click.option("--points", "-n", type=int, multiple=True, help="Количество свечей (можно несколько)")
+@click.option("--seed", type=int, default=42, help="Зерно генератора")
+def main(points: tuple[int, ...], seed: int) -> None:
+    """Сравнить графики с прореживанием и без"""
+    engine = UniversalVisualizationEngine()
+    click.echo(f"{'chart':<20} {'points':>8} {'mode':<8} {'build, ms':>10} {'json, ms':>10} {'size, KB':>10}")
+    click.echo("=" * 72)
+    for n in points or (1_000, 10_000, 100_000, 500_000):
+        candles = generate_candles(n, seed)
+        frame = pd.DataFrame({"datetime": pd.to_datetime(candles.timestamp, unit="s"), "value": candles.close})
+        charts = {
+            "technical_analysis": (
+                {"historical_data": candles, "symbol": candles.symbol},
+                {"max_candles": 0},
+            ),
+            "performance": ({"portfolio_data": frame, "benchmark_data": None}, {"max_points": 0}),
+        }
+        for chart_type, (data, raw) in charts.items():
+            for mode, kwargs in (("full", raw), ("sampled", {})):
+                build_ms, json_ms, size = measure(partial(engine.create_chart, chart_type, data, **kwargs))
+                click.echo(f"{chart_type:<20} {n:>8} {mode:<8} {build_ms:>10.1f} {json_ms:>10.1f} {size / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк стакана OrderBook: обновлений в секунду
+
+Применяет поток случайных инкрементальных изменений (добавление, изменение
+объема, удаление уровня) около mid и измеряет пропускную способность
+apply_delta, apply_snapshot и расчета метрик.
+
+Использование:
+    poetry run benchmark-orderbook
+    python scripts/benchmark_orderbook.py --updates 500000 --capacity 50
+"""
+
+import time
+from collections.abc import Callable
+
+import click
+import numpy as np
+
+from src.app.core.orderbook import ASK, BID, OrderBook
+
+
+def generate_deltas(n: int, levels: int, tick: float, seed: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Случайные изменения: сторона (0 - bid, 1 - ask), цена, объем (0 - удаление)"""
+    rng = np.random.default_rng(seed)
+    sides = rng.integers(0, 2, n)
+    offsets = rng.integers(1, levels + 1, n) * tick
+    prices = np.where(sides == 0, 100.0 - offsets, 100.0 + offsets).round(6)
+    sizes = rng.integers(1, 1000, n).astype(np.float64)
+    sizes[rng.random(n) < 0.3] = 0.0
+    return sides, prices, sizes
+
+
+def generate_snapshot(levels: int, tick: float) -> list[dict]:
+    rows = [{"price": {"value": f"{100 + i * tick:.2f}"}, "sell_size": {"value": "10"}} for i in range(1, levels + 1)]
+    rows += [{"price": {"value": f"{100 - i * tick:.2f}"}, "buy_size": {"value": "10"}} for i in range(1, levels + 1)]
+    return rows
+
+
+def measure(fn: Callable[[], None], n: int) -> float:
+    """Операций в секунду"""
+    started = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - started)
+
+
+@click.command()
+@click.option("--updates", type=int, default=200_000, help="Количество инкрементальных изменений")
+@click.option("--capacity", type=int, default=50, help="Емкость стакана (уровней на сторону)")
+@click.option("--levels", type=int, default=80, help="Диапазон уровней, в котором генерируются изменения")
+@click.option("--seed", type=int, default=42, help="Зерно генератора")
+def main(updates: int, capacity: int, levels: int, seed: int) -> None:
+    """Измерить пропускную способность OrderBook"""
+    tick = 0.01
+    sides, prices, sizes = generate_deltas(updates, levels, tick, seed)
+    side_names = [BID, ASK]
+    # Python float быстрее при поэлементном доступе, чем скаляры NumPy
+    deltas = list(zip([side_names[s] for s in sides], prices.tolist(), sizes.tolist(), strict=True))
+
+    book = OrderBook("BENCH@MISX", capacity=capacity)
+    book.apply_snapshot(generate_snapshot(capacity, tick))
+
+    def apply_deltas() -> None:
+        for side, price, size in deltas:
+            book.apply_delta(side, price, size)
+
+    snapshot = generate_snapshot(capacity, tick)
+    snapshots = max(1, updates // 100)
+
+    def apply_snapshots() -> None:
+        for _ in range(snapshots):
+            book.apply_snapshot(snapshot)
+
+    def compute_metrics() -> None:
+        for _ in range(snapshots):
+            _ = book.spread, book.mid, book.microprice, book.imbalance(10), book.depth(BID, 10)
+
+    click.echo(f"📊 OrderBook: capacity={capacity}, updates={updates}")
+    click.echo("=" * 70)
+    click.echo(f"   apply_delta:     {measure(apply_deltas, updates):>12,.0f} updates/s")
+    click.echo(f"   apply_snapshot:  {measure(apply_snapshots, snapshots):>12,.0f} snapshots/s")
+    click.echo(f"   metrics (5 шт.): {measure(compute_metrics, snapshots):>12,.0f} evaluations/s")
+    click.echo(f"   Уровней после теста: bid={book.bids.count}, ask={book.asks.count}")
+
+
+if __name__ == "__main__":
+    main()
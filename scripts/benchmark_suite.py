@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Набор бенчмарков горячих путей NL -> API
+
+Измеряет задержку (p50 / p95 / p99), пропускную способность и пиковую
+память для поиска тикера, разбора ответа LLM, подсчета accuracy,
+построения графиков и полного хода чата против локальных заменителей
+Finam TradeAPI и OpenRouter (без сети и внешних сервисов).
+
+Результаты сохраняются в JSON и сравниваются с базовым прогоном: если
+лучшая медиана задержки по раундам или пиковая память выросли больше
+порога, скрипт сообщает о регрессии и завершается с кодом 1. Базовые
+значения зависят от машины — после смены окружения их нужно перезаписать
+через --update-baseline (с --filter обновляются только запущенные бенчмарки).
+
+Использование:
+    poetry run benchmark
+    poetry run benchmark --filter chart --iterations 50
+    poetry run benchmark --baseline data/interim/benchmarks/last.json  # сравнить с предыдущим прогоном
+    poetry run benchmark --update-baseline
+"""
+
+import csv
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from itertools import cycle
+from pathlib import Path
+from typing import Any
+
+import click
+import numpy as np
+import pandas as pd
+
+from scripts.benchmark_charts import generate_candles
+from scripts.calculate_metrics import calculate_accuracy
+from scripts.request_analytics import template_analytics
+from src.app.adapters import FinamAPIClient
+from src.app.core.agent import run_agent_turn
+from src.app.core.config import Settings
+from src.app.core.llm import LLMClient, extract_api_request, set_llm_client
+from src.app.core.router import RequestRouter
+from src.app.interfaces.visualization import UniversalVisualizationEngine
+from src.app.sandbox import Faults, FinamSimulator, OpenRouterSimulator, SandboxServer
+from src.app.sandbox.openrouter import train_answer
+from src.app.utils import AssetIndex, get_asset_from_text, normalize_company_name
+
+TRAIN_FILE = Path("data/processed/train.csv")
+BASELINE_FILE = Path("data/benchmarks/baseline.json")
+OUTPUT_FILE = Path("data/interim/benchmarks/last.json")
+COMPANY_NAMES = (
+    "Сбербанк",
+    "Газпрома",
+    "Лукойл",
+    "Роснефти",
+    "Яндекс",
+    "Мечел",
+    "МосБиржа",
+    "Норникель",
+    "ВТБ",
+    "Apple",
+)
+
+
+@dataclass
+class Case:
+    """Бенчмарк: вызов без аргументов, повторяемый iterations раз"""
+
+    name: str
+    run: Callable[[], Any]
+    iterations: int
+
+
+def measure(case: Case, iterations: int, rounds: int = 5, warmup: int = 3) -> dict[str, float]:
+    """
+    Задержки в мс (p50, p95, p99), операций в секунду и пиковая память (КБ)
+
+    Итерации делятся на rounds раундов; для сравнения с базой берется
+    лучшая медиана раунда (best_p50_ms) — она устойчива к фоновой нагрузке
+    на машине, а перцентили считаются по всем вызовам.
+    """
+    for _ in range(warmup):
+        case.run()
+    gc.collect()
+    per_round = max(1, iterations // rounds)
+    latencies = np.empty((rounds, per_round))
+    elapsed = np.empty(rounds)
+    for r in range(rounds):
+        started = time.perf_counter()
+        for i in range(per_round):
+            call_started = time.perf_counter()
+            case.run()
+            latencies[r, i] = time.perf_counter() - call_started
+        elapsed[r] = time.perf_counter() - started
+    # Пиковая память — отдельным проходом: tracemalloc замедляет выполнение
+    tracemalloc.start()
+    for _ in range(min(iterations, 20)):
+        case.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    p50, p95, p99 = np.percentile(latencies * 1000, (50, 95, 99))
+    return {
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "best_p50_ms": float(np.median(latencies, axis=1).min() * 1000),
+        "ops_per_sec": float(per_round / elapsed.min()),
+        "peak_kb": peak / 1024,
+        "iterations": rounds * per_round,
+    }
+
+
+def load_train(train_file: Path) -> list[dict[str, str]]:
+    with open(train_file, encoding="utf-8") as f:
+        return list(csv.DictReader(f, delimiter=";"))
+
+
+@contextmanager
+def sandboxes(train_file: Path, llm_latency_ms: float, api_latency_ms: float) -> Iterator[tuple[str, str]]:
+    """Локальные заменители Finam TradeAPI и OpenRouter; call_llm направлен на заменитель"""
+    with ExitStack() as stack:
+        finam = stack.enter_context(SandboxServer(FinamSimulator(), faults=Faults(latency_ms=api_latency_ms)))
+        llm = stack.enter_context(
+            SandboxServer(OpenRouterSimulator(train_file), faults=Faults(latency_ms=llm_latency_ms))
+        )
+        set_llm_client(LLMClient(Settings(openrouter_api_key="sandbox", openrouter_base=llm.url)))
+        try:
+            yield finam.url, llm.url
+        finally:
+            set_llm_client(None)
+
+
+def build_cases(rows: list[dict[str, str]], finam_url: str, iterations: int) -> list[Case]:
+    client = FinamAPIClient("sandbox", finam_url)
+    assets = client.get_assets()
+    index = AssetIndex.from_response(assets)
+    asset_names = [asset["name"] for asset in assets["assets"]]
+    answers = [train_answer(row) for row in rows]
+    truth = {f"{row['uid']}-{i}": {"type": row["type"], "request": row["request"]} for i in range(3) for row in rows}
+    predicted = {uid: dict(value) for uid, value in truth.items()}
+    for uid in list(predicted)[::4]:
+        predicted[uid]["request"] += "?wrong"
+    names, questions = cycle(COMPANY_NAMES), cycle(row["question"] for row in rows)
+    candles = generate_candles(10_000, seed=42)
+    frame = pd.DataFrame({"datetime": pd.to_datetime(candles.timestamp, unit="s"), "value": candles.close})
+    engine = UniversalVisualizationEngine()
+    router = RequestRouter(index.lookup)
+
+    def parse_all() -> None:
+        for answer in answers:
+            extract_api_request(answer)
+
+    def normalize_all() -> None:
+        for name in asset_names:
+            normalize_company_name(name)
+
+    def chat_turn() -> None:
+        messages = [{"role": "user", "content": next(questions)}]
+        run_agent_turn(messages, client.execute_request, router, account_id="ACC-001-A")
+
+    cases = [
+        Case("normalize_company_name", normalize_all, iterations * 10),
+        Case("asset_index.lookup", lambda: index.lookup(next(names)), iterations * 10),
+        Case("get_asset_from_text", lambda: get_asset_from_text(next(names), client), iterations * 10),
+        Case("extract_api_request", parse_all, iterations * 10),
+        Case("calculate_accuracy", lambda: calculate_accuracy(predicted, truth), iterations * 10),
+        Case("template_analytics", lambda: template_analytics(predicted, truth), iterations * 10),
+        Case(
+            "chart.technical_analysis",
+            lambda: engine.create_chart("technical_analysis", {"historical_data": candles, "symbol": candles.symbol}),
+            iterations,
+        ),
+        Case(
+            "chart.performance",
+            lambda: engine.create_chart("performance", {"portfolio_data": frame, "benchmark_data": None}),
+            iterations,
+        ),
+        Case("chat_turn", chat_turn, iterations),
+    ]
+    try:
+        # Разбор ответа LLM скриптом генерации submission (импортирует пакет app, см. pyproject)
+        from scripts.generate_submission import parse_llm_response
+    except ImportError:
+        return cases
+
+    def parse_submission() -> None:
+        for answer in answers:
+            parse_llm_response(answer)
+
+    cases.insert(4, Case("parse_llm_response", parse_submission, iterations * 10))
+    return cases
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> list[str]:
+    """Регрессии относительно базового прогона"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("best_p50_ms"):
+            continue
+        if current["best_p50_ms"] > base["best_p50_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p50 {base['best_p50_ms']:.3f} -> {current['best_p50_ms']:.3f} мс")
+        # Мелкие аллокации шумят — память сравнивается только от 64 КБ
+        if current["peak_kb"] > max(base["peak_kb"] * (1 + threshold), 64):
+            regressions.append(f"{name}: peak {base['peak_kb']:.0f} -> {current['peak_kb']:.0f} КБ")
+    return regressions
+
+
+@click.command()
+@click.option("--filter", "pattern", default="", help="Запускать только бенчмарки, содержащие подстроку")
+@click.option("--iterations", type=int, default=30, help="Базовое число итераций (быстрые бенчмарки — x10)")
+@click.option("--train-file", type=click.Path(exists=True, path_type=Path), default=TRAIN_FILE, help="train.csv")
+@click.option("--baseline", type=click.Path(path_type=Path), default=BASELINE_FILE, help="Базовый прогон для сравнения")
+@click.option("--output", type=click.Path(path_type=Path), default=OUTPUT_FILE, help="Куда сохранить результаты")
+@click.option("--update-baseline", is_flag=True, help="Перезаписать базовый прогон текущими результатами")
+@click.option("--threshold", type=float, default=0.25, help="Допустимое ухудшение (доля)")
+@click.option("--llm-latency-ms", type=float, default=0.0, help="Задержка заменителя OpenRouter (мс)")
+@click.option("--api-latency-ms", type=float, default=0.0, help="Задержка заменителя Finam API (мс)")
+def main(
+    pattern: str,
+    iterations: int,
+    train_file: Path,
+    baseline: Path,
+    output: Path,
+    update_baseline: bool,
+    threshold: float,
+    llm_latency_ms: float,
+    api_latency_ms: float,
+) -> None:
+    """Запустить бенчмарки и сравнить с базовым прогоном"""
+    rows = load_train(train_file)
+    previous = json.loads(baseline.read_text(encoding="utf-8"))["results"] if baseline.exists() else {}
+    results: dict[str, dict[str, float]] = {}
+    click.echo(
+        f"{'benchmark':<26} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9} {'ops/s':>10} {'peak, KB':>9} {'vs base':>8}"
+    )
+    click.echo("=" * 86)
+    with sandboxes(train_file, llm_latency_ms, api_latency_ms) as (finam_url, _):
+        for case in build_cases(rows, finam_url, iterations):
+            if pattern not in case.name:
+                continue
+            stats = results[case.name] = measure(case, case.iterations)
+            base = previous.get(case.name)
+            best = stats["best_p50_ms"]
+            delta = f"{best / base['best_p50_ms'] - 1:+.0%}" if base and base.get("best_p50_ms") else "—"
+            click.echo(
+                f"{case.name:<26} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f} "
+                f"{stats['ops_per_sec']:>10.0f} {stats['peak_kb']:>9.0f} {delta:>8}"
+            )
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "machine": platform.platform(),
+        "results": results,
+    }
+    # С --filter в базовом прогоне обновляются только запущенные бенчмарки, остальные сохраняются
+    baseline_report = {**report, "results": {**previous, **results}}
+    targets = [(output, report), (baseline, baseline_report)] if update_baseline else [(output, report)]
+    for target, content in targets:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(content, ensure_ascii=False, indent=2), encoding="utf-8")
+    if update_baseline:
+        click.echo(f"\nБазовый прогон обновлен: {baseline}")
+        return
+    regressions = compare(results, previous, threshold)
+    if regressions:
+        click.echo(f"\n❌ Регрессии относительно {baseline} (порог {threshold:.0%}):")
+        for line in regressions:
+            click.echo(f"  - {line}")
+        sys.exit(1)
+    if previous:
+        click.echo(f"\n✅ Регрессий относительно {baseline} нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,12 @@
 
     # С отображением ошибок
     poetry run calculate-metrics --show-errors 5
+
+    # Потоковый режим для больших файлов (блоки по 2 МБ, см. stream_eval.py)
+    poetry run calculate-metrics --chunk-mb 2
+
+    # Точность по шаблонам эндпоинтов, 10 частых путаниц и ошибки слотов (см. request_analytics.py)
+    poetry run calculate-metrics --templates 10
 """
 
 import csv
@@ -140,11 +146,39 @@ def calculate_accuracy(
         "correct_request": correct_request,
         "type_accuracy": type_accuracy,
         "request_accuracy": request_accuracy,
+        "error_count": len(errors),
         "errors": errors,
         "type_stats": detailed_type_stats,
     }
 
 
+def _echo_templates(report: dict, limit: int) -> None:
+    """Вывести отчет request_analytics: шаблоны, частые путаницы и ошибки слотов"""
+    from scripts.request_analytics import confused_templates
+
+    click.echo("\n🧭 ТОЧНОСТЬ ПО ШАБЛОНАМ ЭНДПОИНТОВ:")
+    click.echo(f"   {'Шаблон':<52} {'Всего':>6} {'Exact':>8} {'Шаблон':>8}")
+    click.echo(f"   {'-' * 77}")
+    for template, template_stats in report["templates"].items():
+        click.echo(
+            f"   {template[:52]:<52} {template_stats['total']:>6} "
+            f"{template_stats['accuracy'] * 100:>7.1f}% {template_stats['template_accuracy'] * 100:>7.1f}%"
+        )
+
+    confusions = confused_templates(report, limit)
+    if confusions:
+        click.echo(f"\n🔀 ЧАСТЫЕ ПУТАНИЦЫ ШАБЛОНОВ (первые {limit}):")
+        for true_template, pred_template, count in confusions:
+            click.echo(f"   {count:>5} × {true_template}")
+            click.echo(f"           → {pred_template}")
+
+    click.echo("\n🧩 ОШИБКИ СЛОТОВ (при угаданном шаблоне):")
+    for slot, slot_stats in report["slots"].items():
+        click.echo(
+            f"   {slot:<12} {slot_stats['errors']:>5}/{slot_stats['total']:<5} ({slot_stats['error_rate'] * 100:.1f}%)"
+        )
+
+
 @click.command()
 @click.option(
     "--pred",
@@ -172,7 +206,21 @@ def calculate_accuracy(
     default=None,
     help="Сохранить все ошибки в CSV файл",
 )
-def main(pred_file: Path, true_file: Path, show_errors: int, save_errors: Optional[Path]) -> None:  # noqa: C901
+@click.option(
+    "--chunk-mb",
+    type=int,
+    default=0,
+    help="Читать файлы потоково блоками по N МБ с ограниченной памятью (0 = загрузить целиком)",
+)
+@click.option(
+    "--templates",
+    type=int,
+    default=0,
+    help="Аналитика по шаблонам эндпоинтов: сколько частых путаниц шаблонов показать (0 = не считать)",
+)
+def main(  # noqa: C901
+    pred_file: Path, true_file: Path, show_errors: int, save_errors: Optional[Path], chunk_mb: int, templates: int
+) -> None:
     """Рассчитать метрику accuracy для submission файла"""
 
     click.echo("📊 Расчет метрики accuracy...")
@@ -180,17 +228,26 @@ def main(pred_file: Path, true_file: Path, show_errors: int, save_errors: Option
     click.echo(f"📖 Ground Truth: {true_file}")
     click.echo("=" * 70)
 
-    # Загружаем данные
+    # Загружаем данные и рассчитываем метрики
     try:
-        predicted = load_csv(pred_file)
-        ground_truth = load_csv(true_file)
+        if chunk_mb > 0:
+            # pyarrow и numpy нужны только потоковому режиму — не замедляют обычный запуск
+            from scripts.stream_eval import calculate_accuracy_stream
+
+            keep_errors = show_errors > 0 or save_errors is not None
+            accuracy, stats = calculate_accuracy_stream(pred_file, true_file, chunk_mb, keep_errors, templates > 0)
+        else:
+            predicted = load_csv(pred_file)
+            ground_truth = load_csv(true_file)
+            accuracy, stats = calculate_accuracy(predicted, ground_truth)
+            if templates > 0:
+                from scripts.request_analytics import template_analytics
+
+                stats["templates"] = template_analytics(predicted, ground_truth)
     except Exception as e:
         click.echo(f"❌ Ошибка при чтении файлов: {e}", err=True)
         return
 
-    # Рассчитываем метрики
-    accuracy, stats = calculate_accuracy(predicted, ground_truth)
-
     # Выводим результаты
     click.echo("\n🎯 ОСНОВНАЯ МЕТРИКА (из evaluation.md):")
     click.echo(f"   Accuracy = {stats['correct']}/{stats['total']} = {accuracy:.4f} ({accuracy * 100:.2f}%)")
@@ -200,7 +257,7 @@ def main(pred_file: Path, true_file: Path, show_errors: int, save_errors: Option
     click.echo(f"   Полностью правильных:     {stats['correct']} ({accuracy * 100:.2f}%)")
     click.echo(f"   Правильный type:          {stats['correct_type']} ({stats['type_accuracy'] * 100:.2f}%)")
     click.echo(f"   Правильный request:       {stats['correct_request']} ({stats['request_accuracy'] * 100:.2f}%)")
-    click.echo(f"   Ошибок:                   {len(stats['errors'])}")
+    click.echo(f"   Ошибок:                   {stats['error_count']}")
 
     # Статистика по типам запросов
     click.echo("\n📊 СТАТИСТИКА ПО ТИПАМ ЗАПРОСОВ:")
@@ -214,6 +271,9 @@ def main(pred_file: Path, true_file: Path, show_errors: int, save_errors: Option
             f"{method_stats['f1']:.4f} ({method_stats['f1'] * 100:>5.1f}%)"
         )
 
+    if templates > 0:
+        _echo_templates(stats["templates"], templates)
+
     # Показываем примеры ошибок
     if show_errors > 0 and stats["errors"]:
         click.echo(f"\n❌ ПРИМЕРЫ ОШИБОК (первые {show_errors}):")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Офлайн имитатор Finam TradeAPI
+
+Поднимает локальный HTTP сервер с эндпоинтами Finam TradeAPI на
+синтетических данных, с настраиваемыми задержками, ошибками и лимитом
+запросов. Клиент, чат и generate_submission.py работают с ним без
+изменений — достаточно указать FINAM_API_BASE_URL.
+
+Использование:
+    poetry run finam-sandbox --port 8800 --latency-ms 40 --error-rate 0.01
+    FINAM_API_BASE_URL=http://127.0.0.1:8800 poetry run chat-cli
+"""
+
+import click
+
+from src.app.sandbox import Faults, FinamSimulator, SandboxServer
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Адрес")
+@click.option("--port", type=int, default=8800, help="Порт")
+@click.option("--latency-ms", type=float, default=0.0, help="Медиана задержки ответа (мс)")
+@click.option("--latency-sigma", type=float, default=0.5, help="Разброс задержки (sigma логнормального распределения)")
+@click.option("--error-rate", type=float, default=0.0, help="Доля ответов 503")
+@click.option("--rate-limit", type=int, default=0, help="Запросов в минуту на токен (0 — без ограничения)")
+@click.option("--account", "accounts", multiple=True, help="Счета имитатора (можно несколько)")
+@click.option("--seed", type=int, default=0, help="Зерно синтетических данных, задержек и ошибок")
+def main(
+    host: str,
+    port: int,
+    latency_ms: float,
+    latency_sigma: float,
+    error_rate: float,
+    rate_limit: int,
+    accounts: tuple[str, ...],
+    seed: int,
+) -> None:
+    """Запустить имитатор Finam TradeAPI"""
+    simulator = FinamSimulator(accounts=accounts or ("ACC-001-A", "FIN-203-B"), seed=seed)
+    faults = Faults(latency_ms, latency_sigma, error_rate, rate_limit, seed)
+    server = SandboxServer(simulator, host, port, faults)
+    click.echo(f"Finam TradeAPI sandbox: {server.url} (счета: {', '.join(simulator.accounts)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
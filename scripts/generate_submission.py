@@ -29,6 +29,8 @@ from app.core import get_settings
 # from app.core.llm import create_system_prompt
 from app.utils import get_asset_from_text
 from src.app.core.llm import call_llm
+from src.app.core.profiling import maybe_profile
+from src.app.core.tracing import get_tracer
 
 load_dotenv()
 
@@ -196,7 +198,8 @@ def generate_api_call(question: str, examples: list[dict[str, str]], model: str)
         response = call_llm(messages, temperature=0.1, max_tokens=200)
         llm_answer = response["choices"][0]["message"]["content"].strip()
 
-        method, request = parse_llm_response(llm_answer)
+        with get_tracer().span("submission.parse"):
+            method, request = parse_llm_response(llm_answer)
 
         # Рассчитываем стоимость
         usage = response.get("usage", {})
@@ -262,14 +265,19 @@ def main(test_file: Path, train_file: Path, output_file: Path, num_examples: int
     total_cost = 0.0
 
     # Используем tqdm с postfix для отображения стоимости
+    # В режиме отладки (APP_DEBUG) прогон профилируется: стеки CPU и аллокации по этапам
     progress_bar = tqdm(test_questions, desc="Обработка")
-    for item in progress_bar:
-        api_call, cost = generate_api_call(item["question"], examples, model)
-        total_cost += cost
-        results.append({"uid": item["uid"], "type": api_call["type"], "request": api_call["request"]})
-
-        # Обновляем postfix с текущей стоимостью
-        progress_bar.set_postfix({"cost": f"${total_cost:.4f}"})
+    with maybe_profile("generate_submission") as profile:
+        for item in progress_bar:
+            with get_tracer().span("submission.question"):
+                api_call, cost = generate_api_call(item["question"], examples, model)
+            total_cost += cost
+            results.append({"uid": item["uid"], "type": api_call["type"], "request": api_call["request"]})
+
+            # Обновляем postfix с текущей стоимостью
+            progress_bar.set_postfix({"cost": f"${total_cost:.4f}"})
+    if profile is not None:
+        click.echo(f"\n🔬 Профиль сохранен в {settings.profile_dir}")
 
     # Записываем в submission.csv
     click.echo(f"\n💾 Сохранение результатов в {output_file}...")
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест чата: N параллельных трейдеров против одного бэкенда
+
+Каждый виртуальный пользователь задает вопросы из train.csv/test.csv,
+ждет ответа и делает паузу "на чтение". Ход диалога выполняется так же,
+как в контейнере Streamlit: через общий JobManager с APP_CHAT_WORKERS
+воркерами, run_agent_turn, кэшированный индекс активов и отрисовку ответа
+(JSON ответа API, для свечей — график). Finam TradeAPI и OpenRouter
+заменены локальными имитаторами с настраиваемыми задержками.
+
+Нагрузка растет ступенями; для каждой ступени выводятся пропускная
+способность, перцентили задержки хода, доля ошибок и время по этапам
+(очередь воркеров, LLM, поиск тикера, Finam API, отрисовка), а в конце —
+ступень, на которой бэкенд перестает масштабироваться (насыщение).
+
+Использование:
+    poetry run load-test
+    poetry run load-test --users 1,4,16,64 --stage-seconds 30 --llm-latency-ms 600 --tokens-per-second 60
+    poetry run load-test --workers 32 --output data/interim/load_test.json
+"""
+
+import csv
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+import click
+import numpy as np
+
+from src.app.adapters import FinamAPIClient
+from src.app.core.agent import run_agent_turn
+from src.app.core.candles import Candles
+from src.app.core.config import Settings
+from src.app.core.jobs import ChatJob, JobManager
+from src.app.core.llm import LLMClient, create_system_prompt, set_llm_client
+from src.app.core.router import RequestRouter
+from src.app.interfaces.visualization import UniversalVisualizationEngine
+from src.app.sandbox import Faults, FinamSimulator, OpenRouterSimulator, SandboxServer
+from src.app.utils import AssetIndex
+
+STAGES = ("queue", "llm", "resolve", "api", "render")
+
+_current = threading.local()
+
+
+def record(stage: str, seconds: float) -> None:
+    """Добавить время этапа к текущему ходу (ход выполняется целиком в одном потоке воркера)"""
+    timings = getattr(_current, "timings", None)
+    if timings is not None:
+        timings[stage] += seconds
+
+
+def timed(stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record(stage, time.perf_counter() - started)
+
+    return wrapper
+
+
+class TimedLLMClient(LLMClient):
+    def chat(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return timed("llm", super().chat)(*args, **kwargs)
+
+
+class TimedRouter(RequestRouter):
+    def resolve(self, path: str, account_id: str | None = None) -> str:
+        return timed("resolve", super().resolve)(path, account_id)
+
+
+def load_questions(files: tuple[Path, ...]) -> list[str]:
+    questions = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            questions += [row["question"] for row in csv.DictReader(f, delimiter=";")]
+    return questions
+
+
+class ChatBackend:
+    """Бэкенд чата как в контейнере: пул воркеров, агент, отрисовка ответа"""
+
+    def __init__(self, finam_url: str, workers: int, account_id: str) -> None:
+        self.client = FinamAPIClient("load-test", finam_url)
+        index = AssetIndex.from_response(self.client.get_assets())
+        self.router = TimedRouter(index.lookup)
+        self.jobs = JobManager(max_workers=workers)
+        self.engine = UniversalVisualizationEngine()
+        self.account_id = account_id
+        self.system_prompt = create_system_prompt()
+
+    def render(self, api_calls: list[dict[str, Any]]) -> None:
+        """Что отправляет в браузер интерфейс: st.json ответа, для свечей — график"""
+        for api_call in api_calls:
+            json.dumps(api_call["response"], ensure_ascii=False)
+            if "/bars" in api_call["path"] and api_call["response"].get("bars"):
+                candles = Candles.from_response(api_call["response"])
+                self.engine.create_chart("technical_analysis", {"historical_data": candles}).to_json()
+
+    def turn(self, session_id: str, question: str) -> dict[str, Any]:
+        """Выполнить ход и вернуть время по этапам"""
+        submitted = time.perf_counter()
+        messages = [{"role": "system", "content": self.system_prompt}, {"role": "user", "content": question}]
+
+        def run(job: ChatJob) -> dict[str, float]:
+            _current.timings = timings = defaultdict(float)
+            timings["queue"] = time.perf_counter() - submitted
+            try:
+                turn = run_agent_turn(
+                    messages,
+                    execute=timed("api", self.client.execute_request),
+                    router=self.router,
+                    account_id=self.account_id,
+                    on_status=job.report,
+                    on_api_call=job.add_api_call,
+                    cancel_event=job.cancel_event,
+                )
+                timed("render", self.render)(turn.api_calls)
+                timings["api_errors"] = sum("error" in call["response"] for call in turn.api_calls)
+                return dict(timings)
+            finally:
+                _current.timings = None
+
+        job = self.jobs.submit(session_id, run)
+        try:
+            timings = job.result()
+        finally:
+            self.jobs.release(job)
+        timings["total"] = time.perf_counter() - submitted
+        return timings
+
+
+def run_stage(backend: ChatBackend, users: int, seconds: float, questions: list[str], think: float, seed: int) -> dict:
+    """Ступень нагрузки: users пользователей в течение seconds секунд"""
+    samples: list[dict[str, float]] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def user(n: int) -> None:
+        rng = random.Random(seed * 1000 + n)
+        # Разносим старт пользователей, чтобы не получить синхронные волны запросов
+        time.sleep(rng.random() * min(think, 1.0))
+        while time.perf_counter() < deadline:
+            try:
+                timings = backend.turn(f"user-{users}-{n}", rng.choice(questions))
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+            else:
+                with lock:
+                    samples.append(timings)
+            if think:
+                time.sleep(rng.expovariate(1 / think))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(n,), daemon=True) for n in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = np.array([s["total"] for s in samples]) * 1000 if samples else np.zeros(1)
+    turns = len(samples) + len(errors)
+    return {
+        "users": users,
+        "turns": turns,
+        "throughput": len(samples) / elapsed,
+        "error_rate": len(errors) / turns if turns else 0.0,
+        "api_error_rate": sum(s.get("api_errors", 0) > 0 for s in samples) / len(samples) if samples else 0.0,
+        "p50_ms": float(np.percentile(total, 50)),
+        "p95_ms": float(np.percentile(total, 95)),
+        "p99_ms": float(np.percentile(total, 99)),
+        "stages": {
+            stage: {
+                "p50_ms": float(np.percentile([s.get(stage, 0.0) * 1000 for s in samples], 50)) if samples else 0.0,
+                "p95_ms": float(np.percentile([s.get(stage, 0.0) * 1000 for s in samples], 95)) if samples else 0.0,
+            }
+            for stage in STAGES
+        },
+        "errors": sorted(set(errors))[:5],
+    }
+
+
+def saturation(results: list[dict], gain: float = 0.5, max_error_rate: float = 0.05) -> dict | None:
+    """
+    Первая ступень, где бэкенд перестает масштабироваться
+
+    Насыщение — пропускная способность выросла меньше чем на долю gain от
+    роста числа пользователей (запросы копятся в очереди) или доля
+    неуспешных ходов превысила max_error_rate.
+    """
+    for previous, current in zip(results, results[1:], strict=False):
+        load_growth = current["users"] / previous["users"]
+        throughput_growth = current["throughput"] / previous["throughput"] if previous["throughput"] else 0.0
+        if current["error_rate"] > max_error_rate or throughput_growth < 1 + (load_growth - 1) * gain:
+            return current
+    return None
+
+
+def bottleneck(result: dict) -> str:
+    """Этап с наибольшей долей времени хода (по медианам)"""
+    return max(STAGES, key=lambda stage: result["stages"][stage]["p50_ms"])
+
+
+@click.command()
+@click.option("--users", default="1,2,4,8,16,32", help="Ступени нагрузки: число пользователей через запятую")
+@click.option("--stage-seconds", type=float, default=15.0, help="Длительность ступени")
+@click.option("--think-ms", type=float, default=500.0, help="Средняя пауза пользователя между вопросами (мс)")
+@click.option("--workers", type=int, default=None, help="Воркеров чата (по умолчанию APP_CHAT_WORKERS)")
+@click.option("--llm-latency-ms", type=float, default=300.0, help="Задержка OpenRouter до первого токена (мс)")
+@click.option("--tokens-per-second", type=float, default=80.0, help="Скорость генерации OpenRouter")
+@click.option("--api-latency-ms", type=float, default=40.0, help="Медианная задержка Finam API (мс)")
+@click.option("--error-rate", type=float, default=0.0, help="Доля ошибок 503 Finam API")
+@click.option(
+    "--questions",
+    "question_files",
+    type=click.Path(exists=True, path_type=Path),
+    multiple=True,
+    help="CSV с колонкой question (по умолчанию train.csv и test.csv)",
+)
+@click.option("--output", type=click.Path(path_type=Path), default=None, help="Сохранить результаты в JSON")
+@click.option("--seed", type=int, default=0, help="Зерно выбора вопросов, задержек и ошибок")
+def main(
+    users: str,
+    stage_seconds: float,
+    think_ms: float,
+    workers: int | None,
+    llm_latency_ms: float,
+    tokens_per_second: float,
+    api_latency_ms: float,
+    error_rate: float,
+    question_files: tuple[Path, ...],
+    output: Path | None,
+    seed: int,
+) -> None:
+    """Ступенчатая нагрузка на бэкенд чата с локальными Finam и OpenRouter"""
+    levels = [int(n) for n in users.split(",") if n.strip()]
+    questions = load_questions(question_files or (Path("data/processed/train.csv"), Path("data/processed/test.csv")))
+    workers = workers or Settings().chat_workers
+    click.echo(f"Вопросов: {len(questions)}, воркеров чата: {workers}, ступени: {levels} по {stage_seconds:.0f} с")
+
+    results = []
+    with ExitStack() as stack:
+        finam_faults = Faults(latency_ms=api_latency_ms, error_rate=error_rate, seed=seed)
+        finam = stack.enter_context(SandboxServer(FinamSimulator(seed=seed), faults=finam_faults))
+        llm_app = OpenRouterSimulator(tokens_per_second=tokens_per_second)
+        llm = stack.enter_context(SandboxServer(llm_app, faults=Faults(latency_ms=llm_latency_ms, seed=seed)))
+        set_llm_client(TimedLLMClient(Settings(openrouter_api_key="load-test", openrouter_base=llm.url)))
+        stack.callback(set_llm_client, None)
+        backend = ChatBackend(finam.url, workers, "ACC-001-A")
+        stack.callback(backend.jobs.shutdown)
+
+        header = f"{'users':>5} {'turns/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'err':>5}"
+        click.echo(header + "".join(f" {stage + ' p50':>11}" for stage in STAGES))
+        click.echo("=" * (len(header) + 12 * len(STAGES)))
+        for level in levels:
+            result = run_stage(backend, level, stage_seconds, questions, think_ms / 1000, seed)
+            results.append(result)
+            line = (
+                f"{level:>5} {result['throughput']:>8.2f} {result['p50_ms']:>7.0f} {result['p95_ms']:>7.0f} "
+                f"{result['p99_ms']:>7.0f} {result['error_rate']:>5.0%}"
+            )
+            click.echo(line + "".join(f" {result['stages'][stage]['p50_ms']:>11.1f}" for stage in STAGES))
+            for error in result["errors"]:
+                click.echo(f"      ⚠️ {error}")
+
+    saturated = saturation(results)
+    if saturated is None:
+        click.echo("\n✅ Насыщение не достигнуто — пропускная способность растет на всех ступенях")
+    else:
+        click.echo(
+            f"\n📈 Насыщение на {saturated['users']} пользователях: {saturated['throughput']:.2f} ходов/с, "
+            f"p95 {saturated['p95_ms']:.0f} мс, узкое место — {bottleneck(saturated)}"
+        )
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        report = {"workers": workers, "stages": results, "saturation": saturated and saturated["users"]}
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
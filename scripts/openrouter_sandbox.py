@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Локальный заменитель OpenRouter для замеров пропускной способности чата
+
+Отвечает на /chat/completions детерминированно по train.csv с заданными
+задержкой до первого токена и скоростью генерации, поддерживает stream и
+usage. Позволяет измерить накладные расходы и параллелизм собственного
+стека без реальной модели.
+
+Использование:
+    poetry run openrouter-sandbox --port 8801 --latency-ms 300 --tokens-per-second 80
+    OPENROUTER_BASE=http://127.0.0.1:8801 poetry run chat-cli
+"""
+
+from pathlib import Path
+
+import click
+
+from src.app.sandbox import Faults, OpenRouterSimulator, SandboxServer
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Адрес")
+@click.option("--port", type=int, default=8801, help="Порт")
+@click.option(
+    "--train-file",
+    type=click.Path(exists=True, path_type=Path),
+    default=Path("data/processed/train.csv"),
+    help="Примеры вопрос -> запрос",
+)
+@click.option("--latency-ms", type=float, default=0.0, help="Медиана задержки до первого токена (мс)")
+@click.option("--latency-sigma", type=float, default=0.5, help="Разброс задержки (sigma логнормального распределения)")
+@click.option("--tokens-per-second", type=float, default=0.0, help="Скорость генерации (0 — мгновенно)")
+@click.option("--error-rate", type=float, default=0.0, help="Доля ответов 503")
+@click.option("--rate-limit", type=int, default=0, help="Запросов в минуту на ключ (0 — без ограничения)")
+@click.option("--seed", type=int, default=0, help="Зерно задержек и ошибок")
+def main(
+    host: str,
+    port: int,
+    train_file: Path,
+    latency_ms: float,
+    latency_sigma: float,
+    tokens_per_second: float,
+    error_rate: float,
+    rate_limit: int,
+    seed: int,
+) -> None:
+    """Запустить заменитель OpenRouter"""
+    simulator = OpenRouterSimulator(train_file, tokens_per_second)
+    server = SandboxServer(simulator, host, port, Faults(latency_ms, latency_sigma, error_rate, rate_limit, seed))
+    click.echo(f"OpenRouter sandbox: {server.url} ({len(simulator.questions)} примеров из {train_file})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
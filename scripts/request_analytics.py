@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Аналитика ошибок по шаблонам эндпоинтов
+
+Exact-match accuracy не показывает, какие семейства эндпоинтов путает модель
+(расписание vs параметры vs информация об инструменте). Каждый request
+приводится к шаблону маршрута — как router.route_template: метод и query
+отбрасываются, тикер, счет и ордер заменяются плейсхолдерами — и к слотам
+symbol, account_id, order_id, interval. По парам эталон/предсказание
+строятся матрица ошибок шаблонов и доля ошибок в каждом слоте (слот
+сравнивается, только если шаблон угадан).
+
+Разбор векторный (регулярные выражения RE2 из pyarrow.compute по различным
+значениям колонки), счетчики — numpy, поэтому отчет можно строить на каждой
+итерации подбора промпта.
+
+Использование:
+    poetry run calculate-metrics --templates 10
+    poetry run calculate-metrics --templates 10 --chunk-mb 2
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from scripts.stream_eval import Vocabulary
+
+MISSING_TEMPLATE = "<missing>"
+SLOTS = ("symbol", "account_id", "order_id", "interval")
+BUFFER_ROWS = 1 << 18
+
+# Правила router.route_template; в RE2 нет lookbehind, поэтому разделитель захватывается и возвращается
+_TEMPLATE_RULES = (
+    (r"^[A-Z]+\s+", ""),
+    (r"\?.*$", ""),
+    (r"\{symbol:[^}]*\}", "{symbol}"),
+    (r"/[A-Za-z0-9._-]+@[A-Za-z0-9]+(/|$)", r"/{symbol}\1"),
+    (r"/v1/accounts/[^/{]+", "/v1/accounts/{account_id}"),
+    (r"/orders/[^/{]+", "/orders/{order_id}"),
+)
+# Слот -> варианты (первый найденный): в пути или в query
+_SLOT_PATTERNS = {
+    "symbol": (
+        r"\{symbol:(?P<value>[^}]*)\}",
+        r"/(?P<value>[A-Za-z0-9._-]+@[A-Za-z0-9]+)(?:[/?]|$)",
+        r"[?&]symbol=(?P<value>[^&]*)",
+    ),
+    "account_id": (r"/v1/accounts/(?P<value>[^/?]+)", r"[?&]account_id=(?P<value>[^&]*)"),
+    "order_id": (r"/orders/(?P<value>[^/?]+)", r"[?&]order_id=(?P<value>[^&]*)"),
+}
+_INTERVAL_PATTERNS = (r"[?&]interval\.start_time=(?P<value>[^&]*)", r"[?&]interval\.end_time=(?P<value>[^&]*)")
+
+
+@dataclass
+class CanonicalRequests:
+    """Шаблоны маршрутов и значения слотов ("" — слота нет) для колонки request"""
+
+    templates: pa.Array
+    slots: dict[str, pa.Array]
+
+    def replace(self, mask: pa.Array, other: "CanonicalRequests") -> "CanonicalRequests":
+        """Копия, в которой строки по маске взяты из other (по порядку)"""
+        return CanonicalRequests(
+            templates=pc.replace_with_mask(self.templates, mask, other.templates),
+            slots={slot: pc.replace_with_mask(values, mask, other.slots[slot]) for slot, values in self.slots.items()},
+        )
+
+
+def _extract(requests: pa.Array, pattern: str) -> pa.Array:
+    return pc.struct_field(pc.extract_regex(requests, pattern), "value")
+
+
+def canonicalize(requests: pa.Array) -> CanonicalRequests:
+    """Привести request к шаблону маршрута и слотам"""
+    requests = pc.fill_null(requests.cast(pa.string()), "")
+    # Различных request на порядки меньше, чем строк: регулярные выражения — только по словарю
+    encoded = requests.dictionary_encode()
+    canonical = _canonicalize_unique(pc.utf8_trim_whitespace(encoded.dictionary))
+    return CanonicalRequests(
+        templates=canonical.templates.take(encoded.indices),
+        slots={slot: values.take(encoded.indices) for slot, values in canonical.slots.items()},
+    )
+
+
+def _canonicalize_unique(requests: pa.Array) -> CanonicalRequests:
+    templates = requests
+    for pattern, replacement in _TEMPLATE_RULES:
+        templates = pc.replace_substring_regex(templates, pattern, replacement)
+    slots = {
+        slot: pc.coalesce(*(_extract(requests, pattern) for pattern in patterns), "")
+        for slot, patterns in _SLOT_PATTERNS.items()
+    }
+    start, end = (pc.fill_null(_extract(requests, pattern), "") for pattern in _INTERVAL_PATTERNS)
+    interval = pc.binary_join_element_wise(start, end, "/")
+    slots["interval"] = pc.if_else(pc.equal(interval, "/"), "", interval)
+    return CanonicalRequests(templates, slots)
+
+
+class TemplateAnalytics:
+    """Накопитель матрицы ошибок шаблонов и ошибок слотов по блокам пар эталон/предсказание"""
+
+    def __init__(self) -> None:
+        self.vocabulary = Vocabulary()  # "" (нет предсказания) — код 0
+        self.confusion: Counter[tuple[int, int]] = Counter()
+        self.correct: Counter[int] = Counter()
+        self.slot_counts = {slot: {"total": 0, "errors": 0} for slot in SLOTS}
+        self._pending: list[tuple[pa.Array, pa.Array, np.ndarray]] = []
+        self._pending_rows = 0
+
+    def update(self, true_requests: pa.Array, pred_requests: pa.Array, exact: np.ndarray) -> None:
+        """
+        Учесть блок выровненных пар
+
+        Мелкие блоки копятся до BUFFER_ROWS строк: чем больше окно, тем меньше
+        различных request на строку и тем дешевле разбор.
+
+        Args:
+            true_requests: Эталонные request
+            pred_requests: Предсказанные request ("" — предсказания нет)
+            exact: Признак полного совпадения (type и request) для каждой пары
+        """
+        self._pending.append((true_requests, pred_requests, exact))
+        self._pending_rows += len(exact)
+        if self._pending_rows >= BUFFER_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        true_parts, pred_parts, exact_parts = zip(*self._pending, strict=True)
+        self._pending, self._pending_rows = [], 0
+        true_requests = pa.concat_arrays([part.cast(pa.string()) for part in true_parts])
+        pred_requests = pa.concat_arrays([part.cast(pa.string()) for part in pred_parts])
+        exact = np.concatenate(exact_parts)
+        truth = canonicalize(true_requests)
+        # Совпавшие request разбирать повторно незачем: берется разбор эталона
+        differs = pc.not_equal(pc.fill_null(true_requests, ""), pc.fill_null(pred_requests, ""))
+        pred = truth.replace(differs, canonicalize(pred_requests.filter(differs)))
+        true_codes = self.vocabulary.encode(truth.templates)
+        pred_codes = self.vocabulary.encode(pred.templates)
+        # Пара кодов -> одно число: np.unique по int64 в разы быстрее, чем по столбцам
+        size = len(self.vocabulary.codes)
+        pairs, counts = np.unique(true_codes.astype(np.int64) * size + pred_codes, return_counts=True)
+        self.confusion.update(dict(zip(map(divmod, pairs.tolist(), [size] * len(pairs)), counts.tolist(), strict=True)))
+        codes, counts = np.unique(true_codes[exact], return_counts=True)
+        self.correct.update(dict(zip(codes.tolist(), counts.tolist(), strict=True)))
+        same_template = true_codes == pred_codes
+        for slot in SLOTS:
+            expected = truth.slots[slot]
+            checked = same_template & pc.not_equal(expected, "").to_numpy(zero_copy_only=False)
+            wrong = checked & pc.not_equal(expected, pred.slots[slot]).to_numpy(zero_copy_only=False)
+            self.slot_counts[slot]["total"] += int(checked.sum())
+            self.slot_counts[slot]["errors"] += int(wrong.sum())
+
+    def report(self) -> dict:
+        """
+        Отчет: шаблоны эталона (по убыванию числа запросов), матрица ошибок и слоты
+
+        Returns:
+            dict: templates {шаблон: total, correct, template_correct, accuracy, template_accuracy},
+                confusion {эталонный шаблон: {предсказанный шаблон: count}},
+                slots {слот: total, errors, error_rate}
+        """
+        self._flush()
+        names = sorted(self.vocabulary.codes, key=self.vocabulary.codes.get)
+        names[0] = MISSING_TEMPLATE
+        totals: Counter[int] = Counter()
+        confusion: dict[str, dict[str, int]] = {}
+        for (true_code, pred_code), count in sorted(self.confusion.items(), key=lambda item: -item[1]):
+            totals[true_code] += count
+            confusion.setdefault(names[true_code], {})[names[pred_code]] = count
+        templates = {}
+        for code, total in totals.most_common():
+            template_correct = self.confusion[code, code]
+            templates[names[code]] = {
+                "total": total,
+                "correct": self.correct[code],
+                "template_correct": template_correct,
+                "accuracy": self.correct[code] / total,
+                "template_accuracy": template_correct / total,
+            }
+        slots = {
+            slot: {**counts, "error_rate": counts["errors"] / counts["total"] if counts["total"] else 0.0}
+            for slot, counts in self.slot_counts.items()
+        }
+        return {"templates": templates, "confusion": confusion, "slots": slots}
+
+
+def confused_templates(report: dict, limit: int) -> list[tuple[str, str, int]]:
+    """Самые частые ошибки шаблона: (эталон, предсказание, число) вне диагонали матрицы"""
+    pairs = [
+        (true_template, pred_template, count)
+        for true_template, row in report["confusion"].items()
+        for pred_template, count in row.items()
+        if pred_template != true_template
+    ]
+    return sorted(pairs, key=lambda pair: -pair[2])[:limit]
+
+
+def template_analytics(predicted: dict[str, dict[str, str]], ground_truth: dict[str, dict[str, str]]) -> dict:
+    """Отчет по словарям calculate_metrics.load_csv ({uid: {type, request}})"""
+    missing = {"type": None, "request": ""}
+    true_rows = list(ground_truth.values())
+    pred_rows = [predicted.get(uid, missing) for uid in ground_truth]
+    true_types, true_requests, pred_types, pred_requests = (
+        pa.array([row[key] for row in rows], pa.string())
+        for rows in (true_rows, pred_rows)
+        for key in ("type", "request")
+    )
+    exact = pc.and_(pc.equal(true_types, pred_types), pc.equal(true_requests, pred_requests))
+    analytics = TemplateAnalytics()
+    analytics.update(true_requests, pred_requests, pc.fill_null(exact, False).to_numpy(zero_copy_only=False))
+    return analytics.report()
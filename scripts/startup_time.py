@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Время холодного старта точек входа (python -X importtime)
+
+Каждая точка входа импортируется в отдельном процессе с -X importtime;
+из вывода берется суммарное время импорта модуля (медиана по запускам)
+и самые тяжелые прямые импорты. Скрипт завершается с кодом 1, если время
+превышает бюджет или при старте подгружается запрещенная тяжелая
+зависимость (Streamlit, pandas, Plotly, ...), которая точке входа не нужна.
+Бюджеты заданы с запасом; на медленной машине их можно растянуть --scale.
+
+Использование:
+    poetry run startup-time
+    poetry run startup-time --entry chat-cli --runs 10
+    poetry run startup-time --scale 2   # медленная машина / CI
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import click
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass(frozen=True)
+class EntryPoint:
+    """Точка входа, ее бюджет на импорт и зависимости, которые она не должна загружать"""
+
+    name: str
+    module: str
+    budget_ms: float
+    forbidden: tuple[str, ...]
+
+
+ENTRY_POINTS = (
+    EntryPoint("chat-cli", "src.app.interfaces.chat_cli", 400, ("streamlit", "pandas", "plotly", "numpy")),
+    EntryPoint(
+        "calculate-metrics", "scripts.calculate_metrics", 60, ("streamlit", "pandas", "plotly", "numpy", "requests")
+    ),
+    EntryPoint("evaluate", "scripts.evaluate", 60, ("streamlit", "pandas", "plotly", "numpy", "requests")),
+)
+
+
+@dataclass
+class ImportTime:
+    """Одна строка -X importtime: собственное и суммарное время (мкс), имя и глубина вложенности"""
+
+    self_us: int
+    cumulative_us: int
+    name: str
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTime]:
+    """Разобрать stderr процесса, запущенного с -X importtime"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        stripped = name.lstrip(" ")
+        depth = (len(name) - len(stripped) - 1) // 2
+        rows.append(ImportTime(int(self_us), int(cumulative_us), stripped, depth))
+    return rows
+
+
+def direct_imports(rows: list[ImportTime], module: str) -> list[ImportTime]:
+    """Прямые импорты модуля верхнего уровня (дочерние строки печатаются перед родителем)"""
+    for index, row in enumerate(rows):
+        if row.depth == 0 and row.name == module:
+            children = []
+            for child in reversed(rows[:index]):
+                if child.depth == 0:
+                    break
+                if child.depth == 1:
+                    children.append(child)
+            return children
+    return []
+
+
+def measure(entry: EntryPoint) -> tuple[float, list[ImportTime], set[str]]:
+    """Время импорта (мс), импорты по порядку и загруженные запрещенные пакеты для одного холодного запуска"""
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry.module}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=env,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise click.ClickException(f"{entry.name}: import {entry.module} failed\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    total = next((row.cumulative_us for row in rows if row.depth == 0 and row.name == entry.module), 0)
+    loaded = {row.name.split(".", 1)[0] for row in rows}
+    return total / 1000, rows, loaded & set(entry.forbidden)
+
+
+@click.command()
+@click.option("--entry", "names", multiple=True, help="Точка входа (по умолчанию все)")
+@click.option("--runs", type=int, default=5, help="Число холодных запусков (берется медиана)")
+@click.option("--top", type=int, default=5, help="Сколько самых тяжелых прямых импортов показать")
+@click.option("--scale", type=float, default=1.0, help="Множитель бюджетов (медленная машина)")
+def main(names: tuple[str, ...], runs: int, top: int, scale: float) -> None:
+    """Проверить время импорта точек входа против бюджета"""
+    entries = [entry for entry in ENTRY_POINTS if not names or entry.name in names]
+    if not entries:
+        raise click.BadParameter(f"known entry points: {', '.join(entry.name for entry in ENTRY_POINTS)}")
+
+    failures = []
+    click.echo(f"{'entry point':<20} {'import, ms':>11} {'budget, ms':>11}")
+    click.echo("=" * 44)
+    for entry in entries:
+        measure(entry)  # прогрев: компиляция .pyc и кэш файловой системы
+        samples = [measure(entry) for _ in range(runs)]
+        median = statistics.median(total for total, _, _ in samples)
+        budget = entry.budget_ms * scale
+        _, rows, forbidden = samples[-1]
+        mark = "✅" if median <= budget and not forbidden else "❌"
+        click.echo(f"{entry.name:<20} {median:>11.1f} {budget:>11.0f}  {mark}")
+        for row in sorted(direct_imports(rows, entry.module), key=lambda r: r.cumulative_us, reverse=True)[:top]:
+            click.echo(f"  {row.cumulative_us / 1000:>8.1f} ms  {row.name}")
+        if median > budget:
+            failures.append(f"{entry.name}: {median:.1f} ms > {budget:.0f} ms")
+        if forbidden:
+            failures.append(f"{entry.name}: imports {', '.join(sorted(forbidden))} at startup")
+
+    if failures:
+        click.echo("\n❌ Бюджет холодного старта превышен:")
+        for line in failures:
+            click.echo(f"  - {line}")
+        sys.exit(1)
+    click.echo("\n✅ Все точки входа укладываются в бюджет")
+
+
+if __name__ == "__main__":
+    main()
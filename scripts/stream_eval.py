@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+"""
+Потоковая оценка больших submission (миллионы строк, прогоны промптов)
+
+Считает те же метрики, что evaluate.py (public/private accuracy со строгой
+валидацией) и calculate_metrics.py (accuracy, precision/recall/F1 по type),
+но не держит CSV в словарях словарей:
+
+- CSV читается блоками потоковым парсером Arrow (pyarrow.csv, многопоточный);
+- эталон хранится колонками, отсортированными по хэшу uid: 128-битные
+  хэши uid и request и код type — ~40 байт на строку;
+- каждый блок предсказаний сопоставляется с эталоном через searchsorted,
+  результаты пишутся в массивы, выровненные по строкам эталона (при
+  повторе uid побеждает последняя строка, как в словаре);
+- метрики считаются векторно по этим массивам.
+
+Память ограничена размером эталона и блока и не зависит от размера
+submission. uid и request сравниваются по 128-битному хэшу (две независимые
+64-битные функции), ложное совпадение практически исключено (~n / 2^128).
+
+Использование:
+    poetry run evaluate-stream --submission data/processed/submission.csv \\
+        --private data/interim/private.csv --public data/interim/public.csv
+    poetry run calculate-metrics --chunk-mb 2   # потоковый режим calculate-metrics
+"""
+
+import csv
+import io
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import click
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+if TYPE_CHECKING:
+    from scripts.request_analytics import TemplateAnalytics
+
+CHUNK_MB = 2
+COLUMNS = ("uid", "type", "request")
+VALID_HTTP_METHODS = {"GET", "POST", "DELETE", "PUT", "PATCH", "HEAD", "OPTIONS"}
+TYPE_STATS_METHODS = ("GET", "POST", "DELETE")
+PUBLIC, PRIVATE = 1, 2
+MISSING = -1
+_HASH_KEYS = ("stream-eval-key1", "stream-eval-key2")
+# Ошибка evaluate.load_csv_data на строке с None в поле (None.strip())
+_NONE_STRIP_ERROR = "'NoneType' object has no attribute 'strip'"
+
+
+def read_chunks(file_path: Path | str, chunk_mb: int = CHUNK_MB, strip: bool = False) -> Iterator[pa.RecordBatch]:
+    """
+    Блоки CSV (разделитель ;) с колонками uid, type, request в виде строк
+
+    Строки с лишними или недостающими полями Arrow отвергает; они разбираются
+    как в csv.DictReader (лишние поля отбрасываются, недостающие — None) и
+    возвращаются на свои места в блоке, чтобы при повторе uid побеждала та же
+    строка, что и в словаре.
+
+    Args:
+        file_path: Путь к CSV
+        chunk_mb: Размер блока чтения (МБ)
+        strip: Обрезать пробелы и пропускать строки с пустым uid (как evaluate.load_csv_data)
+
+    Raises:
+        ValueError: В режиме strip — если файл не читается или в строке с uid нет type/request
+            (evaluate.load_csv_data падает на таких строках)
+    """
+    try:
+        yield from _read_chunks(file_path, chunk_mb, strip)
+    except Exception as e:
+        if not strip:
+            raise
+        raise ValueError(f"Failed to load CSV file: {e}") from e
+
+
+def _read_chunks(file_path: Path | str, chunk_mb: int, strip: bool) -> Iterator[pa.RecordBatch]:
+    if not Path(file_path).stat().st_size:
+        return  # DictReader не видит в пустом файле ни одной строки, Arrow считает его ошибкой
+    rejected: list[tuple[int, str]] = []
+
+    def skip_invalid(row: pv.InvalidRow) -> str:
+        rejected.append((row.number, row.text))
+        return "skip"
+
+    reader = pv.open_csv(
+        file_path,
+        # Без потоков номера отвергнутых строк известны всегда
+        read_options=pv.ReadOptions(block_size=chunk_mb << 20, use_threads=False),
+        parse_options=pv.ParseOptions(delimiter=";", newlines_in_values=True, invalid_row_handler=skip_invalid),
+        convert_options=pv.ConvertOptions(
+            column_types=dict.fromkeys(COLUMNS, pa.string()),
+            include_columns=list(COLUMNS),
+            include_missing_columns=True,
+        ),
+    )
+    header: list[str] = []
+    number = 1  # номер последней записи, уже отданной в блоках (1 — заголовок, пустые строки не считаются)
+    for batch in reader:
+        # Записи блока — номера number+1 ... number+num_rows+count, включая отвергнутые
+        count = 0
+        while count < len(rejected) and rejected[count][0] <= number + batch.num_rows + count:
+            count += 1
+        if count:
+            header = header or _csv_header(file_path)
+            batch = _merge_rejected(batch, number, rejected[:count], header)
+            del rejected[:count]
+        number += batch.num_rows
+        yield _normalize(batch, strip)
+    if rejected:
+        header = header or _csv_header(file_path)
+        empty = pa.RecordBatch.from_arrays([pa.array([], pa.string())] * len(COLUMNS), names=list(COLUMNS))
+        yield _normalize(_merge_rejected(empty, number, rejected, header), strip)
+
+
+def _csv_header(file_path: Path | str) -> list[str]:
+    with open(file_path, encoding="utf-8", newline="") as f:
+        return next(csv.reader(f, delimiter=";"), [])
+
+
+def _merge_rejected(
+    batch: pa.RecordBatch, number: int, rejected: list[tuple[int, str]], header: list[str]
+) -> pa.RecordBatch:
+    """Вставить отвергнутые Arrow записи (номер, текст), разобранные как в csv.DictReader, на их места"""
+    rows = []
+    for _, text in rejected:
+        fields = next(csv.reader(io.StringIO(text), delimiter=";"), [])
+        rows.append(dict(zip(header, fields + [None] * (len(header) - len(fields)), strict=False)))
+    size = batch.num_rows + len(rows)
+    is_rejected = np.zeros(size, dtype=bool)
+    is_rejected[np.array([row_number for row_number, _ in rejected]) - number - 1] = True
+    order = np.empty(size, dtype=np.int64)
+    order[~is_rejected] = np.arange(batch.num_rows)
+    order[is_rejected] = np.arange(batch.num_rows, size)
+    columns = [
+        pa.concat_arrays([
+            batch.column(column).cast(pa.string()),
+            pa.array([row.get(column, "") for row in rows], pa.string()),
+        ]).take(order)
+        for column in COLUMNS
+    ]
+    return pa.RecordBatch.from_arrays(columns, names=list(COLUMNS))
+
+
+def _normalize(batch: pa.RecordBatch, strip: bool) -> pa.RecordBatch:
+    columns = [batch.column(column).cast(pa.string()) for column in COLUMNS]
+    if strip:
+        uid, types, requests = columns
+        has_uid = pc.not_equal(pc.utf8_trim_whitespace(pc.fill_null(uid, "")), "")
+        broken = pc.or_(pc.is_null(uid), pc.and_(has_uid, pc.or_(pc.is_null(types), pc.is_null(requests))))
+        if pc.any(broken).as_py():
+            raise ValueError(_NONE_STRIP_ERROR)
+    columns = [pc.fill_null(column, "") for column in columns]
+    if strip:
+        columns = [pc.utf8_trim_whitespace(column) for column in columns]
+    batch = pa.RecordBatch.from_arrays(columns, names=list(COLUMNS))
+    if strip:
+        batch = batch.filter(pc.not_equal(batch.column("uid"), ""))
+    return batch
+
+
+def hash_strings(values: pa.Array) -> tuple[np.ndarray, np.ndarray]:
+    """128-битный хэш строк (две 64-битные половины)"""
+    objects = values.to_numpy(zero_copy_only=False)
+    return tuple(pd.util.hash_array(objects, hash_key=key, categorize=False) for key in _HASH_KEYS)
+
+
+class Vocabulary:
+    """Коды строковых значений, которых немного (type, шаблоны маршрутов): пустая строка — 0"""
+
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {"": 0}
+
+    def encode(self, values: pa.Array) -> np.ndarray:
+        encoded = values.dictionary_encode()
+        mapping = np.array([self.code(value) for value in encoded.dictionary.to_pylist()], dtype=np.int32)
+        return mapping[encoded.indices.to_numpy()]
+
+    def code(self, value: str) -> int:
+        return self.codes.setdefault(value, len(self.codes))
+
+    def mask(self, values: set[str]) -> np.ndarray:
+        """Признак «значение из набора» для каждого кода"""
+        names = sorted(self.codes, key=self.codes.get)
+        return np.array([name in values for name in names], dtype=bool)
+
+
+class SplitLoadError(ValueError):
+    """Ошибка чтения файла одной части эталона"""
+
+    def __init__(self, split: int, error: Exception) -> None:
+        super().__init__(str(error))
+        self.split = split
+
+
+def _concatenate(parts: list[np.ndarray], dtype: type) -> np.ndarray:
+    return np.concatenate(parts) if parts else np.array([], dtype=dtype)
+
+
+@dataclass
+class GroundTruth:
+    """Эталон колонками, отсортированными по хэшу uid"""
+
+    uid_hash: tuple[np.ndarray, np.ndarray]  # по возрастанию первой половины, без повторов uid
+    types: np.ndarray  # int32 коды Vocabulary
+    request_hash: tuple[np.ndarray, np.ndarray]
+    splits: np.ndarray  # uint8 битовая маска PUBLIC | PRIVATE
+    vocabulary: Vocabulary
+
+    @classmethod
+    def from_csv(
+        cls,
+        files: dict[int, Path | str],
+        vocabulary: Vocabulary | None = None,
+        chunk_mb: int = CHUNK_MB,
+        strip: bool = False,
+    ) -> "GroundTruth":
+        """
+        Загрузить эталон из одного или нескольких CSV
+
+        Args:
+            files: Битовая метка части (PUBLIC, PRIVATE) -> путь к CSV
+
+        Raises:
+            SplitLoadError: Если файл одной из частей не читается
+        """
+        vocabulary = vocabulary or Vocabulary()
+        parts: dict[str, list[np.ndarray]] = {"u1": [], "u2": [], "r1": [], "r2": [], "types": [], "splits": []}
+        for split, file_path in files.items():
+            try:
+                for batch in read_chunks(file_path, chunk_mb, strip):
+                    for prefix, column in (("u", "uid"), ("r", "request")):
+                        first, second = hash_strings(batch.column(column))
+                        parts[f"{prefix}1"].append(first)
+                        parts[f"{prefix}2"].append(second)
+                    parts["types"].append(vocabulary.encode(batch.column("type")))
+                    parts["splits"].append(np.full(batch.num_rows, split, dtype=np.uint8))
+            except Exception as e:
+                raise SplitLoadError(split, e) from e
+        u1, u2, r1, r2 = (_concatenate(parts[name], np.uint64) for name in ("u1", "u2", "r1", "r2"))
+        order = np.lexsort((u2, u1))  # устойчивая: повторы uid остаются в порядке файлов
+        u1, u2 = u1[order], u2[order]
+        # Повторы uid: значения берутся из последней строки, метки частей объединяются
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (u1[1:] != u1[:-1]) | (u2[1:] != u2[:-1])
+        group = np.cumsum(last) - last  # номер группы одинаковых uid
+        splits = np.zeros(int(last.sum()), dtype=np.uint8)
+        np.bitwise_or.at(splits, group, _concatenate(parts["splits"], np.uint8)[order])
+        keep = order[last]
+        return cls(
+            uid_hash=(u1[last], u2[last]),
+            types=_concatenate(parts["types"], np.int32)[keep],
+            request_hash=(r1[keep], r2[keep]),
+            splits=splits,
+            vocabulary=vocabulary,
+        )
+
+    def __post_init__(self) -> None:
+        h1 = self.uid_hash[0]
+        self._collisions = bool((h1[1:] == h1[:-1]).any())
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def lookup(self, uids: pa.Array) -> np.ndarray:
+        """Индексы строк эталона для uid блока (-1 — uid нет в эталоне)"""
+        q1, q2 = hash_strings(uids)
+        h1, h2 = self.uid_hash
+        if not len(h1):
+            return np.full(len(q1), MISSING, dtype=np.int64)
+        # Отсортированные ключи ищутся в несколько раз быстрее (последовательный доступ к эталону)
+        order = np.argsort(q1)
+        left = np.empty(len(q1), dtype=np.int64)
+        left[order] = np.searchsorted(h1, q1[order])
+        index = np.minimum(left, len(h1) - 1)
+        found = (h1[index] == q1) & (h2[index] == q2)
+        if self._collisions:
+            # Совпадение первой половины хэша у разных uid (~n^2 / 2^64) — разбираем по второй
+            right = np.searchsorted(h1, q1, side="right")
+            for i in np.flatnonzero(right - left > 1):
+                candidates = np.flatnonzero(h2[left[i] : right[i]] == q2[i])
+                if len(candidates):
+                    found[i], index[i] = True, left[i] + candidates[0]
+        return np.where(found, index, MISSING)
+
+
+class StreamingEvaluation:
+    """
+    Предсказания, выровненные по строкам эталона
+
+    Args:
+        truth: Эталон
+        keep_errors: Запоминать type/request ошибочных предсказаний (для вывода примеров ошибок)
+    """
+
+    def __init__(self, truth: GroundTruth, keep_errors: bool = False) -> None:
+        self.truth = truth
+        size = len(truth)
+        self.pred_types = np.full(size, MISSING, dtype=np.int32)
+        self.request_match = np.zeros(size, dtype=bool)
+        self.request_empty = np.zeros(size, dtype=bool)
+        self.request_invalid = np.zeros(size, dtype=bool)
+        self.rows = 0
+        self.extra_uids: set[str] = set()
+        self.keep_errors = keep_errors
+        self.errors: dict[int, tuple[str, str]] = {}
+
+    def update(self, batch: pa.RecordBatch) -> None:
+        """Учесть блок предсказаний"""
+        self.rows += batch.num_rows
+        index = self.truth.lookup(batch.column("uid"))
+        found = index != MISSING
+        if not found.all():
+            self.extra_uids.update(batch.column("uid").filter(pa.array(~found)).to_pylist())
+        # Повтор uid внутри блока: остается последняя строка
+        _, last = np.unique(index[::-1], return_index=True)
+        keep = np.zeros(len(index), dtype=bool)
+        keep[len(index) - 1 - last] = True
+        keep &= found
+        rows = index[keep]
+        batch = batch.filter(pa.array(keep))
+        types = self.truth.vocabulary.encode(batch.column("type"))
+        requests = batch.column("request")
+        h1, h2 = hash_strings(requests)
+        match = (h1 == self.truth.request_hash[0][rows]) & (h2 == self.truth.request_hash[1][rows])
+        empty = pc.equal(requests, "")
+        invalid = pc.invert(pc.or_(empty, pc.starts_with(requests, "/")))
+        self.pred_types[rows] = types
+        self.request_match[rows] = match
+        self.request_empty[rows] = empty.to_numpy(zero_copy_only=False)
+        self.request_invalid[rows] = invalid.to_numpy(zero_copy_only=False)
+        if self.keep_errors:
+            exact = match & (types == self.truth.types[rows])
+            if self.errors:
+                for row in rows[exact]:
+                    self.errors.pop(int(row), None)
+            wrong = pa.array(~exact)
+            for row, pred_type, pred_request in zip(
+                rows[~exact].tolist(),
+                batch.column("type").filter(wrong).to_pylist(),
+                requests.filter(wrong).to_pylist(),
+                strict=True,
+            ):
+                self.errors[row] = (pred_type, pred_request)
+
+    @property
+    def submission_size(self) -> int:
+        """Число различных uid в предсказаниях"""
+        return int((self.pred_types != MISSING).sum()) + len(self.extra_uids)
+
+    def accuracy(self, mask: np.ndarray | None = None) -> dict[str, int]:
+        """Счетчики совпадений по строкам эталона (mask — подмножество строк)"""
+        present = self.pred_types != MISSING
+        type_match = present & (self.pred_types == self.truth.types)
+        request_match = present & self.request_match
+        if mask is None:
+            mask = np.ones(len(self.truth), dtype=bool)
+        return {
+            "total": int(mask.sum()),
+            "correct": int((type_match & request_match & mask).sum()),
+            "correct_type": int((type_match & mask).sum()),
+            "correct_request": int((request_match & mask).sum()),
+        }
+
+    def type_stats(self) -> dict[str, dict[str, float]]:
+        """tp/fp/fn и precision/recall/F1 по методам — как calculate_metrics.calculate_accuracy"""
+        present = self.pred_types != MISSING
+        type_match = present & (self.pred_types == self.truth.types)
+        exact = type_match & self.request_match
+        stats = {}
+        for method in TYPE_STATS_METHODS:
+            code = self.truth.vocabulary.code(method)
+            is_true = self.truth.types == code
+            tp = int((exact & is_true).sum())
+            fn = int((is_true & ~type_match).sum())  # нет предсказания или другой type
+            fp = int((present & ~type_match & (self.pred_types == code)).sum())
+            precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+            recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0
+            stats[method] = {"tp": tp, "fp": fp, "fn": fn, "precision": precision, "recall": recall, "f1": f1}
+        return stats
+
+    def validation_errors(self) -> list[str]:
+        """Ошибки строгой валидации — те же сообщения, что evaluate.validate_submission"""
+        errors = []
+        present = self.pred_types != MISSING
+        missing = len(self.truth) - int(present.sum())
+        if missing:
+            errors.append(f"Missing {missing} required UIDs")
+        if self.extra_uids:
+            errors.append(f"Found {len(self.extra_uids)} extra UIDs not in test set")
+        valid = self.truth.vocabulary.mask(VALID_HTTP_METHODS)
+        types = self.pred_types[present]
+        empty_type = int((types == 0).sum())
+        empty_request = int(self.request_empty[present].sum())
+        invalid_method = int(((types != 0) & ~valid[types]).sum())
+        invalid_path = int(self.request_invalid[present].sum())
+        if empty_type > 0:
+            errors.append(f"Empty 'type' field in {empty_type} predictions")
+        if empty_request > 0:
+            errors.append(f"Empty 'request' field in {empty_request} predictions")
+        if invalid_method > 0:
+            errors.append(f"Invalid HTTP method in {invalid_method} predictions (must be GET/POST/DELETE/etc)")
+        if invalid_path > 0:
+            errors.append(f"Invalid API path in {invalid_path} predictions (must start with /)")
+        return errors
+
+
+def evaluate_predictions(
+    pred_file: Path | str,
+    truth: GroundTruth,
+    chunk_mb: int = CHUNK_MB,
+    strip: bool = False,
+    keep_errors: bool = False,
+) -> StreamingEvaluation:
+    """Пройти по предсказаниям блоками и выровнять их по эталону"""
+    evaluation = StreamingEvaluation(truth, keep_errors)
+    for batch in read_chunks(pred_file, chunk_mb, strip):
+        evaluation.update(batch)
+    return evaluation
+
+
+def _split_metrics(evaluation: StreamingEvaluation, split: int) -> tuple[float, dict]:
+    counts = evaluation.accuracy((evaluation.truth.splits & split) != 0)
+    total = counts["total"]
+    if not total:
+        return 0.0, {}
+    return counts["correct"] / total * 100.0, {
+        "total_samples": total,
+        "correct_predictions": counts["correct"],
+        "type_accuracy": round(counts["correct_type"] / total * 100.0, 2),
+        "request_accuracy": round(counts["correct_request"] / total * 100.0, 2),
+    }
+
+
+def _failure(error: str) -> dict:
+    return {"public_score": 0.0, "private_score": 0.0, "metrics": {}, "errors": [error]}
+
+
+def _split_load_failure(submission_path: str, chunk_mb: int, error: SplitLoadError) -> dict:
+    """Ошибка загрузки теста; evaluate читает submission раньше тестов, поэтому его ошибки сообщаются первыми"""
+    try:
+        rows = sum(batch.num_rows for batch in read_chunks(submission_path, chunk_mb, strip=True))
+    except Exception as e:
+        return _failure(f"Failed to parse submission file: {e!s}")
+    if not rows:
+        return _failure("Submission file is empty")
+    name = "public" if error.split == PUBLIC else "private"
+    return _failure(f"Failed to load {name} test (internal error): {error!s}")
+
+
+def evaluate_stream(
+    submission_path: str, private_test_path: str, public_test_path: str, chunk_mb: int = CHUNK_MB
+) -> dict:
+    """Потоковый аналог evaluate.evaluate: тот же формат результата и те же сообщения об ошибках"""
+    if not Path(submission_path).exists():
+        return _failure("Submission file not found")
+    if not Path(public_test_path).exists():
+        return _failure("Public test file not found (internal error)")
+    if not Path(private_test_path).exists():
+        return _failure("Private test file not found (internal error)")
+
+    try:
+        try:
+            truth = GroundTruth.from_csv({PUBLIC: public_test_path, PRIVATE: private_test_path}, None, chunk_mb, True)
+        except SplitLoadError as e:
+            return _split_load_failure(submission_path, chunk_mb, e)
+        try:
+            evaluation = evaluate_predictions(submission_path, truth, chunk_mb, strip=True)
+        except Exception as e:
+            return _failure(f"Failed to parse submission file: {e!s}")
+        if not evaluation.rows:
+            return _failure("Submission file is empty")
+
+        validation_errors = evaluation.validation_errors()
+        if validation_errors:
+            return {
+                "public_score": 0.0,
+                "private_score": 0.0,
+                "metrics": {
+                    "validation_failed": True,
+                    "submission_size": evaluation.submission_size,
+                    "required_size": len(truth),
+                },
+                "errors": validation_errors,
+            }
+
+        public_score, public_metrics = _split_metrics(evaluation, PUBLIC)
+        private_score, private_metrics = _split_metrics(evaluation, PRIVATE)
+        return {
+            "public_score": round(public_score, 2),
+            "private_score": round(private_score, 2),
+            "metrics": {
+                "public_metrics": public_metrics,
+                "private_metrics": private_metrics,
+                "submission_size": evaluation.submission_size,
+                "validation_passed": True,
+            },
+            "errors": [],
+        }
+    except Exception as e:
+        return _failure(f"Unexpected error during evaluation: {e!s}")
+
+
+def _truth_rows(
+    evaluation: StreamingEvaluation, true_file: Path | str, chunk_mb: int
+) -> Iterator[tuple[pa.RecordBatch, np.ndarray]]:
+    """
+    Второй проход по эталону: блоки строк, оставшихся в эталоне, и их индексы
+
+    При повторе uid в эталоне берется строка, совпадающая с сохраненной (последняя в файле).
+    """
+    truth = evaluation.truth
+    seen = np.zeros(len(truth), dtype=bool)
+    for batch in read_chunks(true_file, chunk_mb):
+        index = truth.lookup(batch.column("uid"))
+        rows = np.maximum(index, 0)
+        h1, h2 = hash_strings(batch.column("request"))
+        keep = (index != MISSING) & (h1 == truth.request_hash[0][rows]) & (h2 == truth.request_hash[1][rows])
+        keep &= truth.vocabulary.encode(batch.column("type")) == truth.types[rows]
+        # Одинаковые повторы: первая строка
+        _, first = np.unique(np.where(keep, rows, MISSING), return_index=True)
+        keep &= np.isin(np.arange(len(rows)), first) & ~seen[rows]
+        seen[rows[keep]] = True
+        yield batch.filter(pa.array(keep)), rows[keep]
+
+
+def _second_pass(
+    evaluation: StreamingEvaluation,
+    true_file: Path | str,
+    chunk_mb: int,
+    keep_errors: bool,
+    analytics: "TemplateAnalytics | None",
+) -> list[dict[str, Any]]:
+    """Записи ошибок в формате calculate_metrics и аналитика шаблонов: второй проход только по эталону"""
+    records = []
+    has_error = np.zeros(len(evaluation.truth), dtype=bool)
+    has_error[np.fromiter(evaluation.errors, dtype=np.int64, count=len(evaluation.errors))] = True
+    for batch, rows in _truth_rows(evaluation, true_file, chunk_mb):
+        missing = evaluation.pred_types[rows] == MISSING
+        selected = missing | has_error[rows]
+        if analytics is not None:
+            # Предсказанный request: из errors, "" если предсказания нет, иначе совпал с эталоном
+            replacements = [evaluation.errors.get(row, ("", ""))[1] for row in rows[selected].tolist()]
+            pred_requests = pc.replace_with_mask(
+                batch.column("request"), pa.array(selected), pa.array(replacements, pa.string())
+            )
+            exact = ~missing & (evaluation.pred_types[rows] == evaluation.truth.types[rows])
+            analytics.update(batch.column("request"), pred_requests, exact & evaluation.request_match[rows])
+        if not keep_errors:
+            continue
+        for uid, true_type, true_request, row in zip(
+            *(batch.column(column).filter(pa.array(selected)).to_pylist() for column in COLUMNS),
+            rows[selected].tolist(),
+            strict=True,
+        ):
+            if evaluation.pred_types[row] == MISSING:
+                records.append({
+                    "uid": uid,
+                    "error": "missing",
+                    "true_type": true_type,
+                    "true_request": true_request,
+                    "pred_type": None,
+                    "pred_request": None,
+                })
+            else:
+                pred_type, pred_request = evaluation.errors[row]
+                records.append({
+                    "uid": uid,
+                    "error": "mismatch",
+                    "true_type": true_type,
+                    "true_request": true_request,
+                    "pred_type": pred_type,
+                    "pred_request": pred_request,
+                    "type_match": "yes" if pred_type == true_type else "no",
+                    "request_match": "yes" if evaluation.request_match[row] else "no",
+                })
+    return records
+
+
+def calculate_accuracy_stream(
+    pred_file: Path | str,
+    true_file: Path | str,
+    chunk_mb: int = CHUNK_MB,
+    keep_errors: bool = False,
+    templates: bool = False,
+) -> tuple[float, dict]:
+    """
+    Потоковый аналог calculate_metrics.calculate_accuracy по файлам
+
+    Список errors заполняется только при keep_errors, отчет request_analytics
+    (stats["templates"]) — при templates; оба строятся вторым проходом по эталону.
+    Число ошибок всегда есть в error_count.
+    """
+    truth = GroundTruth.from_csv({PUBLIC: true_file}, chunk_mb=chunk_mb)
+    evaluation = evaluate_predictions(pred_file, truth, chunk_mb, keep_errors=keep_errors or templates)
+    counts = evaluation.accuracy()
+    total = counts["total"]
+    accuracy = counts["correct"] / total if total > 0 else 0.0
+    stats = {
+        **counts,
+        "type_accuracy": counts["correct_type"] / total if total > 0 else 0.0,
+        "request_accuracy": counts["correct_request"] / total if total > 0 else 0.0,
+        "error_count": total - counts["correct"],
+        "errors": [],
+        "type_stats": evaluation.type_stats(),
+    }
+    if keep_errors or templates:
+        # Импорт здесь: request_analytics сам импортирует этот модуль
+        from scripts.request_analytics import TemplateAnalytics
+
+        analytics = TemplateAnalytics() if templates else None
+        stats["errors"] = _second_pass(evaluation, true_file, chunk_mb, keep_errors, analytics)
+        if analytics is not None:
+            stats["templates"] = analytics.report()
+    return accuracy, stats
+
+
+@click.command()
+@click.option("--submission", type=click.Path(exists=True, path_type=Path), required=True, help="submission.csv")
+@click.option(
+    "--private", "private_file", type=click.Path(exists=True, path_type=Path), required=True, help="Приватный тест"
+)
+@click.option(
+    "--public", "public_file", type=click.Path(exists=True, path_type=Path), required=True, help="Публичный тест"
+)
+@click.option("--chunk-mb", type=int, default=CHUNK_MB, help="Размер блока чтения CSV (МБ)")
+def main(submission: Path, private_file: Path, public_file: Path, chunk_mb: int) -> None:
+    """Потоковая оценка submission (public/private accuracy)"""
+    result = evaluate_stream(str(submission), str(private_file), str(public_file), chunk_mb)
+    click.echo(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
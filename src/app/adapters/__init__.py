@@ -1,3 +1,24 @@
-from .finam_client import FinamAPIClient
+from ..lazy import lazy_exports
 
-__all__ = ["FinamAPIClient"]
+__all__ = [
+    "FinamAPIClient",
+    "LocalFeed",
+    "MarketDataFeed",
+    "PollingFeed",
+    "RateLimiter",
+    "TokenManager",
+    "get_token_manager",
+]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "FinamAPIClient": ".finam_client",
+        "LocalFeed": ".market_feeds",
+        "MarketDataFeed": ".market_feeds",
+        "PollingFeed": ".market_feeds",
+        "RateLimiter": ".rate_limit",
+        "TokenManager": ".auth",
+        "get_token_manager": ".auth",
+    },
+)
@@ -0,0 +1,147 @@
+"""
+Сессионные токены Finam TradeAPI
+
+Секрет обменивается на JWT через POST /v1/sessions, срок действия берется
+из POST /v1/sessions/details (или из claim exp самого JWT). Токен
+обновляется заранее в фоновом потоке, а менеджер один на пару (секрет,
+base URL) в процессе — все клиенты используют один токен, и истечение
+срока не вызывает лавину повторных авторизаций.
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+import requests
+
+DEFAULT_TTL = 15 * 60  # если срок действия не удалось узнать
+RETRY_DELAY = 5.0
+
+
+def _looks_like_jwt(token: str) -> bool:
+    return token.count(".") == 2 and token.startswith("eyJ")
+
+
+def _jwt_expiry(token: str) -> float | None:
+    """Claim exp из payload JWT (без проверки подписи)"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _parse_expiry(details: dict[str, Any]) -> float | None:
+    expires_at = details.get("expires_at")
+    if not expires_at:
+        return None
+    try:
+        return datetime.fromisoformat(str(expires_at).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class TokenManager:
+    """
+    Жизненный цикл сессионного JWT для одного секрета
+
+    Args:
+        secret: Секрет (FINAM_ACCESS_TOKEN) или уже готовый JWT
+        base_url: Базовый URL API
+        refresh_margin: За сколько секунд до истечения обновлять токен
+    """
+
+    def __init__(self, secret: str, base_url: str, refresh_margin: float = 60.0) -> None:
+        self.secret = secret
+        self.base_url = base_url
+        self.refresh_margin = refresh_margin
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._refresher: threading.Thread | None = None
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    def _post(self, path: str, payload: dict[str, str]) -> dict[str, Any]:
+        response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    def _authenticate(self) -> tuple[str, float]:
+        if _looks_like_jwt(self.secret):
+            token = self.secret
+        else:
+            token = self._post("/v1/sessions", {"secret": self.secret})["token"]
+        try:
+            expires_at = _parse_expiry(self._post("/v1/sessions/details", {"token": token}))
+        except (requests.RequestException, ValueError):
+            expires_at = None
+        return token, expires_at or _jwt_expiry(token) or time.time() + DEFAULT_TTL
+
+    def _fresh(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - self.refresh_margin
+
+    def refresh(self) -> str:
+        """
+        Получить новый JWT (параллельные вызовы ждут одного обмена)
+
+        Если обмен не удался, используется сам секрет — как заголовок
+        Authorization без сессии; следующая попытка — через RETRY_DELAY.
+        """
+        with self._lock:
+            if self._fresh():
+                return self._token
+            try:
+                self._token, self._expires_at = self._authenticate()
+            except (requests.RequestException, KeyError, ValueError):
+                self._token, self._expires_at = self.secret, time.time() + self.refresh_margin + RETRY_DELAY
+            return self._token
+
+    def token(self) -> str:
+        """Действующий токен; при первом вызове запускает фоновое обновление"""
+        if self._refresher is None:
+            self.start()
+        return self._token if self._fresh() else self.refresh()
+
+    def invalidate(self) -> None:
+        """Сбросить токен (например, после ответа 401)"""
+        with self._lock:
+            self._expires_at = 0.0
+        self._wake.set()
+
+    def start(self) -> None:
+        """Запустить фоновый поток, обновляющий токен до истечения срока"""
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._run, name="finam-token-refresh", daemon=True)
+        self._refresher.start()
+
+    def _run(self) -> None:
+        while True:
+            self.refresh()
+            delay = max(self._expires_at - self.refresh_margin - time.time(), RETRY_DELAY)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+
+_managers: dict[tuple[str, str], TokenManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(secret: str, base_url: str) -> TokenManager:
+    """Общий для процесса менеджер токена (секрет, base URL)"""
+    with _managers_lock:
+        manager = _managers.get((secret, base_url))
+        if manager is None:
+            manager = _managers[secret, base_url] = TokenManager(secret, base_url)
+        return manager
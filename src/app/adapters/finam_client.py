@@ -4,11 +4,29 @@ https://tradeapi.finam.ru/
 """
 
 import os
+import time
 from functools import lru_cache
 from typing import Any
 
 import requests
 
+from ..core.metrics import FINAM_REQUEST_SECONDS
+from ..core.router import route_template
+from .auth import TokenManager, get_token_manager
+from .rate_limit import RateLimiter
+
+
+@lru_cache(maxsize=4096)
+def _request_seconds(method: str, path: str, status: int | str) -> Any:  # noqa: ANN401
+    """
+    Дочерняя гистограмма задержки для запроса
+
+    Шаблон маршрута (четыре регулярных выражения) и поиск метки считаются
+    один раз на (метод, путь, статус); статус всегда строка, чтобы 200 и "200"
+    не стали двумя сериями.
+    """
+    return FINAM_REQUEST_SECONDS.labels(method.upper(), route_template(path), str(status))
+
 
 class FinamAPIClient:
     """
@@ -17,23 +35,34 @@ class FinamAPIClient:
     Документация: https://tradeapi.finam.ru/
     """
 
-    def __init__(self, access_token: str | None = None, base_url: str | None = None) -> None:
+    def __init__(
+        self, access_token: str | None = None, base_url: str | None = None, rate_limiter: RateLimiter | None = None
+    ) -> None:
         """
         Инициализация клиента
 
         Args:
             access_token: Токен доступа к API (из переменной окружения FINAM_ACCESS_TOKEN)
             base_url: Базовый URL API (по умолчанию из документации)
+            rate_limiter: Ограничитель частоты запросов
+                (по умолчанию FINAM_RATE_LIMIT запросов в минуту, 200)
+
+        Секрет обменивается на сессионный JWT, общий для всех клиентов процесса
+        (FINAM_USE_SESSIONS=false — передавать секрет в заголовке как есть).
         """
         self.access_token = access_token or os.getenv("FINAM_ACCESS_TOKEN", "")
         self.base_url = base_url or os.getenv("FINAM_API_BASE_URL", "https://api.finam.ru")
+        self.rate_limiter = rate_limiter or RateLimiter(int(os.getenv("FINAM_RATE_LIMIT", "200")), per=60.0)
         self.session = requests.Session()
+        self.tokens: TokenManager | None = None
 
         if self.access_token:
             self.session.headers.update({
                 "Authorization": f"{self.access_token}",
                 "Content-Type": "application/json",
             })
+            if os.getenv("FINAM_USE_SESSIONS", "true").lower() in {"1", "true", "yes"}:
+                self.tokens = get_token_manager(self.access_token, self.base_url)
 
     def execute_request(self, method: str, path: str, **kwargs: Any) -> dict[str, Any]:  # noqa: ANN401
         """
@@ -51,9 +80,13 @@ class FinamAPIClient:
             requests.HTTPError: Если запрос завершился с ошибкой
         """
         url = f"{self.base_url}{path}"
+        self.rate_limiter.acquire()
 
+        started = time.perf_counter()
+        status: int | str = "error"
         try:
-            response = self.session.request(method, url, timeout=30, **kwargs)
+            response = self._send(method, url, **kwargs)
+            status = response.status_code
             response.raise_for_status()
 
             # Если ответ пустой (например, для DELETE)
@@ -64,19 +97,35 @@ class FinamAPIClient:
 
         except requests.exceptions.HTTPError as e:
             # Пытаемся извлечь детали ошибки из ответа
-            error_detail = {"error": str(e), "status_code": e.response.status_code if e.response else None}
+            error_detail = {"error": str(e), "status_code": e.response.status_code if e.response is not None else None}
 
             try:
-                if e.response and e.response.content:
+                if e.response is not None and e.response.content:
                     error_detail["details"] = e.response.json()
             except Exception:
-                error_detail["details"] = e.response.text if e.response else None
+                error_detail["details"] = e.response.text if e.response is not None else None
 
             return error_detail
 
         except Exception as e:
             return {"error": str(e), "type": type(e).__name__}
 
+        finally:
+            # Время без ожидания лимитера: задержка самого API по шаблону маршрута и статусу
+            _request_seconds(method, path, status).observe(time.perf_counter() - started)
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+        if self.tokens is None:
+            return self.session.request(method, url, timeout=30, **kwargs)
+        headers = {"Authorization": self.tokens.token()}
+        response = self.session.request(method, url, timeout=30, headers=headers, **kwargs)
+        if response.status_code == 401:
+            # Токен отозван или истек раньше срока — один повтор с новым
+            self.tokens.invalidate()
+            headers = {"Authorization": self.tokens.refresh()}
+            response = self.session.request(method, url, timeout=30, headers=headers, **kwargs)
+        return response
+
     # Удобные методы для частых операций
 
     def get_quote(self, symbol: str) -> dict[str, Any]:
@@ -127,6 +176,15 @@ class FinamAPIClient:
             params["interval.end_time"] = end
         return self.execute_request("GET", f"/v1/accounts/{account_id}/trades", params=params)
 
+    def get_transactions(self, account_id: str, start: str | None = None, end: str | None = None) -> dict[str, Any]:
+        """Получить историю транзакций (движения денег по счету)"""
+        params = {}
+        if start:
+            params["interval.start_time"] = start
+        if end:
+            params["interval.end_time"] = end
+        return self.execute_request("GET", f"/v1/accounts/{account_id}/transactions", params=params)
+
     def get_positions(self, account_id: str) -> dict[str, Any]:
         """Получить открытые позиции"""
         # Позиции обычно включены в ответ get_account
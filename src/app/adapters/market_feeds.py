@@ -0,0 +1,94 @@
+"""
+Источники рыночных данных для MarketDataHub
+
+PollingFeed опрашивает REST Finam TradeAPI, LocalFeed генерирует синтетические
+котировки и стакан в формате Finam API и не требует сети (для тестов и офлайн
+разработки).
+"""
+
+import datetime
+import hashlib
+import random
+import threading
+from typing import Any, Protocol
+
+from .finam_client import FinamAPIClient
+
+
+class MarketDataFeed(Protocol):
+    """Источник последней котировки и стакана по инструменту"""
+
+    def fetch_quote(self, symbol: str) -> dict[str, Any]: ...
+
+    def fetch_orderbook(self, symbol: str, depth: int = 10) -> dict[str, Any]: ...
+
+
+class PollingFeed:
+    """Котировки и стакан через REST запросы к Finam TradeAPI"""
+
+    def __init__(self, client: FinamAPIClient) -> None:
+        self.client = client
+
+    def fetch_quote(self, symbol: str) -> dict[str, Any]:
+        return self.client.execute_request("GET", f"/v1/instruments/{symbol}/quotes/latest")
+
+    def fetch_orderbook(self, symbol: str, depth: int = 10) -> dict[str, Any]:
+        return self.client.execute_request("GET", f"/v1/instruments/{symbol}/orderbook", params={"depth": depth})
+
+
+def _decimal(value: float, digits: int = 2) -> dict[str, str]:
+    return {"value": f"{value:.{digits}f}"}
+
+
+class LocalFeed:
+    """
+    Локальный заменитель биржевого потока
+
+    Цена каждого инструмента — детерминированное случайное блуждание,
+    зерно которого выводится из тикера. Каждый вызов делает один шаг.
+    """
+
+    def __init__(self, seed: int = 0, tick: float = 0.01, volatility: float = 0.0005) -> None:
+        self.seed = seed
+        self.tick = tick
+        self.volatility = volatility
+        self._lock = threading.Lock()
+        self._state: dict[str, tuple[random.Random, float]] = {}
+
+    def _step(self, symbol: str) -> tuple[random.Random, float]:
+        with self._lock:
+            if symbol not in self._state:
+                digest = hashlib.sha256(f"{self.seed}:{symbol}".encode()).digest()
+                rng = random.Random(int.from_bytes(digest[:8], "big"))
+                self._state[symbol] = (rng, round(rng.uniform(10, 1000), 2))
+            rng, price = self._state[symbol]
+            price = max(self.tick, round(price * (1 + rng.gauss(0, self.volatility)) / self.tick) * self.tick)
+            self._state[symbol] = (rng, price)
+            return rng, price
+
+    def fetch_quote(self, symbol: str) -> dict[str, Any]:
+        rng, last = self._step(symbol)
+        now = datetime.datetime.now(datetime.UTC).isoformat()
+        return {
+            "symbol": symbol,
+            "quote": {
+                "symbol": symbol,
+                "timestamp": now,
+                "ask": _decimal(last + self.tick),
+                "ask_size": _decimal(rng.randint(1, 500), 0),
+                "bid": _decimal(last - self.tick),
+                "bid_size": _decimal(rng.randint(1, 500), 0),
+                "last": _decimal(last),
+                "last_size": _decimal(rng.randint(1, 50), 0),
+                "volume": _decimal(rng.randint(10_000, 1_000_000), 0),
+            },
+        }
+
+    def fetch_orderbook(self, symbol: str, depth: int = 10) -> dict[str, Any]:
+        rng, last = self._step(symbol)
+        rows = []
+        for level in range(depth, 0, -1):
+            rows.append({"price": _decimal(last + level * self.tick), "sell_size": _decimal(rng.randint(1, 1000), 0)})
+        for level in range(1, depth + 1):
+            rows.append({"price": _decimal(last - level * self.tick), "buy_size": _decimal(rng.randint(1, 1000), 0)})
+        return {"symbol": symbol, "orderbook": {"rows": rows}}
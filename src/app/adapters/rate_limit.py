@@ -0,0 +1,49 @@
+"""
+Ограничение частоты запросов к Finam TradeAPI
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket: не более rate запросов за per секунд
+
+    Потокобезопасен, acquire() блокирует вызывающий поток до появления токена.
+    """
+
+    def __init__(self, rate: int, per: float = 60.0) -> None:
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._fill_rate = rate / per
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.rate, self._tokens + (now - self._updated) * self._fill_rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Взять токен, если он есть, не блокируя поток"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self) -> float:
+        """Дождаться токена; возвращает время ожидания в секундах"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self._fill_rate
+            time.sleep(delay)
+            waited += delay
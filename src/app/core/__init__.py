@@ -1,6 +1,18 @@
 """Основная логика приложения"""
 
-from .config import Settings, get_settings
-from .llm import call_llm
+from ..lazy import lazy_exports
 
-__all__ = ["Settings", "call_llm", "get_settings"]
+# Подмодули загружаются при первом обращении к имени: import src.app.core.config
+# не тянет requests (llm) и пул потоков рынка (market_data)
+__all__ = ["MarketDataHub", "RequestRouter", "Settings", "call_llm", "get_settings"]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "MarketDataHub": ".market_data",
+        "RequestRouter": ".router",
+        "Settings": ".config",
+        "call_llm": ".llm",
+        "get_settings": ".config",
+    },
+)
@@ -0,0 +1,140 @@
+"""
+Цикл агента: ответ LLM -> запрос к Finam API -> анализ результата
+
+Не зависит от интерфейса: Streamlit и фоновые воркеры получают прогресс
+через колбэки и могут прервать ход между этапами через threading.Event.
+"""
+
+import json
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .llm import call_llm, extract_api_request
+from .profiling import maybe_profile
+from .router import RequestRouter, route_template
+from .tracing import Span, get_tracer
+
+MAX_REQUESTS = 4
+MAX_PAYLOAD_CHARS = 8192
+
+
+class TurnCancelledError(Exception):
+    """Ход диалога отменен пользователем"""
+
+
+@dataclass
+class AgentTurn:
+    """Результат одного хода диалога"""
+
+    content: str = ""
+    api_calls: list[dict[str, Any]] = field(default_factory=list)
+    span: Span | None = None  # спан хода: родитель для этапов отрисовки в интерфейсе
+
+    @property
+    def api_request(self) -> dict[str, Any] | None:
+        """Последний выполненный API запрос (method, path, response)"""
+        return self.api_calls[-1] if self.api_calls else None
+
+
+def llm_payload(path: str, api_response: dict[str, Any]) -> str:
+    """Ответ API в виде, который передается LLM (крупные ответы предварительно сжимаются)"""
+    route = path.split("?", 1)[0]
+    if route.endswith("/orderbook"):
+        from .orderbook import summarize_orderbook  # numpy нужен только для стакана
+
+        api_response = summarize_orderbook(api_response)
+    return json.dumps(api_response, ensure_ascii=False)[:MAX_PAYLOAD_CHARS]
+
+
+def run_agent_turn(
+    messages: list[dict[str, str]],
+    execute: Callable[[str, str], dict[str, Any]],
+    router: RequestRouter,
+    account_id: str | None = None,
+    on_status: Callable[[str], None] | None = None,
+    on_api_call: Callable[[dict[str, Any]], None] | None = None,
+    cancel_event: threading.Event | None = None,
+) -> AgentTurn:
+    """
+    Выполнить ход диалога: до MAX_REQUESTS циклов "LLM -> API -> LLM"
+
+    Args:
+        messages: История диалога с системным промптом (не изменяется)
+        execute: Функция (method, path) -> ответ Finam API
+        router: Роутер для подстановки тикеров и счета в path
+        account_id: ID счета для подстановки в {account_id}
+        on_status: Колбэк для текстовых статусов этапов
+        on_api_call: Колбэк, вызываемый после каждого API запроса
+        cancel_event: Событие отмены, проверяется между этапами
+
+    Raises:
+        TurnCancelledError: Если ход был отменен
+    """
+    # В режиме отладки (APP_DEBUG) ход профилируется: стеки CPU и аллокации по этапам
+    with maybe_profile("chat_turn"), get_tracer().span("chat.turn", {"chat.messages": len(messages)}) as span:
+        turn = _run_agent_turn(messages, execute, router, account_id, on_status, on_api_call, cancel_event)
+        span.set_attribute("chat.api_calls", len(turn.api_calls))
+        turn.span = span
+    return turn
+
+
+def _run_agent_turn(
+    messages: list[dict[str, str]],
+    execute: Callable[[str, str], dict[str, Any]],
+    router: RequestRouter,
+    account_id: str | None,
+    on_status: Callable[[str], None] | None,
+    on_api_call: Callable[[dict[str, Any]], None] | None,
+    cancel_event: threading.Event | None,
+) -> AgentTurn:
+    tracer = get_tracer()
+    history = list(messages)
+
+    def report(status: str) -> None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise TurnCancelledError
+        if on_status:
+            on_status(status)
+
+    report("Думаю...")
+    response = call_llm(history, temperature=0.3)
+    assistant_message = response["choices"][0]["message"]["content"]
+    method, path = extract_api_request(assistant_message)
+
+    turn = AgentTurn()
+    for req_num in range(MAX_REQUESTS):
+        if method is None and path is None:
+            break
+        route = route_template(path)
+        with tracer.span("route.resolve", {"http.route": route}):
+            path = router.resolve(path, account_id)
+
+        report(f"Выполняю запрос: {method} {path}")
+        with tracer.span("api.execute", {"http.request.method": method, "http.route": route}) as span:
+            api_response = execute(method, path)
+            payload = llm_payload(path, api_response)
+            span.set_attributes({"api.error": "error" in api_response, "llm.payload_chars": len(payload)})
+        api_call = {"method": method, "path": path, "response": api_response}
+        turn.api_calls.append(api_call)
+        if on_api_call:
+            on_api_call(api_call)
+
+        # Добавляем результат в контекст
+        follow_up = "Также ты можешь отправить другой запрос." if req_num < MAX_REQUESTS - 1 else ""
+        history.append({"role": "assistant", "content": assistant_message})
+        history.append({
+            "role": "user",
+            "content": f"Эндпоинт: {path}\nРезультат API: {payload}\n\nПроанализируй.\n{follow_up}",
+        })
+
+        report("Анализирую ответ...")
+        response = call_llm(history, temperature=0.3)
+        assistant_message = response["choices"][0]["message"]["content"]
+        method, path = extract_api_request(assistant_message)
+
+    if cancel_event is not None and cancel_event.is_set():
+        raise TurnCancelledError
+    turn.content = assistant_message
+    return turn
@@ -0,0 +1,102 @@
+"""
+Загрузка длинных интервалов свечей окнами
+
+Finam ограничивает количество свечей в одном ответе /bars, поэтому интервал
+делится на окна по max_bars свечей (исходя из длительности таймфрейма),
+окна загружаются параллельно (частоту ограничивает RateLimiter клиента)
+и склеиваются по порядку в один колоночный результат.
+"""
+
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .candles import COLUMNS, TIMEFRAME_SECONDS, CandleFetchError, Candles, deduplicate_candles, format_time, parse_time
+
+if TYPE_CHECKING:
+    import datetime
+
+    from ..adapters import FinamAPIClient
+
+DEFAULT_MAX_BARS = 500
+
+
+class BarFetcher:
+    """
+    Постраничная загрузка свечей
+
+    Экземпляр можно передать в CandleStore.get как fetch.
+    """
+
+    def __init__(self, client: "FinamAPIClient", max_bars: int = DEFAULT_MAX_BARS, max_workers: int = 4) -> None:
+        self.client = client
+        self.max_bars = max_bars
+        self.max_workers = max_workers
+
+    def windows(self, timeframe: str, start: int, end: int) -> list[tuple[int, int]]:
+        """Разбить [start, end] на непересекающиеся окна не более max_bars свечей"""
+        step = TIMEFRAME_SECONDS.get(timeframe)
+        if step is None:
+            return [(start, end)]
+        size = step * self.max_bars
+        return [(lo, min(lo + size - 1, end)) for lo in range(start, end + 1, size)]
+
+    def _fetch_window(self, symbol: str, timeframe: str, window: tuple[int, int]) -> Candles:
+        response = self.client.get_candles(symbol, timeframe, format_time(window[0]), format_time(window[1]))
+        if "error" in response:
+            raise CandleFetchError(response)
+        return Candles.from_response(response, symbol, timeframe)
+
+    def iter_candles(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: "int | str | datetime.datetime",
+        end: "int | str | datetime.datetime",
+    ) -> Iterator[Candles]:
+        """
+        Свечи по окнам в хронологическом порядке
+
+        Все окна запрашиваются сразу, очередное окно отдается, как только
+        оно и все предыдущие загружены.
+
+        Raises:
+            CandleFetchError: Если API вернул ошибку для одного из окон
+        """
+        start = start if isinstance(start, int) else parse_time(start)
+        end = end if isinstance(end, int) else parse_time(end)
+        windows = self.windows(timeframe, start, end)
+        if len(windows) == 1:
+            yield self._fetch_window(symbol, timeframe, windows[0])
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(windows))) as executor:
+            futures = [executor.submit(self._fetch_window, symbol, timeframe, window) for window in windows]
+            try:
+                for future in futures:
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def fetch(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: "int | str | datetime.datetime",
+        end: "int | str | datetime.datetime",
+    ) -> Candles:
+        """Все свечи за интервал одним колоночным результатом"""
+        parts = [part for part in self.iter_candles(symbol, timeframe, start, end) if len(part)]
+        if not parts:
+            return Candles.empty(symbol, timeframe)
+        stitched = Candles(
+            symbol, timeframe, *(np.concatenate([getattr(part, col) for part in parts]) for col in COLUMNS)
+        )
+        if np.all(np.diff(stitched.timestamp) > 0):
+            return stitched
+        # Окна пересеклись (например, API вернул свечу на границе дважды)
+        return deduplicate_candles(stitched)
+
+    __call__ = fetch
@@ -0,0 +1,366 @@
+"""
+Локальное колоночное хранилище свечей
+
+Для каждой пары (инструмент, таймфрейм) хранятся колонки NumPy (время в
+секундах UTC, OHLCV) и список уже загруженных интервалов. При запросе
+диапазона из API догружаются только недостающие промежутки, результат
+сливается с имеющимися данными без дублей, а выборка по диапазону
+возвращает срезы-представления без копирования.
+
+На диске каждая колонка лежит в отдельном .npy файле и открывается
+через memory map.
+"""
+
+import datetime
+import json
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .metrics import CACHE_MISSES, CACHE_REQUESTS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .resample import TradingSchedule
+
+TIMEFRAME_SECONDS = {
+    "TIME_FRAME_M1": 60,
+    "TIME_FRAME_M5": 5 * 60,
+    "TIME_FRAME_M15": 15 * 60,
+    "TIME_FRAME_M30": 30 * 60,
+    "TIME_FRAME_H1": 60 * 60,
+    "TIME_FRAME_H4": 4 * 60 * 60,
+    "TIME_FRAME_D": 24 * 60 * 60,
+    "TIME_FRAME_W": 7 * 24 * 60 * 60,
+    "TIME_FRAME_MN": 31 * 24 * 60 * 60,
+}
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+COLUMNS = ("timestamp", *PRICE_COLUMNS)
+
+_CACHE_REQUESTS = CACHE_REQUESTS.labels("candles")
+_CACHE_MISSES = CACHE_MISSES.labels("candles")
+
+BarsFetcher = Callable[[str, str, str, str], "dict[str, Any] | Candles"]
+"""(symbol, timeframe, start_iso, end_iso) -> ответ GET /v1/instruments/{symbol}/bars или Candles"""
+
+
+class CandleFetchError(Exception):
+    """Finam API вернул ошибку при загрузке свечей"""
+
+    def __init__(self, response: dict[str, Any]) -> None:
+        super().__init__(response.get("error"))
+        self.response = response
+
+
+def parse_time(value: str | datetime.datetime) -> int:
+    """ISO 8601 строка или datetime -> секунды UTC"""
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.UTC)
+    return int(value.timestamp())
+
+
+def format_time(ts: int) -> str:
+    """Секунды UTC -> ISO 8601 в формате Finam API"""
+    return datetime.datetime.fromtimestamp(int(ts), datetime.UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _decimal(field: Any) -> float:  # noqa: ANN401
+    if isinstance(field, dict):
+        field = field.get("value", 0)
+    return float(field or 0)
+
+
+@dataclass(frozen=True)
+class Candles:
+    """Свечи в колоночном виде; массивы могут быть представлениями данных хранилища"""
+
+    symbol: str
+    timeframe: str
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def empty(cls, symbol: str = "", timeframe: str = "") -> "Candles":
+        return cls(symbol, timeframe, np.empty(0, dtype=np.int64), *(np.empty(0) for _ in PRICE_COLUMNS))
+
+    @classmethod
+    def from_response(cls, response: dict[str, Any], symbol: str = "", timeframe: str = "") -> "Candles":
+        """Разобрать ответ GET /v1/instruments/{symbol}/bars"""
+        bars = response.get("bars") or []
+        if not bars:
+            return cls.empty(symbol, timeframe)
+        timestamp = np.fromiter((parse_time(bar["timestamp"]) for bar in bars), dtype=np.int64, count=len(bars))
+        prices = np.array([[_decimal(bar.get(col)) for col in PRICE_COLUMNS] for bar in bars], dtype=np.float64)
+        return cls(symbol or response.get("symbol", ""), timeframe, timestamp, *prices.T.copy())
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def slice(self, start: int, end: int) -> "Candles":
+        """Свечи с start <= timestamp <= end (представления, без копирования)"""
+        lo = int(np.searchsorted(self.timestamp, start, side="left"))
+        hi = int(np.searchsorted(self.timestamp, end, side="right"))
+        return Candles(self.symbol, self.timeframe, *(getattr(self, col)[lo:hi] for col in COLUMNS))
+
+    def to_response(self) -> dict[str, Any]:
+        """Свечи в формате ответа Finam API"""
+        rows = np.column_stack([getattr(self, col) for col in PRICE_COLUMNS]).tolist()
+        bars = [
+            {
+                "timestamp": format_time(ts),
+                **{col: {"value": f"{v:.10g}"} for col, v in zip(PRICE_COLUMNS, row, strict=True)},
+            }
+            for ts, row in zip(self.timestamp.tolist(), rows, strict=True)
+        ]
+        return {"symbol": self.symbol, "bars": bars}
+
+    def to_frame(self) -> "pd.DataFrame":
+        """DataFrame с колонками datetime, open, high, low, close, volume"""
+        import pandas as pd
+
+        frame = pd.DataFrame({col: getattr(self, col) for col in PRICE_COLUMNS})
+        frame.insert(0, "datetime", pd.to_datetime(self.timestamp, unit="s", utc=True))
+        return frame
+
+
+def deduplicate_candles(candles: Candles) -> Candles:
+    """Отсортировать по времени и убрать дубли; из повторов остается последняя свеча"""
+    ts = candles.timestamp
+    # np.unique берет первое вхождение, поэтому ищем по развернутому массиву
+    _, first_reversed = np.unique(ts[::-1], return_index=True)
+    keep = len(ts) - 1 - first_reversed
+    return Candles(candles.symbol, candles.timeframe, *(getattr(candles, col)[keep] for col in COLUMNS))
+
+
+def merge_candles(left: Candles, right: Candles) -> Candles:
+    """Объединить свечи, отсортировать по времени; при совпадении времени побеждает right"""
+    if not len(left):
+        return right
+    if not len(right):
+        return left
+    merged = Candles(
+        left.symbol or right.symbol,
+        left.timeframe or right.timeframe,
+        *(np.concatenate((getattr(left, col), getattr(right, col))) for col in COLUMNS),
+    )
+    return deduplicate_candles(merged)
+
+
+def subtract_intervals(start: int, end: int, covered: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Части [start, end], не покрытые отсортированными интервалами covered"""
+    gaps = []
+    cursor = start
+    for lo, hi in covered:
+        if hi < cursor:
+            continue
+        if lo > end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo - 1))
+        cursor = max(cursor, hi + 1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def add_interval(covered: list[tuple[int, int]], start: int, end: int) -> list[tuple[int, int]]:
+    """Добавить интервал и слить пересекающиеся/соседние"""
+    result: list[tuple[int, int]] = []
+    for lo, hi in sorted([*covered, (start, end)]):
+        if result and lo <= result[-1][1] + 1:
+            result[-1] = (result[-1][0], max(result[-1][1], hi))
+        else:
+            result.append((lo, hi))
+    return result
+
+
+class _Series:
+    def __init__(self, candles: Candles, coverage: list[tuple[int, int]]) -> None:
+        self.candles = candles
+        self.coverage = coverage
+        self.lock = threading.Lock()
+
+
+class CandleStore:
+    """
+    Хранилище свечей по (инструмент, таймфрейм) с догрузкой недостающих интервалов
+
+    Недостающий интервал старшего таймфрейма строится агрегацией уже
+    загруженных младших свечей, если они полностью его покрывают; в API
+    идет запрос только когда это невозможно.
+
+    Args:
+        root: Каталог для хранения на диске; None — только в памяти
+        tz_offset: Смещение часового пояса биржи для границ D/W/MN, сек
+    """
+
+    def __init__(self, root: Path | str | None = None, tz_offset: int | None = None) -> None:
+        from .resample import MOSCOW_OFFSET
+
+        self.root = Path(root) if root else None
+        self.tz_offset = MOSCOW_OFFSET if tz_offset is None else tz_offset
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, str], _Series] = {}
+
+    def _path(self, symbol: str, timeframe: str) -> Path:
+        return self.root / symbol.replace("/", "_") / timeframe  # type: ignore[operator]
+
+    def _series_for(self, symbol: str, timeframe: str) -> _Series:
+        key = (symbol, timeframe)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self._load(symbol, timeframe)
+            return series
+
+    def _load(self, symbol: str, timeframe: str) -> _Series:
+        if self.root is None or not (self._path(symbol, timeframe) / "coverage.json").exists():
+            return _Series(Candles.empty(symbol, timeframe), [])
+        path = self._path(symbol, timeframe)
+        coverage = [tuple(interval) for interval in json.loads((path / "coverage.json").read_text())]
+        columns = [np.load(path / f"{col}.npy", mmap_mode="r") for col in COLUMNS]
+        return _Series(Candles(symbol, timeframe, *columns), coverage)  # type: ignore[arg-type]
+
+    def _save(self, series: _Series) -> None:
+        if self.root is None:
+            return
+        candles = series.candles
+        path = self._path(candles.symbol, candles.timeframe)
+        path.mkdir(parents=True, exist_ok=True)
+        for col in COLUMNS:
+            tmp = path / f"{col}.tmp.npy"
+            np.save(tmp, getattr(candles, col))
+            tmp.replace(path / f"{col}.npy")
+        (path / "coverage.json").write_text(json.dumps(series.coverage))
+
+    def timeframes(self, symbol: str) -> set[str]:
+        """Таймфреймы инструмента, по которым есть данные (в памяти или на диске)"""
+        with self._lock:
+            known = {tf for s, tf in self._series if s == symbol}
+        folder = self.root / symbol.replace("/", "_") if self.root is not None else None
+        if folder is not None and folder.is_dir():
+            known.update(p.name for p in folder.iterdir() if (p / "coverage.json").exists())
+        return known
+
+    def coverage(self, symbol: str, timeframe: str) -> list[tuple[int, int]]:
+        """Загруженные интервалы [start, end] в секундах UTC"""
+        return list(self._series_for(symbol, timeframe).coverage)
+
+    def missing(self, symbol: str, timeframe: str, start: int, end: int) -> list[tuple[int, int]]:
+        """Интервалы внутри [start, end], которых нет в хранилище"""
+        return subtract_intervals(start, end, self._series_for(symbol, timeframe).coverage)
+
+    def add(self, candles: Candles, start: int, end: int) -> None:
+        """Добавить загруженные свечи и отметить [start, end] как покрытый"""
+        series = self._series_for(candles.symbol, candles.timeframe)
+        with series.lock:
+            self._add(series, candles, start, end)
+            self._save(series)
+
+    def _add(self, series: _Series, candles: Candles, start: int, end: int) -> None:
+        series.candles = merge_candles(series.candles, candles)
+        # Последняя свеча еще формируется — не считаем ее интервал загруженным
+        step = TIMEFRAME_SECONDS.get(candles.timeframe, 0)
+        end = min(end, int(datetime.datetime.now(datetime.UTC).timestamp()) - step)
+        if end >= start:
+            series.coverage = add_interval(series.coverage, start, end)
+
+    def resample(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: int,
+        end: int,
+        schedules: "Callable[[str], TradingSchedule | None] | None" = None,
+    ) -> Candles | None:
+        """
+        Построить свечи timeframe за [start, end] из младших таймфреймов хранилища
+
+        Возвращает None, если ни один подходящий таймфрейм не покрывает
+        интервал (выровненный по границам периодов) полностью.
+
+        Args:
+            schedules: Функция symbol -> расписание торгов; вызывается, только
+                если нашелся базовый таймфрейм
+        """
+        from .resample import bucket_end, bucket_start, can_resample, resample_candles
+
+        lo = int(bucket_start(np.array([start]), timeframe, self.tz_offset)[0])
+        hi = bucket_end(end, timeframe, self.tz_offset)
+        # Чем крупнее базовый таймфрейм, тем меньше свечей агрегировать
+        bases = sorted(
+            (tf for tf in self.timeframes(symbol) if can_resample(tf, timeframe)),
+            key=TIMEFRAME_SECONDS.__getitem__,
+            reverse=True,
+        )
+        for base in bases:
+            if not self.missing(symbol, base, lo, hi):
+                base_candles = self._series_for(symbol, base).candles.slice(lo, hi)
+                schedule = schedules(symbol) if schedules is not None else None
+                return resample_candles(base_candles, timeframe, schedule, self.tz_offset)
+        return None
+
+    def get(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: int | str | datetime.datetime,
+        end: int | str | datetime.datetime,
+        fetch: BarsFetcher | None = None,
+        schedules: "Callable[[str], TradingSchedule | None] | None" = None,
+    ) -> Candles:
+        """
+        Свечи за [start, end]; недостающие интервалы строятся из младших
+        таймфреймов или загружаются через fetch
+
+        Args:
+            fetch: Загрузчик свечей из API (None — интервалы, которые нельзя
+                построить из младших таймфреймов, остаются пустыми)
+            schedules: Функция symbol -> расписание торгов для агрегации
+
+        Raises:
+            CandleFetchError: Если API вернул ошибку при догрузке
+        """
+        start = start if isinstance(start, int) else parse_time(start)
+        end = end if isinstance(end, int) else parse_time(end)
+        series = self._series_for(symbol, timeframe)
+        _CACHE_REQUESTS.inc()
+        with series.lock:
+            gaps = subtract_intervals(start, end, series.coverage)
+            if gaps:
+                _CACHE_MISSES.inc()
+            changed = False
+            for gap_start, gap_end in gaps:
+                candles = self.resample(symbol, timeframe, gap_start, gap_end, schedules)
+                if candles is not None:
+                    self._add(series, candles, gap_start, gap_end)
+                    changed = True
+                    continue
+                if fetch is None:
+                    continue
+                response = fetch(symbol, timeframe, format_time(gap_start), format_time(gap_end))
+                if isinstance(response, Candles):
+                    candles = response
+                elif "error" in response:
+                    raise CandleFetchError(response)
+                else:
+                    candles = Candles.from_response(response, symbol, timeframe)
+                self._add(series, candles, gap_start, gap_end)
+                changed = True
+            if changed:
+                self._save(series)
+            return series.candles.slice(start, end)
@@ -12,6 +12,17 @@ class Settings(BaseModel):
     openrouter_base: str = os.getenv("OPENROUTER_BASE", "https://openrouter.ai/api/v1")
     openrouter_model: str = os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini")
     debug: bool = os.getenv("APP_DEBUG", "false").lower() in {"1", "true", "yes"}
+    chat_workers: int = int(os.getenv("APP_CHAT_WORKERS", "8"))
+    market_feed: str = os.getenv("APP_MARKET_FEED", "rest")
+    market_data_interval: float = float(os.getenv("APP_MARKET_DATA_INTERVAL", "1.0"))
+    market_data_max_age: float = float(os.getenv("APP_MARKET_DATA_MAX_AGE", "2.0"))
+    market_data_rate_share: float = float(os.getenv("APP_MARKET_DATA_RATE_SHARE", "0.25"))
+    candle_store_dir: str = os.getenv("APP_CANDLE_STORE_DIR", "data/interim/candles")
+    ledger_path: str = os.getenv("APP_LEDGER_PATH", "data/interim/ledger.sqlite")
+    trace_file: str = os.getenv("APP_TRACE_FILE", "")
+    metrics_port: int = int(os.getenv("APP_METRICS_PORT", "9108"))
+    profile_dir: str = os.getenv("APP_PROFILE_DIR", "data/interim/profiles")
+    profile_memory_depth: int = int(os.getenv("APP_PROFILE_MEMORY_DEPTH", "1"))
 
 
 @lru_cache
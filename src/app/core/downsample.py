@@ -0,0 +1,68 @@
+"""
+Прореживание длинных рядов для графиков
+
+Линии прореживаются алгоритмом LTTB (Largest-Triangle-Three-Buckets),
+который сохраняет визуальную форму ряда (пики и провалы). Свечи
+объединяются в укрупненные с сохранением OHLC: open первой, max high,
+min low, close последней, сумма объема.
+"""
+
+import numpy as np
+
+from .candles import Candles
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Индексы точек, выбранных LTTB (первая и последняя точки сохраняются)
+
+    Args:
+        x: Координаты по оси X (возрастающие, числа)
+        y: Значения
+        threshold: Количество точек в результате
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Границы корзин для внутренних точек (первая и последняя — отдельные корзины)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Следующая корзина представлена средней точкой
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        # Удвоенная площадь треугольника (a, точка корзины, среднее следующей)
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        selected[i + 1] = a
+    return selected
+
+
+def ohlc_buckets(n: int, max_bars: int) -> tuple[np.ndarray, np.ndarray]:
+    """Первый и последний индекс групп соседних свечей (не больше max_bars групп)"""
+    factor = max(1, -(-n // max_bars)) if max_bars >= 1 else 1
+    starts = np.arange(0, n, factor)
+    return starts, np.minimum(starts + factor, n) - 1
+
+
+def downsample_candles(candles: Candles, max_bars: int) -> Candles:
+    """Объединить соседние свечи так, чтобы их осталось не больше max_bars"""
+    if len(candles) <= max_bars or max_bars < 1:
+        return candles
+    starts, ends = ohlc_buckets(len(candles), max_bars)
+    return Candles(
+        candles.symbol,
+        candles.timeframe,
+        candles.timestamp[starts],
+        candles.open[starts],
+        np.maximum.reduceat(candles.high, starts),
+        np.minimum.reduceat(candles.low, starts),
+        candles.close[ends],
+        np.add.reduceat(candles.volume, starts),
+    )
@@ -0,0 +1,405 @@
+"""
+Технические индикаторы на NumPy
+
+Каждый индикатор считается по целой колонке за один векторный проход
+(экспоненциальное сглаживание — блоками через cumsum, скользящие окна —
+через sliding_window_view). IndicatorStream пересчитывает только последнее
+значение при появлении новой свечи или обновлении текущей.
+
+Первые значения, для которых не хватает истории, равны NaN.
+"""
+
+import copy
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .candles import COLUMNS, TIMEFRAME_SECONDS, Candles
+
+# Не больше e^200 на блок, чтобы веса exp-сглаживания не переполнялись
+_EWM_BLOCK_LOG = 200.0
+
+
+def _ewm(values: np.ndarray, alpha: float, initial: float | None = None) -> np.ndarray:
+    """
+    y[i] = (1 - alpha) * y[i-1] + alpha * x[i]; y[-1] = initial (по умолчанию x[0])
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty(len(values))
+    if not len(values):
+        return out
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[:] = values
+        return out
+    block = max(1, int(_EWM_BLOCK_LOG / -np.log(decay)))
+    prev = float(values[0]) if initial is None else initial
+    for lo in range(0, len(values), block):
+        chunk = values[lo : lo + block]
+        weights = decay ** -np.arange(1, len(chunk) + 1)
+        out[lo : lo + len(chunk)] = (prev + alpha * np.cumsum(chunk * weights)) / weights
+        prev = float(out[lo + len(chunk) - 1])
+    return out
+
+
+def _wilder(values: np.ndarray, period: int) -> np.ndarray:
+    """Сглаживание Уайлдера: первое значение — среднее за period, далее alpha = 1/period"""
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    seed = float(values[:period].mean())
+    out[period - 1] = seed
+    out[period:] = _ewm(values[period:], 1.0 / period, initial=seed)
+    return out
+
+
+def _rolling(values: np.ndarray, period: int) -> np.ndarray:
+    """Скользящие окна длины period (представление без копирования)"""
+    return sliding_window_view(np.asarray(values, dtype=np.float64), period)
+
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    """Простое скользящее среднее"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1 :] = _rolling(values, period).mean(axis=1)
+    return out
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """Экспоненциальное скользящее среднее (alpha = 2 / (period + 1), старт с первого значения)"""
+    out = _ewm(values, 2.0 / (period + 1))
+    out[: period - 1] = np.nan
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative Strength Index по Уайлдеру, от 0 до 100"""
+    gain, loss = _rsi_averages(close, period)
+    out = np.full(len(close), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[1:] = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    out[1:][np.isnan(gain)] = np.nan
+    return out
+
+
+def _rsi_averages(close: np.ndarray, period: int) -> tuple[np.ndarray, np.ndarray]:
+    delta = np.diff(np.asarray(close, dtype=np.float64))
+    return _wilder(np.maximum(delta, 0.0), period), _wilder(np.maximum(-delta, 0.0), period)
+
+
+def macd(
+    close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD: линия (EMA fast - EMA slow), сигнальная линия и гистограмма"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = np.full(len(close), np.nan)
+    if len(close) >= slow:
+        signal_line[slow - 1 :] = ema(line[slow - 1 :], signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close: np.ndarray, period: int = 20, width: float = 2.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Полосы Боллинджера: средняя, верхняя и нижняя (стандартное отклонение по окну)"""
+    mid = np.full(len(close), np.nan)
+    std = np.full(len(close), np.nan)
+    if len(close) >= period:
+        windows = _rolling(close, period)
+        mid[period - 1 :] = windows.mean(axis=1)
+        std[period - 1 :] = windows.std(axis=1)
+    return mid, mid + width * std, mid - width * std
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """Истинный диапазон; для первой свечи — high - low"""
+    tr = np.asarray(high, dtype=np.float64) - low
+    if len(tr) > 1:
+        prev_close = close[:-1]
+        tr[1:] = np.maximum.reduce((tr[1:], np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average True Range по Уайлдеру"""
+    return _wilder(true_range(high, low, close), period)
+
+
+def vwap(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    anchor: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Средневзвешенная по объему цена (typical price = (high + low + close) / 3)
+
+    Args:
+        anchor: Метка периода для каждой свечи (например, начало дня);
+            накопление сбрасывается при смене метки. None — с начала данных
+    """
+    pv = np.cumsum((np.asarray(high) + low + close) / 3.0 * volume)
+    vol = np.cumsum(np.asarray(volume, dtype=np.float64))
+    if anchor is not None and len(anchor) > 1:
+        starts = np.flatnonzero(np.diff(anchor)) + 1
+        if len(starts):
+            # Вычитаем накопленное до начала текущего периода
+            group = np.searchsorted(starts, np.arange(len(anchor)), side="right")
+            offset_pv = np.concatenate(([0.0], pv[starts - 1]))[group]
+            offset_vol = np.concatenate(([0.0], vol[starts - 1]))[group]
+            pv, vol = pv - offset_pv, vol - offset_vol
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(vol > 0, pv / vol, np.nan)
+
+
+def support_resistance(high: np.ndarray, low: np.ndarray, period: int = 20) -> tuple[np.ndarray, np.ndarray]:
+    """Скользящие уровни поддержки (минимум low) и сопротивления (максимум high) за period свечей"""
+    support = np.full(len(low), np.nan)
+    resistance = np.full(len(high), np.nan)
+    if len(low) >= period:
+        support[period - 1 :] = _rolling(low, period).min(axis=1)
+        resistance[period - 1 :] = _rolling(high, period).max(axis=1)
+    return support, resistance
+
+
+def vwap_anchor(timestamp: np.ndarray, timeframe: str) -> np.ndarray | None:
+    """Для внутридневных таймфреймов VWAP считается с начала торгового дня"""
+    from .resample import bucket_start
+
+    if TIMEFRAME_SECONDS.get(timeframe, 0) >= TIMEFRAME_SECONDS["TIME_FRAME_D"] or not timeframe:
+        return None
+    return bucket_start(timestamp, "TIME_FRAME_D")
+
+
+@dataclass(frozen=True)
+class IndicatorParams:
+    """Периоды индикаторов"""
+
+    sma: tuple[int, ...] = (20, 50)
+    ema: tuple[int, ...] = (20,)
+    rsi: int = 14
+    macd: tuple[int, int, int] = (12, 26, 9)
+    bollinger: int = 20
+    bollinger_width: float = 2.0
+    atr: int = 14
+    levels: int = 20
+
+
+def compute_indicators(candles: Candles, params: IndicatorParams | None = None) -> dict[str, np.ndarray]:
+    """
+    Все индикаторы по свечам, колонками той же длины
+
+    Ключи: sma_{N}, ema_{N}, rsi, macd, macd_signal, macd_hist, bb_mid,
+    bb_upper, bb_lower, atr, vwap, support, resistance.
+    """
+    params = params or IndicatorParams()
+    high, low, close, volume = candles.high, candles.low, candles.close, candles.volume
+    result = {f"sma_{period}": sma(close, period) for period in params.sma}
+    result |= {f"ema_{period}": ema(close, period) for period in params.ema}
+    result["rsi"] = rsi(close, params.rsi)
+    result["macd"], result["macd_signal"], result["macd_hist"] = macd(close, *params.macd)
+    result["bb_mid"], result["bb_upper"], result["bb_lower"] = bollinger(
+        close, params.bollinger, params.bollinger_width
+    )
+    result["atr"] = atr(high, low, close, params.atr)
+    result["vwap"] = vwap(high, low, close, volume, vwap_anchor(candles.timestamp, candles.timeframe))
+    result["support"], result["resistance"] = support_resistance(high, low, params.levels)
+    return result
+
+
+class IndicatorStream:
+    """
+    Последние значения индикаторов с обновлением за O(окно) на свечу
+
+    update(..., replace=True) пересчитывает текущую (еще формирующуюся)
+    свечу: состояние откатывается к предыдущей свече и применяется заново.
+    """
+
+    def __init__(self, params: IndicatorParams | None = None, timeframe: str = "") -> None:
+        self.params = params or IndicatorParams()
+        self.timeframe = timeframe
+        window = max((*self.params.sma, self.params.bollinger, self.params.levels))
+        self._state: dict[str, Any] = {
+            "count": 0,
+            "close": deque(maxlen=window),
+            "high": deque(maxlen=self.params.levels),
+            "low": deque(maxlen=self.params.levels),
+            "ema": dict.fromkeys(self.params.ema),
+            "macd_fast": None,
+            "macd_slow": None,
+            "macd_signal": None,
+            "prev_close": None,
+            "gain": 0.0,
+            "loss": 0.0,
+            "tr": 0.0,
+            "anchor": None,
+            "pv": 0.0,
+            "volume": 0.0,
+        }
+        self._previous = copy.deepcopy(self._state)
+        self.last: dict[str, float] = {}
+
+    @classmethod
+    def from_candles(cls, candles: Candles, params: IndicatorParams | None = None) -> "IndicatorStream":
+        """Поток, продолжающий историю candles (состояние берется из векторного расчета)"""
+        stream = cls(params, candles.timeframe)
+        if not len(candles):
+            return stream
+        if len(candles) > 1:
+            # Состояние до последней свечи, чтобы ее можно было обновлять через replace=True
+            stream._load(Candles(candles.symbol, candles.timeframe, *(getattr(candles, col)[:-1] for col in COLUMNS)))
+        last = len(candles) - 1
+        stream.update(
+            int(candles.timestamp[last]),
+            float(candles.high[last]),
+            float(candles.low[last]),
+            float(candles.close[last]),
+            float(candles.volume[last]),
+        )
+        return stream
+
+    def _load(self, candles: Candles) -> None:
+        p, s = self.params, self._state
+        close = candles.close
+        n = len(candles)
+        s["count"] = n
+        s["close"].extend(close[-s["close"].maxlen :].tolist())
+        s["high"].extend(candles.high[-p.levels :].tolist())
+        s["low"].extend(candles.low[-p.levels :].tolist())
+        for period in p.ema:
+            s["ema"][period] = float(_ewm(close, 2.0 / (period + 1))[-1])
+        fast, slow, signal = p.macd
+        line = _ewm(close, 2.0 / (fast + 1)) - _ewm(close, 2.0 / (slow + 1))
+        s["macd_fast"] = float(_ewm(close, 2.0 / (fast + 1))[-1])
+        s["macd_slow"] = float(_ewm(close, 2.0 / (slow + 1))[-1])
+        if n >= slow:
+            s["macd_signal"] = float(_ewm(line[slow - 1 :], 2.0 / (signal + 1))[-1])
+        s["prev_close"] = float(close[-1])
+        gain, loss = _rsi_averages(close, p.rsi)
+        if n - 1 >= p.rsi:
+            s["gain"], s["loss"] = float(gain[-1]), float(loss[-1])
+        else:
+            delta = np.diff(close)
+            s["gain"], s["loss"] = float(np.maximum(delta, 0).sum()), float(np.maximum(-delta, 0).sum())
+        tr = true_range(candles.high, candles.low, close)
+        s["tr"] = float(_wilder(tr, p.atr)[-1]) if n >= p.atr else float(tr.sum())
+        anchor = vwap_anchor(candles.timestamp, candles.timeframe)
+        typical_pv = (candles.high + candles.low + close) / 3.0 * candles.volume
+        if anchor is None:
+            s["pv"], s["volume"] = float(typical_pv.sum()), float(candles.volume.sum())
+        else:
+            current = anchor == anchor[-1]
+            s["anchor"] = int(anchor[-1])
+            s["pv"], s["volume"] = float(typical_pv[current].sum()), float(candles.volume[current].sum())
+        self._previous = copy.deepcopy(s)
+
+    def update(
+        self, timestamp: int, high: float, low: float, close: float, volume: float, replace: bool = False
+    ) -> dict[str, float]:
+        """
+        Учесть свечу и вернуть последние значения индикаторов (ключи как в compute_indicators)
+
+        Args:
+            replace: True — свеча заменяет последнюю (обновление текущего бара)
+        """
+        if replace and self._state["count"]:
+            self._state = copy.deepcopy(self._previous)
+        else:
+            self._previous = copy.deepcopy(self._state)
+        p, s = self.params, self._state
+        prev_close = s["prev_close"]
+        n = s["count"] = s["count"] + 1
+        s["close"].append(close)
+        s["high"].append(high)
+        s["low"].append(low)
+        closes = list(s["close"])
+        nan = float("nan")
+        result: dict[str, float] = {}
+
+        def smoothed(prev: float | None, period: float) -> float:
+            alpha = 2.0 / (period + 1)
+            return close if prev is None else (1 - alpha) * prev + alpha * close
+
+        for period in p.sma:
+            result[f"sma_{period}"] = sum(closes[-period:]) / period if n >= period else nan
+        for period in p.ema:
+            s["ema"][period] = smoothed(s["ema"][period], period)
+            result[f"ema_{period}"] = s["ema"][period] if n >= period else nan
+
+        fast, slow, signal = p.macd
+        s["macd_fast"], s["macd_slow"] = smoothed(s["macd_fast"], fast), smoothed(s["macd_slow"], slow)
+        line = s["macd_fast"] - s["macd_slow"]
+        if n >= slow:
+            alpha = 2.0 / (signal + 1)
+            s["macd_signal"] = line if s["macd_signal"] is None else (1 - alpha) * s["macd_signal"] + alpha * line
+        signal_value = s["macd_signal"] if n >= slow + signal - 1 else nan
+        result["macd"] = line if n >= slow else nan
+        result["macd_signal"] = signal_value
+        result["macd_hist"] = result["macd"] - signal_value
+
+        result["rsi"] = self._update_rsi(close, prev_close, n)
+        result["atr"] = self._update_atr(high, low, prev_close, n)
+
+        window = closes[-p.bollinger :]
+        if n >= p.bollinger:
+            mid = sum(window) / p.bollinger
+            std = (sum((x - mid) ** 2 for x in window) / p.bollinger) ** 0.5
+            result["bb_mid"] = mid
+            result["bb_upper"] = mid + p.bollinger_width * std
+            result["bb_lower"] = mid - p.bollinger_width * std
+        else:
+            result["bb_mid"] = result["bb_upper"] = result["bb_lower"] = nan
+
+        anchor = vwap_anchor(np.array([timestamp]), self.timeframe)
+        anchor = None if anchor is None else int(anchor[0])
+        if anchor != s["anchor"]:
+            s["anchor"], s["pv"], s["volume"] = anchor, 0.0, 0.0
+        s["pv"] += (high + low + close) / 3.0 * volume
+        s["volume"] += volume
+        result["vwap"] = s["pv"] / s["volume"] if s["volume"] > 0 else nan
+
+        full = n >= p.levels
+        result["support"] = min(s["low"]) if full else nan
+        result["resistance"] = max(s["high"]) if full else nan
+
+        s["prev_close"] = close
+        self.last = result
+        return result
+
+    def _update_rsi(self, close: float, prev_close: float | None, n: int) -> float:
+        """RSI: до накопления period приращений gain/loss — суммы, затем средние Уайлдера"""
+        p, s = self.params, self._state
+        if prev_close is None:
+            return float("nan")
+        delta = close - prev_close
+        up, down = max(delta, 0.0), max(-delta, 0.0)
+        deltas = n - 1
+        if deltas <= p.rsi:
+            s["gain"] += up
+            s["loss"] += down
+            if deltas == p.rsi:
+                s["gain"] /= p.rsi
+                s["loss"] /= p.rsi
+        else:
+            s["gain"] = s["gain"] + (up - s["gain"]) / p.rsi
+            s["loss"] = s["loss"] + (down - s["loss"]) / p.rsi
+        if deltas < p.rsi:
+            return float("nan")
+        return 100.0 if s["loss"] == 0 else 100.0 - 100.0 / (1.0 + s["gain"] / s["loss"])
+
+    def _update_atr(self, high: float, low: float, prev_close: float | None, n: int) -> float:
+        """ATR: до накопления period свечей true range — сумма, затем среднее Уайлдера"""
+        p, s = self.params, self._state
+        tr = high - low
+        if prev_close is not None:
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+        if n <= p.atr:
+            s["tr"] += tr
+            if n == p.atr:
+                s["tr"] /= p.atr
+        else:
+            s["tr"] = s["tr"] + (tr - s["tr"]) / p.atr
+        return s["tr"] if n >= p.atr else float("nan")
@@ -0,0 +1,118 @@
+"""
+Фоновое выполнение ходов диалога
+
+Пул воркеров общий на процесс, у каждой пользовательской сессии не более
+одного активного задания. Интерфейс опрашивает задание и показывает прогресс,
+не блокируя поток скрипта.
+"""
+
+import threading
+import uuid
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from .agent import TurnCancelledError
+
+
+class ChatJob:
+    """Дескриптор фонового задания: статусы, результат и отмена"""
+
+    def __init__(self, session_id: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.cancel_event = threading.Event()
+        self.future: Future | None = None
+        self._lock = threading.Lock()
+        self._statuses: list[str] = []
+        self._api_calls: list[dict[str, Any]] = []
+
+    def report(self, status: str) -> None:
+        with self._lock:
+            self._statuses.append(status)
+
+    def add_api_call(self, api_call: dict[str, Any]) -> None:
+        with self._lock:
+            self._api_calls.append(api_call)
+
+    @property
+    def statuses(self) -> list[str]:
+        with self._lock:
+            return list(self._statuses)
+
+    @property
+    def api_calls(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._api_calls)
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """Запросить отмену: задание остановится на ближайшей границе этапов"""
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def result(self) -> Any:  # noqa: ANN401
+        """Результат завершенного задания (пробрасывает исключение задания)"""
+        if self.future is None:
+            raise RuntimeError("Job was not submitted")
+        return self.future.result()
+
+
+class JobManager:
+    """Пул воркеров с заданиями, привязанными к сессиям"""
+
+    def __init__(self, max_workers: int = 8) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-worker")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, ChatJob] = {}
+
+    def submit(self, session_id: str, fn: Callable[[ChatJob], Any]) -> ChatJob:
+        """
+        Запустить задание для сессии
+
+        Предыдущее задание этой сессии отменяется. Функция получает дескриптор
+        задания, чтобы сообщать статусы и проверять отмену.
+        """
+        job = ChatJob(session_id)
+        with self._lock:
+            previous = self._jobs.get(session_id)
+            self._jobs[session_id] = job
+        if previous is not None:
+            previous.cancel()
+        job.future = self._executor.submit(self._run, job, fn)
+        return job
+
+    @staticmethod
+    def _run(job: ChatJob, fn: Callable[[ChatJob], Any]) -> Any:  # noqa: ANN401
+        if job.cancelled:
+            raise TurnCancelledError
+        return fn(job)
+
+    def get(self, session_id: str) -> ChatJob | None:
+        with self._lock:
+            return self._jobs.get(session_id)
+
+    def release(self, job: ChatJob) -> None:
+        """Забыть задание после того, как интерфейс забрал результат"""
+        with self._lock:
+            if self._jobs.get(job.session_id) is job:
+                del self._jobs[job.session_id]
+
+    @property
+    def active(self) -> int:
+        """Количество незавершенных заданий"""
+        with self._lock:
+            return sum(not job.done for job in self._jobs.values())
+
+    def shutdown(self) -> None:
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,301 @@
+"""
+Локальный журнал сделок и транзакций счетов (SQLite)
+
+Записи только добавляются: синхронизация запрашивает у API интервал
+после последней сохраненной записи (и, при необходимости, более раннюю
+историю), дубли по id отбрасываются первичным ключом. У записей без id
+ключ составной (portfolio.trade_keys, portfolio.transaction_keys), поэтому
+несколько исполнений одного ордера в одну секунду не затирают друг друга. Таблицы
+проиндексированы по (счет, время) и (счет, инструмент, время), поэтому
+выборки и агрегаты за период считаются локально без обращения к API.
+
+Исходные записи хранятся как JSON, и выборка возвращается в формате
+ответа Finam API.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .candles import format_time, parse_time
+from .portfolio import money, trade_keys, transaction_keys
+
+if TYPE_CHECKING:
+    from ..adapters import FinamAPIClient
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    account_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    size REAL NOT NULL,
+    price REAL NOT NULL,
+    raw TEXT NOT NULL,
+    PRIMARY KEY (account_id, id)
+);
+CREATE INDEX IF NOT EXISTS trades_time ON trades (account_id, timestamp);
+CREATE INDEX IF NOT EXISTS trades_symbol ON trades (account_id, symbol, timestamp);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    account_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount REAL NOT NULL,
+    raw TEXT NOT NULL,
+    PRIMARY KEY (account_id, id)
+);
+CREATE INDEX IF NOT EXISTS transactions_time ON transactions (account_id, timestamp);
+CREATE INDEX IF NOT EXISTS transactions_symbol ON transactions (account_id, symbol, timestamp);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    account_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    synced_from INTEGER NOT NULL,
+    synced_until INTEGER NOT NULL,
+    PRIMARY KEY (account_id, kind)
+);
+"""
+
+TRADES = "trades"
+TRANSACTIONS = "transactions"
+
+HistoryFetcher = Callable[[str, str, str], dict[str, Any]]
+"""(account_id, start_iso, end_iso) -> ответ /trades или /transactions"""
+
+
+def _trade_row(account_id: str, trade_id: str, trade: dict[str, Any]) -> tuple:
+    timestamp = parse_time(trade["timestamp"])
+    side = "sell" if "SELL" in str(trade.get("side", "")).upper() else "buy"
+    symbol = trade.get("symbol", "")
+    return (
+        account_id,
+        trade_id,
+        timestamp,
+        symbol,
+        side,
+        money(trade.get("size")),
+        money(trade.get("price")),
+        json.dumps(trade, ensure_ascii=False),
+    )
+
+
+def _transaction_row(account_id: str, transaction_id: str, transaction: dict[str, Any]) -> tuple:
+    timestamp = parse_time(transaction["timestamp"])
+    category = str(transaction.get("category") or transaction.get("transaction_category") or "")
+    return (
+        account_id,
+        transaction_id,
+        timestamp,
+        transaction.get("symbol", ""),
+        category,
+        money(transaction.get("change")),
+        json.dumps(transaction, ensure_ascii=False),
+    )
+
+
+class Ledger:
+    """
+    Журнал сделок и транзакций с инкрементальной синхронизацией
+
+    Args:
+        path: Файл SQLite (":memory:" — только в памяти)
+        history_days: Глубина истории при первой синхронизации счета
+        min_sync_interval: Не запрашивать новые записи чаще, чем раз в N секунд
+    """
+
+    def __init__(self, path: Path | str = ":memory:", history_days: int = 365, min_sync_interval: float = 30.0) -> None:
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.history_days = history_days
+        self.min_sync_interval = min_sync_interval
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Синхронизация
+
+    def coverage(self, account_id: str, kind: str) -> tuple[int, int] | None:
+        """Синхронизированный интервал [from, until] в секундах UTC"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_from, synced_until FROM sync_state WHERE account_id = ? AND kind = ?",
+                (account_id, kind),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def sync(
+        self,
+        account_id: str,
+        kind: str,
+        fetch: HistoryFetcher,
+        start: int | None = None,
+        end: int | None = None,
+        now: float | None = None,
+    ) -> int:
+        """
+        Догрузить записи так, чтобы журнал покрывал [start, end]
+
+        Новые записи запрашиваются с момента последней сохраненной записи
+        (не чаще min_sync_interval), история до synced_from — только если
+        запрошен более ранний start.
+
+        Returns:
+            Количество добавленных записей
+
+        Raises:
+            RuntimeError: Если API вернул ошибку
+        """
+        now = time.time() if now is None else now
+        end = int(now) if end is None else min(end, int(now))
+        covered = self.coverage(account_id, kind)
+        start = int(now) - self.history_days * 86400 if start is None and covered is None else start
+        windows = []
+        if covered is None:
+            windows.append((start, end))
+        else:
+            synced_from, synced_until = covered
+            if start is not None and start < synced_from:
+                windows.append((start, synced_from))
+            if end > synced_until and now - synced_until >= self.min_sync_interval:
+                # С последней записи включительно: записи той же секунды отсекаются по id
+                windows.append((self._last_timestamp(account_id, kind) or synced_until, end))
+        added = 0
+        for lo, hi in windows:
+            response = fetch(account_id, format_time(lo), format_time(hi))
+            if "error" in response:
+                raise RuntimeError(response["error"])
+            added += self.add(account_id, kind, response.get(kind) or [])
+            self._extend_coverage(account_id, kind, lo, hi)
+        return added
+
+    def sync_account(
+        self, client: "FinamAPIClient", account_id: str, start: int | None = None, end: int | None = None
+    ) -> int:
+        """Синхронизировать сделки и транзакции счета через FinamAPIClient"""
+        added = self.sync(account_id, TRADES, client.get_trades, start, end)
+        return added + self.sync(account_id, TRANSACTIONS, client.get_transactions, start, end)
+
+    def add(self, account_id: str, kind: str, records: list[dict[str, Any]]) -> int:
+        """Сохранить записи (уже сохраненные id пропускаются); возвращает число новых"""
+        if kind == TRADES:
+            keys = trade_keys(records)
+            rows = [_trade_row(account_id, key, record) for key, record in zip(keys, records, strict=True)]
+            sql = "INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+        else:
+            keys = transaction_keys(records)
+            rows = [_transaction_row(account_id, key, record) for key, record in zip(keys, records, strict=True)]
+            sql = "INSERT OR IGNORE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?)"
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(sql, rows)
+            return self._conn.total_changes - before
+
+    def _last_timestamp(self, account_id: str, kind: str) -> int | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT MAX(timestamp) FROM {kind} WHERE account_id = ?", (account_id,)
+            ).fetchone()
+        return row[0]
+
+    def _extend_coverage(self, account_id: str, kind: str, start: int, end: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO sync_state VALUES (?, ?, ?, ?)
+                ON CONFLICT (account_id, kind) DO UPDATE SET
+                    synced_from = MIN(synced_from, excluded.synced_from),
+                    synced_until = MAX(synced_until, excluded.synced_until)
+                """,
+                (account_id, kind, start, end),
+            )
+
+    # Выборки
+
+    def _where(self, account_id: str, start: int | None, end: int | None, symbol: str | None) -> tuple[str, list[Any]]:
+        clauses, params = ["account_id = ?"], [account_id]
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(end)
+        if symbol:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        return " AND ".join(clauses), params
+
+    def records(
+        self,
+        account_id: str,
+        kind: str,
+        start: int | None = None,
+        end: int | None = None,
+        symbol: str | None = None,
+        limit: int | None = None,
+    ) -> dict[str, Any]:
+        """
+        Записи за период в формате ответа Finam API ({"account_id": ..., "trades": [...]} / "transactions")
+
+        С limit возвращаются последние limit записей.
+        """
+        where, params = self._where(account_id, start, end, symbol)
+        sql = f"SELECT raw FROM {kind} WHERE {where} ORDER BY timestamp DESC, id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return {"account_id": account_id, kind: [json.loads(raw) for (raw,) in reversed(rows)]}
+
+    def trade_stats(
+        self, account_id: str, start: int | None = None, end: int | None = None, symbol: str | None = None
+    ) -> dict[str, Any]:
+        """Количество сделок, объем и оборот за период, всего и по инструментам"""
+        where, params = self._where(account_id, start, end, symbol)
+        sql = f"""
+            SELECT symbol, side, COUNT(*), SUM(size), SUM(size * price)
+            FROM trades WHERE {where} GROUP BY symbol, side
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        by_symbol: dict[str, dict[str, float]] = {}
+        for row_symbol, side, count, size, turnover in rows:
+            stats = by_symbol.setdefault(
+                row_symbol, {"count": 0, "buys": 0, "sells": 0, "volume": 0.0, "turnover": 0.0}
+            )
+            stats["count"] += count
+            stats["buys" if side == "buy" else "sells"] += count
+            stats["volume"] += size
+            stats["turnover"] += turnover
+        totals = {
+            key: sum(stats[key] for stats in by_symbol.values())
+            for key in ("count", "buys", "sells", "volume", "turnover")
+        }
+        return {**totals, "by_symbol": by_symbol}
+
+    def transaction_stats(
+        self, account_id: str, start: int | None = None, end: int | None = None, symbol: str | None = None
+    ) -> dict[str, Any]:
+        """Количество и сумма транзакций за период по категориям"""
+        where, params = self._where(account_id, start, end, symbol)
+        sql = f"SELECT category, COUNT(*), SUM(amount) FROM transactions WHERE {where} GROUP BY category"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        by_category = {category: {"count": count, "amount": amount} for category, count, amount in rows}
+        return {
+            "count": sum(stats["count"] for stats in by_category.values()),
+            "amount": sum(stats["amount"] for stats in by_category.values()),
+            "by_category": by_category,
+        }
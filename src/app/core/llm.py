@@ -1,34 +1,104 @@
 import datetime
+import threading
+import time
 from typing import Any
 
 import requests
 
-from .config import get_settings
-from ..adapters import FinamAPIClient
+from .config import Settings, get_settings
+from .metrics import LLM_COST, LLM_REQUEST_SECONDS, LLM_TOKENS
+from .tracing import get_tracer
+
+# Цена в USD за 1M токенов (вход, выход) — для оценки стоимости, если OpenRouter не вернул usage.cost
+MODEL_PRICES = {
+    "openai/gpt-4o-mini": (0.15, 0.6),
+    "openai/gpt-4o": (2.5, 10.0),
+    "anthropic/claude-3-sonnet": (3.0, 15.0),
+}
+
+
+class LLMClient:
+    """Клиент OpenRouter с постоянной HTTP сессией (keep-alive между вызовами)"""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {settings.openrouter_api_key}",
+            "Content-Type": "application/json",
+        })
+        # Метки модели привязаны заранее: запись метрик на каждом вызове без поиска по меткам
+        model = settings.openrouter_model
+        self._latency = LLM_REQUEST_SECONDS.labels(model)
+        self._input_tokens = LLM_TOKENS.labels(model, "input")
+        self._output_tokens = LLM_TOKENS.labels(model, "output")
+        self._cost = LLM_COST.labels(model)
+        self._prices = MODEL_PRICES.get(model)
+
+    def chat(
+        self, messages: list[dict[str, str]], temperature: float = 0.2, max_tokens: int | None = None
+    ) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "model": self.settings.openrouter_model,
+            "messages": messages,
+            "temperature": temperature,
+            "usage": {"include": True},  # OpenRouter возвращает стоимость запроса в usage.cost
+        }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+
+        attributes = {"gen_ai.request.model": self.settings.openrouter_model, "gen_ai.request.messages": len(messages)}
+        with get_tracer().span("llm.chat", attributes) as span:
+            started = time.perf_counter()
+            try:
+                r = self.session.post(f"{self.settings.openrouter_base}/chat/completions", json=payload, timeout=60)
+            finally:
+                self._latency.observe(time.perf_counter() - started)
+            r.raise_for_status()
+            response = r.json()
+            usage = response.get("usage") or {}
+            self._record_usage(usage)
+            span.set_attributes({
+                "gen_ai.usage.input_tokens": usage.get("prompt_tokens", 0),
+                "gen_ai.usage.output_tokens": usage.get("completion_tokens", 0),
+                "http.response.body.size": len(r.content),
+            })
+        return response
+
+    def _record_usage(self, usage: dict[str, Any]) -> None:
+        input_tokens, output_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        self._input_tokens.inc(input_tokens)
+        self._output_tokens.inc(output_tokens)
+        cost = usage.get("cost")
+        if cost is None and self._prices is not None:
+            cost = (input_tokens * self._prices[0] + output_tokens * self._prices[1]) / 1e6
+        if cost:
+            self._cost.inc(float(cost))
+
+
+_client: LLMClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Общий на процесс клиент LLM"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(get_settings())
+        return _client
+
+
+def set_llm_client(client: LLMClient | None) -> None:
+    """Заменить общий клиент (например, клиентом локального заменителя OpenRouter); None — сбросить"""
+    global _client
+    with _client_lock:
+        _client = client
 
 
 def call_llm(messages: list[dict[str, str]], temperature: float = 0.2, max_tokens: int | None = None) -> dict[str, Any]:
     """Простой вызов LLM без tools"""
-    s = get_settings()
-    payload: dict[str, Any] = {
-        "model": s.openrouter_model,
-        "messages": messages,
-        "temperature": temperature,
-    }
-    if max_tokens:
-        payload["max_tokens"] = max_tokens
-
-    r = requests.post(
-        f"{s.openrouter_base}/chat/completions",
-        headers={
-            "Authorization": f"Bearer {s.openrouter_api_key}",
-            "Content-Type": "application/json",
-        },
-        json=payload,
-        timeout=60,
-    )
-    r.raise_for_status()
-    return r.json()
+    return get_llm_client().chat(messages, temperature=temperature, max_tokens=max_tokens)
 
 
 def create_system_prompt() -> str:
@@ -63,7 +133,11 @@ def create_system_prompt() -> str:
         - POST /v1/sessions - создание новой сессии
         - POST /v1/sessions/details - детали текущей сессии, проверка действительности токена
         - POST /v1/accounts/{account_id}/orders - создание ордера
+          (поля ордера в query: symbol, side=SIDE_BUY|SIDE_SELL, quantity, limit_price,
+          type=ORDER_TYPE_MARKET|ORDER_TYPE_LIMIT)
         - DELETE /v1/accounts/{account_id}/orders/{order_id} - отмена ордера
+        - DELETE /v1/accounts/{account_id}/orders - отмена всех активных ордеров
+          (symbol в query - только по инструменту)
         
         Timeframes: TIME_FRAME_M1, TIME_FRAME_M5, TIME_FRAME_M15, TIME_FRAME_M30, TIME_FRAME_H1, TIME_FRAME_H4, TIME_FRAME_D, TIME_FRAME_W, TIME_FRAME_MN"""
         "\n\n"
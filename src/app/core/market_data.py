@@ -0,0 +1,251 @@
+"""
+Хаб рыночных данных: последние котировки и стаканы в памяти
+
+Хаб держит подписки на котировки и стаканы, которые недавно запрашивала хотя
+бы одна сессия, и обновляет в фоне с фиксированным интервалом только их: сессия,
+спросившая котировку, не подписывается на стакан. Фоновый опрос может быть
+ограничен отдельным бюджетом запросов (poll_budget), чтобы не вытеснять
+интерактивные запросы к API; при нехватке бюджета первыми обновляются самые
+устаревшие подписки. Запросы котировки и стакана обслуживаются из памяти, если
+данные не старше max_age секунд. Потоковые источники могут отправлять
+обновления напрямую через publish_*.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import takewhile
+from typing import TYPE_CHECKING, Any
+
+from .metrics import CACHE_MISSES, CACHE_REQUESTS
+
+if TYPE_CHECKING:
+    from ..adapters.market_feeds import MarketDataFeed
+
+logger = logging.getLogger(__name__)
+
+_CACHE_REQUESTS = CACHE_REQUESTS.labels("hub")
+_CACHE_MISSES = CACHE_MISSES.labels("hub")
+
+QUOTE = "quote"
+ORDERBOOK = "orderbook"
+
+
+@dataclass
+class _Snapshot:
+    data: dict[str, Any]
+    received_at: float
+
+
+def _price(row: dict[str, Any]) -> float:
+    price = row.get("price")
+    if isinstance(price, dict):
+        price = price.get("value", 0)
+    return float(price or 0)
+
+
+def truncate_orderbook(response: dict[str, Any], depth: int) -> dict[str, Any]:
+    """Ответ /orderbook с depth лучшими уровнями каждой стороны (порядок строк сохраняется)"""
+    book = response.get("orderbook")
+    rows = book.get("rows") if isinstance(book, dict) else None
+    if not rows:
+        return response
+    asks = sorted((row for row in rows if "sell_size" in row), key=_price)
+    bids = sorted((row for row in rows if "buy_size" in row), key=_price, reverse=True)
+    if len(asks) <= depth and len(bids) <= depth:
+        return response
+    dropped = {id(row) for row in (*asks[depth:], *bids[depth:])}
+    return {**response, "orderbook": {**book, "rows": [row for row in rows if id(row) not in dropped]}}
+
+
+class MarketDataHub:
+    """Подписки на инструменты и кэш последних котировок и стаканов"""
+
+    def __init__(
+        self,
+        feed: "MarketDataFeed",
+        interval: float = 1.0,
+        max_age: float = 2.0,
+        depth: int = 10,
+        idle_timeout: float = 300.0,
+        max_workers: int = 4,
+        poll_budget: Callable[[], bool] | None = None,
+    ) -> None:
+        """
+        Args:
+            feed: Источник данных (REST поллинг или локальный поток)
+            interval: Период фонового обновления подписок, сек
+            max_age: Максимальный возраст данных, отдаваемых из памяти, сек
+            depth: Глубина стакана, которую держит хаб
+            idle_timeout: Через сколько секунд без обращений сессия отписывается
+            max_workers: Количество параллельных запросов при обновлении
+            poll_budget: Разрешение на один фоновый запрос (например, RateLimiter.try_acquire);
+                None — опрашивать все подписки каждый интервал
+        """
+        self.feed = feed
+        self.interval = interval
+        self.max_age = max_age
+        self.depth = depth
+        self.idle_timeout = idle_timeout
+        self.poll_budget = poll_budget
+        self._lock = threading.Lock()
+        # (вид данных, инструмент) -> {сессия: время последнего обращения}
+        self._subscribers: dict[tuple[str, str], dict[str, float]] = {}
+        self._quotes: dict[str, _Snapshot] = {}
+        self._orderbooks: dict[str, _Snapshot] = {}
+        self._stores = {QUOTE: self._quotes, ORDERBOOK: self._orderbooks}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # Подписки
+
+    def subscribe(self, symbol: str, session_id: str = "", kind: str = QUOTE) -> None:
+        """Подписать сессию на котировку (QUOTE) или стакан (ORDERBOOK); повторный вызов продлевает подписку"""
+        with self._lock:
+            self._subscribers.setdefault((kind, symbol), {})[session_id] = time.monotonic()
+
+    def unsubscribe(self, symbol: str, session_id: str = "", kind: str | None = None) -> None:
+        """Отписать сессию от инструмента (kind=None — и от котировки, и от стакана)"""
+        with self._lock:
+            for key in [(kind, symbol)] if kind else [(QUOTE, symbol), (ORDERBOOK, symbol)]:
+                sessions = self._subscribers.get(key)
+                if sessions is not None:
+                    sessions.pop(session_id, None)
+                    if not sessions:
+                        self._drop(key)
+
+    def drop_session(self, session_id: str) -> None:
+        """Отписать сессию от всех инструментов"""
+        with self._lock:
+            for key in list(self._subscribers):
+                sessions = self._subscribers[key]
+                sessions.pop(session_id, None)
+                if not sessions:
+                    self._drop(key)
+
+    @property
+    def symbols(self) -> list[str]:
+        """Инструменты, на которые есть хотя бы одна подписка"""
+        with self._lock:
+            return list(dict.fromkeys(symbol for _, symbol in self._subscribers))
+
+    @property
+    def subscriptions(self) -> list[tuple[str, str]]:
+        """Подписки (вид данных, инструмент)"""
+        with self._lock:
+            return list(self._subscribers)
+
+    def _drop(self, key: tuple[str, str]) -> None:
+        del self._subscribers[key]
+        kind, symbol = key
+        self._stores[kind].pop(symbol, None)
+
+    def _expire(self) -> None:
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            for key in list(self._subscribers):
+                sessions = self._subscribers[key]
+                for session_id in [s for s, seen in sessions.items() if seen < deadline]:
+                    del sessions[session_id]
+                if not sessions:
+                    self._drop(key)
+
+    # Публикация обновлений
+
+    def publish_quote(self, symbol: str, data: dict[str, Any]) -> None:
+        with self._lock:
+            if "error" not in data and (QUOTE, symbol) in self._subscribers:
+                self._quotes[symbol] = _Snapshot(data, time.monotonic())
+
+    def publish_orderbook(self, symbol: str, data: dict[str, Any]) -> None:
+        with self._lock:
+            if "error" not in data and (ORDERBOOK, symbol) in self._subscribers:
+                self._orderbooks[symbol] = _Snapshot(data, time.monotonic())
+
+    # Чтение
+
+    def get_quote(self, symbol: str, session_id: str = "", max_age: float | None = None) -> dict[str, Any]:
+        """Последняя котировка: из памяти, если свежая, иначе запросом к источнику"""
+        self.subscribe(symbol, session_id, QUOTE)
+        _CACHE_REQUESTS.inc()
+        snapshot = self._fresh(self._quotes, symbol, max_age)
+        if snapshot is not None:
+            return snapshot
+        _CACHE_MISSES.inc()
+        data = self.feed.fetch_quote(symbol)
+        self.publish_quote(symbol, data)
+        return data
+
+    def get_orderbook(
+        self, symbol: str, depth: int = 10, session_id: str = "", max_age: float | None = None
+    ) -> dict[str, Any]:
+        """Стакан глубины depth: из памяти, если свежий и хаб держит достаточную глубину, иначе запросом к источнику"""
+        if depth > self.depth:
+            return truncate_orderbook(self.feed.fetch_orderbook(symbol, depth), depth)
+        self.subscribe(symbol, session_id, ORDERBOOK)
+        _CACHE_REQUESTS.inc()
+        snapshot = self._fresh(self._orderbooks, symbol, max_age)
+        if snapshot is not None:
+            return truncate_orderbook(snapshot, depth)
+        _CACHE_MISSES.inc()
+        data = self.feed.fetch_orderbook(symbol, self.depth)
+        self.publish_orderbook(symbol, data)
+        return truncate_orderbook(data, depth)
+
+    def _fresh(self, store: dict[str, _Snapshot], symbol: str, max_age: float | None) -> dict[str, Any] | None:
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            snapshot = store.get(symbol)
+        if snapshot is None or time.monotonic() - snapshot.received_at > max_age:
+            return None
+        return snapshot.data
+
+    # Фоновое обновление
+
+    def refresh(self) -> None:
+        """Обновить подписки один раз (в пределах бюджета запросов — сначала самые устаревшие)"""
+        self._expire()
+        with self._lock:
+            subscriptions = sorted(self._subscribers, key=self._received_at)
+        if self.poll_budget is not None:
+            subscriptions = list(takewhile(lambda _: self.poll_budget(), subscriptions))
+        for (kind, symbol), data in zip(subscriptions, self._executor.map(self._poll, subscriptions), strict=True):
+            if kind == QUOTE:
+                self.publish_quote(symbol, data)
+            else:
+                self.publish_orderbook(symbol, data)
+
+    def _received_at(self, key: tuple[str, str]) -> float:
+        kind, symbol = key
+        snapshot = self._stores[kind].get(symbol)
+        return snapshot.received_at if snapshot is not None else float("-inf")
+
+    def _poll(self, key: tuple[str, str]) -> dict[str, Any]:
+        kind, symbol = key
+        return self.feed.fetch_quote(symbol) if kind == QUOTE else self.feed.fetch_orderbook(symbol, self.depth)
+
+    def start(self) -> "MarketDataHub":
+        """Запустить фоновый поток обновления"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="market-data-hub", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Market data refresh failed")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
@@ -0,0 +1,363 @@
+"""
+Метрики приложения в текстовом формате Prometheus
+
+Счетчики, гистограммы и gauge с метками. Дочерняя метрика для набора
+значений меток создается один раз (labels()) и кэшируется; на горячем пути
+ее привязывают заранее, и запись сводится к инкременту под локом без
+аллокаций. Реестр отдается HTTP сервером на отдельном порту (APP_METRICS_PORT),
+чтобы не зависеть от Streamlit.
+
+Каталог метрик приложения — в конце модуля.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Registry:
+    """Набор метрик для экспорта"""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def expose(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), registry: Registry | None = REGISTRY
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _child(self) -> Any:  # noqa: ANN401
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:  # noqa: ANN401
+        """Дочерняя метрика для значений меток (создается один раз, далее берется из кэша)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def _items(self) -> list[tuple[tuple[str, ...], Any]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик (имя по соглашению Prometheus оканчивается на _total)"""
+
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        super().__init__(*args, **kwargs)
+        self._default = self.labels() if not self.labelnames else None
+
+    def _child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._items()
+        ]
+
+
+class _GaugeChild:
+    __slots__ = ("_function", "_lock", "_value")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._function: Callable[[], float] | None = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Значение вычисляется функцией в момент экспорта"""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return float(self._function()) if self._function is not None else self._value
+
+
+class Gauge(_Metric):
+    """Текущее значение (может уменьшаться)"""
+
+    kind = "gauge"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        super().__init__(*args, **kwargs)
+        self._default = self.labels() if not self.labelnames else None
+
+    def _child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._default.set_function(function)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for values, child in self._items():
+            try:
+                value = child.value
+            except Exception:
+                logger.exception("Gauge %s callback failed", self.name)
+                continue
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последняя корзина — +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        """Контекстный менеджер, записывающий длительность блока в секундах"""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: _HistogramChild) -> None:
+        self._child = child
+        self._started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._child.observe(time.perf_counter() - self._started)
+
+
+class Histogram(_Metric):
+    """Распределение значений по корзинам (le — верхняя граница, накопительно)"""
+
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs: Any) -> None:  # noqa: ANN401
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(*args, **kwargs)
+        self._default = self.labels() if not self.labelnames else None
+
+    def _child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    def samples(self) -> list[str]:
+        lines = []
+        bounds = [*self.buckets, float("inf")]
+        for values, child in self._items():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(bounds, counts, strict=True):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class ActiveSessions:
+    """Сессии, проявлявшие активность за последние window секунд"""
+
+    def __init__(self, window: float = 300.0) -> None:
+        self.window = window
+        self._seen: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str) -> None:
+        with self._lock:
+            self._seen[session_id] = time.monotonic()
+
+    def count(self) -> int:
+        deadline = time.monotonic() - self.window
+        with self._lock:
+            for session_id in [s for s, seen in self._seen.items() if seen < deadline]:
+                del self._seen[session_id]
+            return len(self._seen)
+
+
+class MetricsServer:
+    """HTTP сервер /metrics в фоновом потоке"""
+
+    def __init__(self, port: int, host: str = "0.0.0.0", registry: Registry = REGISTRY) -> None:
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: ANN401
+                pass
+
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] not in {"/metrics", "/"}:
+                    self.send_error(404)
+                    return
+                data = registry.expose().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> MetricsServer | None:
+    """Запустить сервер метрик; None, если порт занят (приложение продолжает работать без него)"""
+    try:
+        return MetricsServer(port, host).start()
+    except OSError as e:
+        logger.warning("Metrics server on port %s is not started: %s", port, e)
+        return None
+
+
+# Каталог метрик приложения
+
+FINAM_REQUEST_SECONDS = Histogram(
+    "finam_request_duration_seconds", "Finam TradeAPI request latency", ("method", "route", "status")
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds",
+    "LLM chat completion latency",
+    ("model",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0),
+)
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens", ("model", "type"))
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM cost in USD", ("model",))
+CACHE_REQUESTS = Counter("cache_requests_total", "Read-only Finam data requests served via a cache", ("source",))
+CACHE_MISSES = Counter("cache_misses_total", "Cache misses (data fetched from Finam TradeAPI or rebuilt)", ("source",))
+SYMBOL_RESOLUTION_SECONDS = Histogram(
+    "symbol_resolution_duration_seconds",
+    "Company name to ticker resolution latency",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1.0),
+)
+ACTIVE_SESSIONS = ActiveSessions()
+CHAT_ACTIVE_SESSIONS = Gauge("chat_active_sessions", "Chat sessions active during the last 5 minutes")
+CHAT_ACTIVE_SESSIONS.set_function(ACTIVE_SESSIONS.count)
+CHAT_JOBS_ACTIVE = Gauge("chat_jobs_active", "Chat turns queued or running in background workers")
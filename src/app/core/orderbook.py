@@ -0,0 +1,198 @@
+"""
+Биржевой стакан на предвыделенных NumPy массивах
+
+Уровни каждой стороны хранятся в отсортированных массивах фиксированной
+емкости: вставка и удаление уровня — сдвиг среза (O(depth)), лучшие цены,
+спред, mid и microprice — O(1), глубина и дисбаланс по N уровням — O(N).
+"""
+
+from typing import Any
+
+import numpy as np
+
+BID = "bid"
+ASK = "ask"
+
+
+def _value(field: Any) -> float:  # noqa: ANN401
+    """Число из поля Finam API ({"value": "123.45"} или скаляр)"""
+    if isinstance(field, dict):
+        field = field.get("value", 0)
+    return float(field or 0)
+
+
+class _Side:
+    """Одна сторона стакана: ключи по возрастанию (для bid ключ = -цена)"""
+
+    __slots__ = ("count", "keys", "sign", "sizes")
+
+    def __init__(self, capacity: int, sign: float) -> None:
+        self.keys = np.empty(capacity, dtype=np.float64)
+        self.sizes = np.empty(capacity, dtype=np.float64)
+        self.sign = sign
+        self.count = 0
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self.keys[: self.count] * self.sign
+
+    def clear(self) -> None:
+        self.count = 0
+
+    def load(self, prices: np.ndarray, sizes: np.ndarray) -> None:
+        keys = prices * self.sign
+        order = np.argsort(keys, kind="stable")[: len(self.keys)]
+        n = len(order)
+        self.keys[:n] = keys[order]
+        self.sizes[:n] = sizes[order]
+        self.count = n
+
+    def update(self, price: float, size: float) -> None:
+        key = price * self.sign
+        n = self.count
+        i = int(np.searchsorted(self.keys[:n], key))
+        exists = i < n and self.keys[i] == key
+        if size <= 0:
+            if exists:
+                self.keys[i : n - 1] = self.keys[i + 1 : n]
+                self.sizes[i : n - 1] = self.sizes[i + 1 : n]
+                self.count = n - 1
+        elif exists:
+            self.sizes[i] = size
+        elif i < len(self.keys):
+            # Если стакан заполнен, худший уровень вытесняется
+            end = min(n, len(self.keys) - 1)
+            self.keys[i + 1 : end + 1] = self.keys[i:end]
+            self.sizes[i + 1 : end + 1] = self.sizes[i:end]
+            self.keys[i] = key
+            self.sizes[i] = size
+            self.count = end + 1
+
+    def depth(self, levels: int | None = None) -> float:
+        n = self.count if levels is None else min(levels, self.count)
+        return float(self.sizes[:n].sum())
+
+
+class OrderBook:
+    """Стакан по инструменту с инкрементальными обновлениями"""
+
+    def __init__(self, symbol: str = "", capacity: int = 50) -> None:
+        self.symbol = symbol
+        self.capacity = capacity
+        self.bids = _Side(capacity, -1.0)
+        self.asks = _Side(capacity, 1.0)
+
+    @classmethod
+    def from_response(cls, response: dict[str, Any], capacity: int = 50) -> "OrderBook":
+        """Построить стакан из ответа GET /v1/instruments/{symbol}/orderbook"""
+        book = cls(response.get("symbol", ""), capacity)
+        book.apply_snapshot(response.get("orderbook", {}).get("rows", []))
+        return book
+
+    def side(self, side: str) -> _Side:
+        return self.bids if side == BID else self.asks
+
+    def apply_snapshot(self, rows: list[dict[str, Any]]) -> None:
+        """Заменить содержимое стакана строками Finam API (price, buy_size/sell_size)"""
+        bid_rows = [(_value(r["price"]), _value(r["buy_size"])) for r in rows if "buy_size" in r]
+        ask_rows = [(_value(r["price"]), _value(r["sell_size"])) for r in rows if "sell_size" in r]
+        for side, side_rows in ((self.bids, bid_rows), (self.asks, ask_rows)):
+            if side_rows:
+                levels = np.asarray(side_rows, dtype=np.float64)
+                side.load(levels[:, 0], levels[:, 1])
+            else:
+                side.clear()
+
+    def apply_delta(self, side: str, price: float, size: float) -> None:
+        """Изменить объем на уровне цены; size <= 0 удаляет уровень"""
+        self.side(side).update(price, size)
+
+    def apply_rows(self, rows: list[dict[str, Any]]) -> None:
+        """Применить инкрементальные строки Finam API (action ACTION_REMOVE удаляет уровень)"""
+        for row in rows:
+            side = BID if "buy_size" in row else ASK
+            size = 0.0 if row.get("action") == "ACTION_REMOVE" else _value(row.get("buy_size", row.get("sell_size")))
+            self.side(side).update(_value(row["price"]), size)
+
+    # Метрики
+
+    @property
+    def best_bid(self) -> float | None:
+        return -float(self.bids.keys[0]) if self.bids.count else None
+
+    @property
+    def best_ask(self) -> float | None:
+        return float(self.asks.keys[0]) if self.asks.count else None
+
+    @property
+    def spread(self) -> float | None:
+        if not (self.bids.count and self.asks.count):
+            return None
+        return float(self.asks.keys[0] + self.bids.keys[0])
+
+    @property
+    def mid(self) -> float | None:
+        if not (self.bids.count and self.asks.count):
+            return None
+        return float(self.asks.keys[0] - self.bids.keys[0]) / 2
+
+    @property
+    def microprice(self) -> float | None:
+        """Mid, взвешенный объемами на лучших уровнях"""
+        if not (self.bids.count and self.asks.count):
+            return None
+        bid, ask = -self.bids.keys[0], self.asks.keys[0]
+        bid_size, ask_size = self.bids.sizes[0], self.asks.sizes[0]
+        total = bid_size + ask_size
+        if total <= 0:
+            return self.mid
+        return float((bid * ask_size + ask * bid_size) / total)
+
+    def depth(self, side: str, levels: int | None = None) -> float:
+        """Суммарный объем на первых N уровнях стороны"""
+        return self.side(side).depth(levels)
+
+    def imbalance(self, levels: int | None = None) -> float | None:
+        """(bid - ask) / (bid + ask) по объему первых N уровней, от -1 до 1"""
+        bid, ask = self.bids.depth(levels), self.asks.depth(levels)
+        if bid + ask == 0:
+            return None
+        return (bid - ask) / (bid + ask)
+
+    def levels(self, side: str, levels: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Цены и объемы первых N уровней (копии)"""
+        s = self.side(side)
+        n = s.count if levels is None else min(levels, s.count)
+        return s.keys[:n] * s.sign, s.sizes[:n].copy()
+
+    def to_payload(self, levels: int = 10) -> dict[str, Any]:
+        """Компактное представление для LLM: метрики и первые N уровней"""
+
+        def rows(side: str) -> list[list[float]]:
+            prices, sizes = self.levels(side, levels)
+            return np.column_stack((prices, sizes)).tolist()
+
+        def rounded(value: float | None) -> float | None:
+            return None if value is None else round(value, 8)
+
+        return {
+            "symbol": self.symbol,
+            "best_bid": self.best_bid,
+            "best_ask": self.best_ask,
+            "spread": rounded(self.spread),
+            "mid": rounded(self.mid),
+            "microprice": rounded(self.microprice),
+            "imbalance": rounded(self.imbalance(levels)),
+            "bid_depth": self.depth(BID, levels),
+            "ask_depth": self.depth(ASK, levels),
+            "bids": rows(BID),
+            "asks": rows(ASK),
+            "columns": ["price", "size"],
+        }
+
+
+def summarize_orderbook(response: dict[str, Any], levels: int = 10) -> dict[str, Any]:
+    """Сжать ответ Finam API со стаканом до метрик и первых N уровней"""
+    if "error" in response:
+        return response
+    return OrderBook.from_response(response).to_payload(levels)
@@ -0,0 +1,363 @@
+"""
+Конвейер выставления и отмены ордеров
+
+Перед отправкой ордер проверяется локально по параметрам инструмента
+(лотность, шаг цены, доступность торговли и покупки) — заведомо
+отклоняемые ордера не тратят запрос к API. Пачки ордеров отправляются и
+отменяются параллельно; частоту запросов ограничивает RateLimiter клиента.
+
+Каждому ордеру назначается ключ идемпотентности (client_order_id):
+повторная отправка ордера с тем же ключом возвращает сохраненный ответ
+вместо второго POST. Если исход POST неизвестен (таймаут, обрыв связи,
+5xx — биржа могла заявку принять), ключ остается «неподтвержденным», и
+повтор сначала ищет ордер с этим client_order_id в списке ордеров счета;
+POST повторяется, только если ордера там нет.
+
+Чат передает запросы без тела (METHOD /path), поэтому execute_order_request
+разбирает поля ордера из query и направляет выставление, отмену и «отменить
+все» через конвейер; ключ идемпотентности выводится из хода диалога и
+запроса, так что повтор того же запроса в пределах хода не выставит второй
+ордер.
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+if TYPE_CHECKING:
+    from ..adapters import FinamAPIClient
+
+ReferenceFetcher = Callable[[str], dict[str, Any]]
+"""path -> ответ GET запроса к справочным данным (может кэшироваться)"""
+
+ALLOWED_VALUES = frozenset({"AVAILABLE", "AVAILABLE_ON"})
+ACTIVE_STATUSES = frozenset({"ORDER_STATUS_NEW", "ORDER_STATUS_PARTIALLY_FILLED", "ORDER_STATUS_PENDING_NEW"})
+PRICED_TYPES = frozenset({"ORDER_TYPE_LIMIT", "ORDER_TYPE_STOP_LIMIT"})
+STOP_TYPES = frozenset({"ORDER_TYPE_STOP", "ORDER_TYPE_STOP_LIMIT"})
+ORDERS_ROUTE = re.compile(r"^/v1/accounts/(?P<account_id>[^/?]+)/orders(?:/(?P<order_id>[^/?]+))?$")
+TEXT_FIELDS = ("symbol", "side", "type", "time_in_force", "client_order_id")
+DECIMAL_FIELDS = ("quantity", "limit_price", "stop_price")
+
+
+def _decimal(value: Any) -> Decimal | None:  # noqa: ANN401
+    """Число из формата Finam ({"value": "..."}) или обычного значения"""
+    if isinstance(value, dict):
+        value = value.get("value")
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return None
+
+
+def _allowed(value: Any) -> bool:  # noqa: ANN401
+    """Флаг доступности из ответа /params ({"value": "AVAILABLE_ON"} или bool)"""
+    if isinstance(value, dict):
+        value = value.get("value")
+    if value is None:
+        return True
+    if isinstance(value, bool):
+        return value
+    # NOT_AVAILABLE, AVAILABLE_OFF, ACCOUNT_NOT_APPROVED и неизвестные значения — недоступно
+    return str(value).upper() in ALLOWED_VALUES
+
+
+def _rejected(response: dict[str, Any]) -> bool:
+    """Ответ с ошибкой, при которой ордер точно не принят (4xx); таймаут и 5xx — исход неизвестен"""
+    status = response.get("status_code")
+    return isinstance(status, int) and 400 <= status < 500
+
+
+@dataclass(frozen=True)
+class InstrumentRules:
+    """Торговые параметры инструмента для локальной проверки ордера"""
+
+    symbol: str
+    lot_size: Decimal = Decimal(1)
+    price_step: Decimal | None = None
+    tradeable: bool = True
+    longable: bool = True
+
+    @classmethod
+    def from_responses(cls, symbol: str, asset: dict[str, Any], params: dict[str, Any]) -> "InstrumentRules":
+        """
+        Из ответов /v1/assets/{symbol} (лот, шаг цены) и /v1/assets/{symbol}/params (доступность)
+
+        min_step в Finam API задан в единицах 10^-decimals.
+        """
+        lot_size = _decimal(asset.get("lot_size")) or Decimal(1)
+        min_step = _decimal(asset.get("min_step"))
+        decimals = int(asset.get("decimals") or 0)
+        price_step = min_step.scaleb(-decimals) if min_step else None
+        return cls(
+            symbol=symbol,
+            lot_size=lot_size,
+            price_step=price_step,
+            tradeable=params.get("tradeable", True) is not False,
+            longable=_allowed(params.get("longable")),
+        )
+
+
+def validate_order(order: dict[str, Any], rules: InstrumentRules | None) -> list[str]:  # noqa: C901
+    """
+    Ошибки ордера, которые API гарантированно отклонит (пустой список — ордер корректен)
+
+    Без параметров инструмента проверяются только поля самого ордера.
+    """
+    errors = []
+    if not order.get("symbol"):
+        errors.append("не указан инструмент")
+    side = str(order.get("side", ""))
+    if side not in ("SIDE_BUY", "SIDE_SELL"):
+        errors.append(f"неизвестное направление: {side or '—'}")
+    quantity = _decimal(order.get("quantity"))
+    if quantity is None or quantity <= 0:
+        errors.append("количество должно быть положительным")
+    order_type = str(order.get("type", "ORDER_TYPE_MARKET"))
+    prices = {}
+    if order_type in PRICED_TYPES:
+        prices["limit_price"] = _decimal(order.get("limit_price"))
+    if order_type in STOP_TYPES:
+        prices["stop_price"] = _decimal(order.get("stop_price"))
+    for name, price in prices.items():
+        if price is None or price <= 0:
+            errors.append(f"{name} должна быть положительной")
+    if rules is None:
+        return errors
+
+    if not rules.tradeable:
+        errors.append(f"{rules.symbol} недоступен для торговли")
+    elif side == "SIDE_BUY" and not rules.longable:
+        errors.append(f"покупка {rules.symbol} недоступна на счете")
+    if quantity is not None and quantity > 0 and quantity % rules.lot_size:
+        errors.append(f"количество {quantity} не кратно лоту {rules.lot_size}")
+    if rules.price_step:
+        for name, price in prices.items():
+            if price is not None and price > 0 and price % rules.price_step:
+                errors.append(f"{name} {price} не кратна шагу цены {rules.price_step}")
+    return errors
+
+
+@dataclass
+class OrderResult:
+    """Результат отправки или отмены одного ордера"""
+
+    key: str
+    response: dict[str, Any]
+    latency: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and "error" not in self.response
+
+    @property
+    def sent(self) -> bool:
+        """Ушел ли запрос в API (False — отклонен локальной проверкой)"""
+        return not self.errors
+
+
+def latency_summary(results: list[OrderResult]) -> dict[str, float]:
+    """Количество отправленных запросов и задержки p50 / p95 / max в миллисекундах"""
+    import numpy as np  # нужен только для сводки: чат выставляет ордера без numpy
+
+    latencies = np.array([result.latency for result in results if result.sent]) * 1000
+    if not len(latencies):
+        return {"sent": 0, "rejected": len(results), "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "sent": len(latencies),
+        "rejected": len(results) - len(latencies),
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "max": float(latencies.max()),
+    }
+
+
+class OrderPipeline:
+    """
+    Пакетная отправка и отмена ордеров счета с предварительной проверкой
+
+    Args:
+        client: Клиент Finam API
+        account_id: Счет
+        reference: Загрузка справочных данных по пути (по умолчанию — GET через client)
+        max_workers: Параллельных запросов в пачке
+        validate: Проверять ордера по параметрам инструмента перед отправкой
+    """
+
+    def __init__(
+        self,
+        client: "FinamAPIClient",
+        account_id: str,
+        reference: ReferenceFetcher | None = None,
+        max_workers: int = 8,
+        validate: bool = True,
+    ) -> None:
+        self.client = client
+        self.account_id = account_id
+        self.reference = reference or (lambda path: client.execute_request("GET", path))
+        self.max_workers = max_workers
+        self.validate = validate
+        self._rules: dict[str, InstrumentRules] = {}
+        self._submitted: dict[str, OrderResult] = {}
+        self._unconfirmed: set[str] = set()  # ключи, POST которых мог исполниться без ответа
+        self._keys: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def rules(self, symbol: str) -> InstrumentRules | None:
+        """Параметры инструмента (кэшируются; None — справочник недоступен)"""
+        if symbol in self._rules:
+            return self._rules[symbol]
+        asset = self.reference(f"/v1/assets/{symbol}?account_id={self.account_id}")
+        params = self.reference(f"/v1/assets/{symbol}/params?account_id={self.account_id}")
+        if "error" in asset:
+            return None
+        if "error" in params:
+            # Без /params проверяются только лот и шаг цены; результат не кэшируется — при следующем ордере
+            # параметры запрашиваются снова
+            return InstrumentRules.from_responses(symbol, asset, {})
+        rules = self._rules[symbol] = InstrumentRules.from_responses(symbol, asset, params)
+        return rules
+
+    def _map(self, fn: Callable[[Any], OrderResult], items: list[Any]) -> list[OrderResult]:
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(fn, items))
+
+    def _submit_one(self, order: dict[str, Any]) -> OrderResult:
+        key = order["client_order_id"]
+        errors = validate_order(order, self.rules(order["symbol"]) if self.validate and order.get("symbol") else None)
+        if errors:
+            return OrderResult(key, {"error": "; ".join(errors), "type": "OrderValidationError"}, errors=errors)
+        with self._lock:
+            key_lock = self._keys.setdefault(key, threading.Lock())
+        # Один и тот же ключ в параллельных пачках отправляется не больше одного раза
+        with key_lock:
+            if (done := self._submitted.get(key)) is not None:
+                return done
+            started = time.perf_counter()
+            if key in self._unconfirmed:
+                existing = self._find_order(key)
+                if existing is not None:
+                    result = OrderResult(key, existing, time.perf_counter() - started)
+                    if "error" not in existing:
+                        self._unconfirmed.discard(key)
+                        self._submitted[key] = result
+                    return result
+            # Ключ помечается до POST: если ответ не придет, повтор проверит список ордеров
+            self._unconfirmed.add(key)
+            response = self.client.create_order(self.account_id, order)
+            result = OrderResult(key, response, time.perf_counter() - started)
+            if "error" not in response:
+                self._unconfirmed.discard(key)
+                self._submitted[key] = result
+            elif _rejected(response):
+                self._unconfirmed.discard(key)
+        return result
+
+    def _find_order(self, key: str) -> dict[str, Any] | None:
+        """
+        Ордер счета с client_order_id == key
+
+        Returns:
+            Состояние ордера; None — ордера нет; ответ с "error" — список ордеров недоступен
+            (исход по-прежнему неизвестен, повторять POST нельзя)
+        """
+        response = self.client.get_orders(self.account_id)
+        if "error" in response:
+            error = f"исход отправки ордера {key} неизвестен: {response['error']}"
+            return {"error": error, "type": "OrderStatusUnknown"}
+        for order in response.get("orders") or []:
+            if (order.get("order") or order).get("client_order_id") == key:
+                return order
+        return None
+
+    def submit(self, orders: list[dict[str, Any]]) -> list[OrderResult]:
+        """
+        Проверить и отправить ордера параллельно (результаты — в порядке ордеров)
+
+        Ордерам без client_order_id назначается новый ключ; ключ записывается
+        в сам ордер, чтобы его можно было повторно отправить идемпотентно.
+        """
+        for order in orders:
+            order.setdefault("client_order_id", uuid.uuid4().hex)
+        return self._map(self._submit_one, orders)
+
+    def _cancel_one(self, order_id: str) -> OrderResult:
+        started = time.perf_counter()
+        response = self.client.cancel_order(self.account_id, order_id)
+        return OrderResult(order_id, response, time.perf_counter() - started)
+
+    def cancel(self, order_ids: list[str]) -> list[OrderResult]:
+        """Отменить ордера параллельно"""
+        return self._map(self._cancel_one, list(order_ids))
+
+    def active_orders(self, symbol: str | None = None) -> list[dict[str, Any]]:
+        """
+        Активные ордера счета (опционально по инструменту)
+
+        Raises:
+            RuntimeError: Если API вернул ошибку
+        """
+        response = self.client.get_orders(self.account_id)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return [
+            order
+            for order in response.get("orders") or []
+            if order.get("status") in ACTIVE_STATUSES
+            and (symbol is None or (order.get("order") or order).get("symbol") == symbol)
+        ]
+
+    def cancel_all(self, symbol: str | None = None) -> list[OrderResult]:
+        """Отменить все активные ордера счета (одним списком ордеров и параллельными отменами)"""
+        return self.cancel([order["order_id"] for order in self.active_orders(symbol)])
+
+
+def execute_order_request(
+    pipeline: Callable[[str], OrderPipeline], method: str, path: str, scope: str = ""
+) -> dict[str, Any] | None:
+    """
+    Выставить или отменить ордер из чата через OrderPipeline
+
+    POST /v1/accounts/{id}/orders — ордер из query (symbol, side, quantity, type,
+    limit_price, stop_price, time_in_force), DELETE .../orders/{order_id} — отмена,
+    DELETE .../orders — отмена всех активных ордеров (symbol в query — по инструменту).
+
+    Args:
+        pipeline: Конвейер для счета (account_id -> OrderPipeline)
+        method: HTTP метод
+        path: Путь с query
+        scope: Ход диалога; с ним ключ идемпотентности ордера выводится из (scope, path)
+
+    Returns:
+        Ответ в формате Finam API; None — запрос не про выставление или отмену ордеров
+    """
+    method = method.upper()
+    match = ORDERS_ROUTE.match(path.split("?", 1)[0])
+    if match is None or method not in ("POST", "DELETE") or (method == "POST" and match["order_id"]):
+        return None
+    account_id, order_id = match["account_id"], match["order_id"]
+    params = {key: values[0] for key, values in parse_qs(urlsplit(path).query).items()}
+    if method == "POST":
+        order = {key: params[key] for key in TEXT_FIELDS if params.get(key)}
+        order.update({key: {"value": params[key]} for key in DECIMAL_FIELDS if params.get(key)})
+        if scope:
+            order.setdefault("client_order_id", uuid.uuid5(uuid.NAMESPACE_URL, f"{scope}:{path}").hex)
+        return pipeline(account_id).submit([order])[0].response
+    if order_id:
+        return pipeline(account_id).cancel([order_id])[0].response
+    try:
+        results = pipeline(account_id).cancel_all(params.get("symbol"))
+    except RuntimeError as e:
+        return {"error": str(e)}
+    return {"account_id": account_id, "orders": [{"order_id": result.key, **result.response} for result in results]}
@@ -0,0 +1,440 @@
+"""
+Аналитика портфеля по истории сделок и движений денег
+
+Сделки (/v1/accounts/{id}/trades) и транзакции (/transactions) хранятся
+колонками NumPy и догружаются инкрементально: при обновлении запрашивается
+только интервал после последней обработанной записи. Текущее состояние
+счета (/v1/accounts/{id}) служит якорем: позиции и деньги на начало истории
+получаются вычитанием всех сделок и движений из текущих значений, поэтому
+кривая капитала сходится с фактическим счетом, даже если история неполная.
+
+Позиции, деньги и стоимость на сетке дат считаются через cumsum и
+searchsorted по каждому инструменту, без прохода по сделкам в Python.
+"""
+
+import datetime
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .candles import TIMEFRAME_SECONDS, Candles, format_time, parse_time
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from ..adapters import FinamAPIClient
+
+PricesProvider = Callable[[str, int, int], Candles]
+"""(symbol, start, end) -> дневные свечи за интервал"""
+
+EXTERNAL_CATEGORIES = ("DEPOSIT", "WITHDRAW", "TRANSFER")  # ввод и вывод денег (не доход портфеля)
+PERIODS_PER_YEAR = {"TIME_FRAME_D": 252, "TIME_FRAME_W": 52, "TIME_FRAME_MN": 12}
+DEFAULT_SECTOR = "Прочее"
+
+
+def money(field: Any) -> float:  # noqa: ANN401
+    """Сумма из поля Finam API: Money ({units, nanos}), Decimal ({value}) или скаляр"""
+    if isinstance(field, dict):
+        if "value" in field:
+            return float(field["value"] or 0)
+        return float(field.get("units") or 0) + float(field.get("nanos") or 0) / 1e9
+    return float(field or 0)
+
+
+@dataclass
+class PortfolioPosition:
+    """Позиция портфеля (формат для графика sunburst)"""
+
+    symbol: str
+    quantity: float
+    price: float
+    value: float
+    weight: float = 0.0
+    sector: str = DEFAULT_SECTOR
+    average_price: float = 0.0
+    unrealized_pnl: float = 0.0
+
+
+@dataclass(frozen=True)
+class EquityCurve:
+    """Стоимость портфеля на сетке дат и внешние потоки денег за каждый период"""
+
+    timestamp: np.ndarray
+    equity: np.ndarray
+    cash: np.ndarray
+    flows: np.ndarray
+
+    def returns(self) -> np.ndarray:
+        """Доходность за период, взвешенная по времени (без учета ввода/вывода денег)"""
+        if len(self.equity) < 2:
+            return np.empty(0)
+        previous = self.equity[:-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(previous > 0, (self.equity[1:] - self.flows[1:]) / previous - 1.0, np.nan)
+
+    def to_frame(self) -> "pd.DataFrame":
+        """DataFrame с колонками datetime, value (формат графика performance)"""
+        import pandas as pd
+
+        return pd.DataFrame({
+            "datetime": pd.to_datetime(self.timestamp, unit="s", utc=True),
+            "value": self.equity,
+        })
+
+
+def _empty_trades() -> dict[str, np.ndarray]:
+    return {
+        "timestamp": np.empty(0, dtype=np.int64),
+        "symbol": np.empty(0, dtype=object),
+        "quantity": np.empty(0),
+        "price": np.empty(0),
+    }
+
+
+def _empty_flows() -> dict[str, np.ndarray]:
+    return {"timestamp": np.empty(0, dtype=np.int64), "amount": np.empty(0), "external": np.empty(0, dtype=bool)}
+
+
+def _record_keys(
+    records: list[dict[str, Any]],
+    record_id: Callable[[dict[str, Any]], Any],
+    fields: Callable[[dict[str, Any]], tuple],
+) -> list[str]:
+    keys = []
+    occurrences: Counter[str] = Counter()
+    for record in records:
+        value = record_id(record)
+        if value:
+            keys.append(str(value))
+            continue
+        # Одинаковые записи одного ответа (несколько исполнений в одну секунду) нумеруются по порядку:
+        # повторный запрос того же интервала дает те же ключи, а сами записи не схлопываются
+        key = "|".join(map(str, fields(record)))
+        occurrences[key] += 1
+        keys.append(f"{key}|{occurrences[key]}")
+    return keys
+
+
+def trade_keys(trades: list[dict[str, Any]]) -> list[str]:
+    """
+    Ключи сделок одного ответа для дедупликации: trade_id/id, а без id —
+    (время, инструмент, сторона, цена, объем, ордер) и номер повтора в ответе
+    """
+    return _record_keys(
+        trades,
+        lambda trade: trade.get("trade_id") or trade.get("id"),
+        lambda trade: (
+            parse_time(trade["timestamp"]),
+            trade.get("symbol", ""),
+            trade.get("side", ""),
+            money(trade.get("price")),
+            money(trade.get("size")),
+            trade.get("order_id", ""),
+        ),
+    )
+
+
+def transaction_keys(transactions: list[dict[str, Any]]) -> list[str]:
+    """Ключи транзакций одного ответа: id, а без id — (время, инструмент, категория, сумма, название) и номер повтора"""
+    return _record_keys(
+        transactions,
+        lambda transaction: transaction.get("id"),
+        lambda transaction: (
+            parse_time(transaction["timestamp"]),
+            transaction.get("symbol", ""),
+            transaction.get("category") or transaction.get("transaction_category") or "",
+            money(transaction.get("change")),
+            transaction.get("transaction_name", ""),
+        ),
+    )
+
+
+def parse_trades(response: dict[str, Any], seen: set[str]) -> dict[str, np.ndarray]:
+    """Сделки из ответа /trades колонками (количество со знаком: продажа < 0); seen — уже учтенные ключи"""
+    rows = []
+    trades = response.get("trades") or []
+    for trade, key in zip(trades, trade_keys(trades), strict=True):
+        if key in seen:
+            continue
+        seen.add(key)
+        sign = -1.0 if "SELL" in str(trade.get("side", "")).upper() else 1.0
+        rows.append((
+            parse_time(trade["timestamp"]),
+            trade.get("symbol", ""),
+            sign * money(trade.get("size")),
+            money(trade.get("price")),
+        ))
+    if not rows:
+        return _empty_trades()
+    timestamp, symbol, quantity, price = zip(*rows, strict=True)
+    return {
+        "timestamp": np.array(timestamp, dtype=np.int64),
+        "symbol": np.array(symbol, dtype=object),
+        "quantity": np.array(quantity, dtype=np.float64),
+        "price": np.array(price, dtype=np.float64),
+    }
+
+
+def parse_transactions(response: dict[str, Any], seen: set[str]) -> dict[str, np.ndarray]:
+    """
+    Денежные движения из ответа /transactions (кроме расчетов по сделкам,
+    которые учитываются по самим сделкам): комиссии, налоги, доходы, ввод/вывод
+    """
+    rows = []
+    transactions = response.get("transactions") or []
+    for transaction, key in zip(transactions, transaction_keys(transactions), strict=True):
+        if key in seen:
+            continue
+        seen.add(key)
+        if transaction.get("trade"):
+            continue
+        category = str(transaction.get("category") or transaction.get("transaction_category") or "").upper()
+        rows.append((
+            parse_time(transaction["timestamp"]),
+            money(transaction.get("change")),
+            any(marker in category for marker in EXTERNAL_CATEGORIES),
+        ))
+    if not rows:
+        return _empty_flows()
+    timestamp, amount, external = zip(*rows, strict=True)
+    return {
+        "timestamp": np.array(timestamp, dtype=np.int64),
+        "amount": np.array(amount, dtype=np.float64),
+        "external": np.array(external, dtype=bool),
+    }
+
+
+def _append(columns: dict[str, np.ndarray], new: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    if not len(new["timestamp"]):
+        return columns
+    merged = {key: np.concatenate((columns[key], new[key])) for key in columns}
+    order = np.argsort(merged["timestamp"], kind="stable")
+    return {key: values[order] for key, values in merged.items()}
+
+
+def _value_at(timestamp: np.ndarray, values: np.ndarray, grid: np.ndarray, default: float = 0.0) -> np.ndarray:
+    """Последнее значение values с timestamp <= t для каждой точки сетки"""
+    index = np.searchsorted(timestamp, grid, side="right") - 1
+    return np.where(index >= 0, values[np.maximum(index, 0)] if len(values) else default, default)
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """Максимальная просадка (доля от пика, <= 0)"""
+    equity = equity[np.isfinite(equity)]
+    if not len(equity):
+        return 0.0
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = np.where(peak > 0, equity / peak - 1.0, 0.0)
+    return float(drawdown.min())
+
+
+class PortfolioEngine:
+    """
+    Портфель счета: позиции, кривая капитала и метрики
+
+    Args:
+        client: Клиент Finam API
+        account_id: Идентификатор счета
+        prices: Источник дневных свечей для оценки позиций (None — цены сделок)
+        sectors: Функция symbol -> сектор для весов по секторам
+        history_days: Глубина истории при первой загрузке
+    """
+
+    def __init__(
+        self,
+        client: "FinamAPIClient",
+        account_id: str,
+        prices: PricesProvider | None = None,
+        sectors: Callable[[str], str] | None = None,
+        history_days: int = 365,
+    ) -> None:
+        self.client = client
+        self.account_id = account_id
+        self.prices = prices
+        self.sectors = sectors
+        self.history_days = history_days
+        self.trades = _empty_trades()
+        self.flows = _empty_flows()
+        self.account: dict[str, Any] = {}
+        self._seen_trades: set[str] = set()
+        self._seen_transactions: set[str] = set()
+        self._cursor: int | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self, now: int | None = None) -> "PortfolioEngine":
+        """
+        Догрузить сделки и транзакции после последнего обновления и состояние счета
+
+        Интервал запрашивается с момента последней учтенной записи включительно:
+        записи с той же секундой отбрасываются по id, а записи без id — по
+        составному ключу (trade_keys, transaction_keys).
+
+        Raises:
+            RuntimeError: Если API вернул ошибку
+        """
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            start = self._cursor if self._cursor is not None else now - self.history_days * 86400
+            interval = (format_time(start), format_time(now))
+            trades = self._checked(self.client.get_trades(self.account_id, *interval))
+            transactions = self._checked(self.client.get_transactions(self.account_id, *interval))
+            account = self._checked(self.client.get_account(self.account_id))
+
+            self.trades = _append(self.trades, parse_trades(trades, self._seen_trades))
+            self.flows = _append(self.flows, parse_transactions(transactions, self._seen_transactions))
+            self.account = account
+            latest = [start]
+            latest += [int(self.trades["timestamp"][-1])] if len(self.trades["timestamp"]) else []
+            latest += [int(self.flows["timestamp"][-1])] if len(self.flows["timestamp"]) else []
+            self._cursor = max(latest)
+        return self
+
+    @staticmethod
+    def _checked(response: dict[str, Any]) -> dict[str, Any]:
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    # Текущее состояние
+
+    def current_cash(self) -> float:
+        """Деньги на счете (сумма по валютам в номинале)"""
+        return sum(money(item) for item in self.account.get("cash") or [])
+
+    def _account_positions(self) -> dict[str, dict[str, Any]]:
+        return {position["symbol"]: position for position in self.account.get("positions") or []}
+
+    def _trade_symbols(self) -> list[str]:
+        return sorted(set(self.trades["symbol"].tolist()))
+
+    def _current_quantity(self) -> dict[str, float]:
+        positions = self._account_positions()
+        if self.account:
+            return {symbol: money(position.get("quantity")) for symbol, position in positions.items()}
+        # Без состояния счета — позиции только из истории сделок
+        return {
+            symbol: float(self.trades["quantity"][self.trades["symbol"] == symbol].sum())
+            for symbol in self._trade_symbols()
+        }
+
+    def positions(self) -> list[PortfolioPosition]:
+        """Текущие позиции с весами от стоимости портфеля"""
+        account_positions = self._account_positions()
+        result = []
+        for symbol, quantity in self._current_quantity().items():
+            if quantity == 0:
+                continue
+            position = account_positions.get(symbol, {})
+            price = money(position.get("current_price")) or self._last_trade_price(symbol)
+            result.append(
+                PortfolioPosition(
+                    symbol=symbol,
+                    quantity=quantity,
+                    price=price,
+                    value=quantity * price,
+                    sector=self.sectors(symbol) if self.sectors else DEFAULT_SECTOR,
+                    average_price=money(position.get("average_price")),
+                    unrealized_pnl=money(position.get("unrealized_pnl")),
+                )
+            )
+        total = sum(abs(position.value) for position in result)
+        for position in result:
+            position.weight = abs(position.value) / total if total else 0.0
+        return result
+
+    def sector_weights(self) -> dict[str, float]:
+        """Доли секторов в стоимости позиций"""
+        weights: dict[str, float] = {}
+        for position in self.positions():
+            weights[position.sector] = weights.get(position.sector, 0.0) + position.weight
+        return dict(sorted(weights.items(), key=lambda item: -item[1]))
+
+    def _last_trade_price(self, symbol: str) -> float:
+        prices = self.trades["price"][self.trades["symbol"] == symbol]
+        return float(prices[-1]) if len(prices) else 0.0
+
+    # История
+
+    def equity_curve(self, timeframe: str = "TIME_FRAME_D", end: int | None = None) -> EquityCurve:
+        """
+        Стоимость портфеля (деньги + позиции по цене закрытия) на конец каждого периода
+
+        Позиции и деньги на начало истории восстанавливаются от текущего
+        состояния счета, поэтому последняя точка совпадает с фактическим счетом.
+        """
+        step = TIMEFRAME_SECONDS[timeframe]
+        end = int(time.time()) if end is None else end
+        events = np.concatenate((self.trades["timestamp"], self.flows["timestamp"]))
+        start = int(events.min()) if len(events) else end
+        grid = np.arange(start - start % step + step - 1, end, step, dtype=np.int64)
+        grid = np.append(grid, end) if not len(grid) or grid[-1] != end else grid
+
+        trade_ts, trade_symbol = self.trades["timestamp"], self.trades["symbol"]
+        trade_cash = -self.trades["quantity"] * self.trades["price"]
+        # Все денежные движения: расчеты по сделкам и транзакции, по времени
+        cash_ts = np.concatenate((trade_ts, self.flows["timestamp"]))
+        cash_amount = np.concatenate((trade_cash, self.flows["amount"]))
+        order = np.argsort(cash_ts, kind="stable")
+        cash_ts, cash_total = cash_ts[order], np.cumsum(cash_amount[order])
+        opening_cash = self.current_cash() - (cash_total[-1] if self.account and len(cash_total) else 0.0)
+        cash = opening_cash + _value_at(cash_ts, cash_total, grid)
+
+        holdings = np.zeros(len(grid))
+        current_quantity = self._current_quantity()
+        for symbol in sorted(set(current_quantity) | set(self._trade_symbols())):
+            mask = trade_symbol == symbol
+            held = np.cumsum(self.trades["quantity"][mask])
+            opening = current_quantity.get(symbol, 0.0) - (held[-1] if len(held) else 0.0)
+            quantity = opening + _value_at(trade_ts[mask], held, grid)
+            if not quantity.any():
+                continue
+            holdings += quantity * self._price_series(symbol, trade_ts[mask], self.trades["price"][mask], grid)
+
+        flow_ts = self.flows["timestamp"][self.flows["external"]]
+        flow_total = np.cumsum(self.flows["amount"][self.flows["external"]])
+        external = _value_at(flow_ts, flow_total, grid)
+        flows = np.diff(external, prepend=0.0)
+        return EquityCurve(grid, cash + holdings, cash, flows)
+
+    def _price_series(self, symbol: str, trade_ts: np.ndarray, trade_price: np.ndarray, grid: np.ndarray) -> np.ndarray:
+        """Цена закрытия на каждую точку сетки; до первой свечи — цена сделки или текущая цена"""
+        current = money(self._account_positions().get(symbol, {}).get("current_price"))
+        fallback = _value_at(trade_ts, trade_price, grid, default=np.nan)
+        first_trade = trade_price[0] if len(trade_price) else current
+        fallback = np.where(np.isnan(fallback), first_trade, fallback)
+        if self.prices is None:
+            return fallback
+        candles = self.prices(symbol, int(grid[0]) - 7 * 86400, int(grid[-1]))
+        if not len(candles):
+            return fallback
+        # Точки сетки — конец периода, поэтому берется close последней начавшейся свечи
+        closes = _value_at(candles.timestamp, candles.close, grid, default=np.nan)
+        return np.where(np.isnan(closes), fallback, closes)
+
+    def metrics(self, timeframe: str = "TIME_FRAME_D", end: int | None = None) -> dict[str, Any]:
+        """Доходность, просадка, волатильность и структура портфеля"""
+        curve = self.equity_curve(timeframe, end)
+        returns = curve.returns()
+        returns = returns[np.isfinite(returns)]
+        growth = np.cumprod(1.0 + returns) if len(returns) else np.ones(1)
+        periods = PERIODS_PER_YEAR.get(timeframe, 252)
+        days = max((int(curve.timestamp[-1]) - int(curve.timestamp[0])) / 86400, 1.0)
+        total_return = float(growth[-1] - 1.0)
+        return {
+            "equity": float(curve.equity[-1]),
+            "cash": float(curve.cash[-1]),
+            "total_return": total_return,
+            "annualized_return": float((1.0 + total_return) ** (365.0 / days) - 1.0) if total_return > -1 else -1.0,
+            "max_drawdown": max_drawdown(np.concatenate(([1.0], growth))),
+            "volatility": float(returns.std(ddof=1) * np.sqrt(periods)) if len(returns) > 1 else 0.0,
+            "net_deposits": float(curve.flows.sum()),
+            "trades": len(self.trades["timestamp"]),
+            "sector_weights": self.sector_weights(),
+            "as_of": datetime.datetime.fromtimestamp(int(curve.timestamp[-1]), datetime.UTC).isoformat(),
+        }
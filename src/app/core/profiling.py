@@ -0,0 +1,230 @@
+"""
+Профилирование в режиме отладки (APP_DEBUG=true)
+
+Вокруг хода диалога или прогона generate_submission запускается
+семплирующий профилировщик CPU: фоновый поток каждые interval секунд
+снимает стек профилируемого потока через sys._current_frames(). Стеки
+пишутся в свернутом формате (folded: "stage;file:func;file:func N"),
+который читают flamegraph.pl, inferno и speedscope. Первые кадры стека —
+открытые спаны трассировки, поэтому на флеймграфе видны этапы хода.
+
+Семплы, попавшие в код самого профилировщика (снимки tracemalloc на
+границах этапов), в стеки не пишутся, а только подсчитываются: иначе
+работа профилировщика приписывалась бы текущему этапу.
+
+Память отслеживается tracemalloc: на границах этапов делаются снимки
+всего процесса, и для каждого этапа сохраняются строки кода с наибольшим
+приростом выделенной памяти. Снимок дорогой, поэтому он делается только
+для этапов до глубины APP_PROFILE_MEMORY_DEPTH (по умолчанию 1 — этапы
+верхнего уровня, 0 — только весь блок); выделения во вложенных этапах
+учитываются в приросте ближайшего этапа со снимком. tracemalloc видит
+весь процесс, поэтому при параллельных ходах в приросте этапа есть и
+чужие выделения.
+
+Результаты сохраняются в APP_PROFILE_DIR (по умолчанию data/interim/profiles):
+    <время>-<name>.folded — стеки CPU для флеймграфа,
+    <время>-<name>.allocations.txt — топ аллокаций по этапам.
+"""
+
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType
+
+from .config import Settings
+from .tracing import Span, get_tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+TOP_ALLOCATIONS = 10
+DEFAULT_MEMORY_DEPTH = 1
+# Строки, не попадающие в топ аллокаций (снимки самого профилировщика). Снимок не фильтруется
+# через Snapshot.filter_traces: это fnmatch по каждой трассе на Python, дороже самого снимка
+_IGNORED = frozenset({tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>"})
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False  # tracemalloc запущен профилировщиком (а не, например, бенчмарком)
+
+
+@lru_cache(maxsize=1)
+def _settings() -> Settings:
+    # maybe_profile вызывается на каждом ходе чата: настройки читаются один раз на процесс
+    return Settings()
+
+
+def _frame_label(code: CodeType) -> str:
+    filename = code.co_filename.replace("\\", "/")
+    return f"{filename.rsplit('/', 1)[-1]}:{code.co_qualname}"
+
+
+class Profile:
+    """
+    Семплы CPU и аллокации по этапам для одного потока
+
+    Args:
+        name: Название профиля (часть имени файлов)
+        interval: Период семплирования стека (сек)
+        top: Сколько строк с наибольшим приростом памяти хранить на этап
+        memory_depth: До какой глубины вложенности этапов делать снимки памяти (0 — только весь блок)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float = DEFAULT_INTERVAL,
+        top: int = TOP_ALLOCATIONS,
+        memory_depth: int = DEFAULT_MEMORY_DEPTH,
+    ) -> None:
+        self.name = name
+        self.interval = interval
+        self.top = top
+        self.memory_depth = memory_depth
+        self.thread_id = threading.get_ident()
+        self.samples: Counter[str] = Counter()
+        self.allocations: dict[str, Counter[str]] = {}
+        self.calls: Counter[str] = Counter()
+        self.profiler_samples = 0  # семплы внутри профилировщика: в стеки не пишутся
+        self.duration = 0.0
+        self._stages: list[str] = []
+        self._snapshots: list[tracemalloc.Snapshot | None] = []
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f"profiler-{name}", daemon=True)
+
+    # Обработчик спанов: этапы профилируемого потока
+
+    def on_start(self, span: Span) -> None:
+        if threading.get_ident() != self.thread_id:
+            return
+        self._stages.append(span.name)
+        # Первый этап — корневой (весь блок), поэтому глубина этапа на единицу меньше длины стека
+        self._snapshots.append(tracemalloc.take_snapshot() if len(self._stages) <= self.memory_depth + 1 else None)
+
+    def on_end(self, _span: Span) -> None:
+        if threading.get_ident() != self.thread_id or not self._stages:
+            return
+        before = self._snapshots.pop()
+        stage = ";".join(self._stages)
+        self._stages.pop()
+        self.calls[stage] += 1
+        if before is None:
+            return
+        stats = self.allocations.setdefault(stage, Counter())
+        diffs = tracemalloc.take_snapshot().compare_to(before, "lineno")
+        top = [stat for stat in diffs if stat.traceback[0].filename not in _IGNORED][: self.top]
+        for stat in top:
+            if stat.size_diff > 0:
+                frame = stat.traceback[0]
+                stats[f"{frame.filename}:{frame.lineno}"] += stat.size_diff
+
+    # Семплирование CPU
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                if frame.f_code.co_filename == __file__:
+                    self.profiler_samples += 1
+                    stack = []
+                    break
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join([*self._stages, *reversed(stack)])] += 1
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+
+    # Результаты
+
+    def folded(self) -> str:
+        """Стеки в свернутом формате для флеймграфа"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def allocation_report(self) -> str:
+        """Топ строк по приросту памяти для каждого этапа"""
+        lines = [
+            f"{self.name}: {self.duration * 1000:.1f} ms, {sum(self.samples.values())} CPU samples"
+            f" (+{self.profiler_samples} in profiler, skipped)"
+        ]
+        for stage, stats in self.allocations.items():
+            lines.append(f"\n== {stage} (x{self.calls[stage]}) ==")
+            for location, size in stats.most_common(self.top):
+                lines.append(f"  {size / 1024:>10.1f} KiB  {location}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, directory: Path | str) -> tuple[Path, Path]:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.thread_id}-{self.name}"
+        folded = directory / f"{stem}.folded"
+        allocations = directory / f"{stem}.allocations.txt"
+        folded.write_text(self.folded(), encoding="utf-8")
+        allocations.write_text(self.allocation_report(), encoding="utf-8")
+        return folded, allocations
+
+
+@contextmanager
+def profile(
+    name: str,
+    output_dir: Path | str | None = None,
+    interval: float = DEFAULT_INTERVAL,
+    memory_depth: int | None = None,
+) -> Iterator[Profile]:
+    """
+    Профилировать блок в текущем потоке и сохранить результаты
+
+    Args:
+        name: Название профиля (chat_turn, generate_submission, ...)
+        output_dir: Каталог для результатов (по умолчанию APP_PROFILE_DIR)
+        interval: Период семплирования стека (сек)
+        memory_depth: Глубина этапов со снимками памяти (по умолчанию APP_PROFILE_MEMORY_DEPTH)
+    """
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+    settings = _settings()
+    depth = settings.profile_memory_depth if memory_depth is None else memory_depth
+    result = Profile(name, interval, memory_depth=depth)
+    tracer = get_tracer()
+    tracer.add_processor(result)
+    # Корневой этап: прирост памяти за весь блок
+    root = Span(name, trace_id="", span_id="")
+    result.on_start(root)
+    result.start()
+    started = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.duration = time.perf_counter() - started
+        result.stop()
+        result.on_end(root)
+        tracer.remove_processor(result)
+        with _tracemalloc_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0 and _tracemalloc_owned:
+                tracemalloc.stop()
+                _tracemalloc_owned = False
+        folded, allocations = result.save(output_dir or settings.profile_dir)
+        logger.info("Profile %s: %.1f ms, saved to %s and %s", name, result.duration * 1000, folded, allocations)
+
+
+def maybe_profile(name: str) -> AbstractContextManager[Profile | None]:
+    """profile(name), если включен режим отладки (APP_DEBUG), иначе пустой контекст"""
+    return profile(name) if _settings().debug else nullcontext()
@@ -0,0 +1,145 @@
+"""
+Агрегация свечей в старшие таймфреймы
+
+Свечи базового таймфрейма группируются по границам целевого периода
+(с учетом часового пояса биржи), OHLCV считается через ufunc.reduceat
+за один проход. Если задано расписание торгов, свечи вне торговых сессий
+не участвуют в агрегации.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from .candles import COLUMNS, TIMEFRAME_SECONDS, Candles, parse_time
+
+DAY = 24 * 60 * 60
+WEEK = 7 * DAY
+MONDAY_OFFSET = 4 * DAY  # 1970-01-01 — четверг, первый понедельник 1970-01-05
+MOSCOW_OFFSET = 3 * 60 * 60  # Московская биржа, UTC+3
+
+INTRADAY = ("TIME_FRAME_M1", "TIME_FRAME_M5", "TIME_FRAME_M15", "TIME_FRAME_M30", "TIME_FRAME_H1", "TIME_FRAME_H4")
+CALENDAR = ("TIME_FRAME_D", "TIME_FRAME_W", "TIME_FRAME_MN")
+RESAMPLE_TARGETS = (*INTRADAY[1:], *CALENDAR)
+
+_NON_TRADING = ("CLOSED", "MAINTENANCE", "BREAK")
+
+
+@dataclass(frozen=True)
+class TradingSchedule:
+    """Торговые окна внутри суток (секунды от локальной полуночи), отсортированные"""
+
+    windows: tuple[tuple[int, int], ...]
+    tz_offset: int = MOSCOW_OFFSET
+
+    @classmethod
+    def from_response(cls, response: dict[str, Any], tz_offset: int = MOSCOW_OFFSET) -> "TradingSchedule | None":
+        """
+        Разобрать ответ GET /v1/assets/{symbol}/schedule
+
+        Finam возвращает сессии на ближайшие дни; из них берутся окна внутри
+        суток, которые применяются ко всей истории.
+        """
+        windows = set()
+        for session in response.get("sessions") or []:
+            if any(marker in session.get("type", "") for marker in _NON_TRADING):
+                continue
+            interval = session.get("interval") or {}
+            if not interval.get("start_time") or not interval.get("end_time"):
+                continue
+            start = (parse_time(interval["start_time"]) + tz_offset) % DAY
+            length = parse_time(interval["end_time"]) - parse_time(interval["start_time"])
+            if length <= 0:
+                continue
+            if length >= DAY:
+                windows.add((0, DAY))
+            elif start + length <= DAY:
+                windows.add((start, start + length))
+            else:
+                # Сессия через полночь
+                windows.update({(start, DAY), (0, start + length - DAY)})
+        if not windows:
+            return None
+        return cls(tuple(sorted(windows)), tz_offset)
+
+    def contains(self, timestamp: np.ndarray) -> np.ndarray:
+        """Маска свечей, начало которых попадает в торговое окно"""
+        seconds = (timestamp + self.tz_offset) % DAY
+        mask = np.zeros(len(timestamp), dtype=bool)
+        for start, end in self.windows:
+            mask |= (seconds >= start) & (seconds < end)
+        return mask
+
+
+def can_resample(base: str, target: str) -> bool:
+    """Можно ли точно построить target из свечей base"""
+    if base == target or target not in RESAMPLE_TARGETS:
+        return False
+    if base in INTRADAY and target in INTRADAY:
+        base_step, target_step = TIMEFRAME_SECONDS[base], TIMEFRAME_SECONDS[target]
+        return base_step < target_step and target_step % base_step == 0
+    if target in CALENDAR:
+        # Часовые и более мелкие свечи не пересекают границу суток; неделя не делит месяц
+        return base in INTRADAY[:-1] or (base == "TIME_FRAME_D" and target != "TIME_FRAME_D")
+    return False
+
+
+def bucket_start(timestamp: np.ndarray, timeframe: str, tz_offset: int = MOSCOW_OFFSET) -> np.ndarray:
+    """Начало периода target для каждого времени (секунды UTC)"""
+    local = np.asarray(timestamp, dtype=np.int64) + tz_offset
+    if timeframe == "TIME_FRAME_MN":
+        months = local.astype("datetime64[s]").astype("datetime64[M]")
+        start = months.astype("datetime64[s]").astype(np.int64)
+    elif timeframe == "TIME_FRAME_W":
+        start = (local - MONDAY_OFFSET) // WEEK * WEEK + MONDAY_OFFSET
+    else:
+        step = TIMEFRAME_SECONDS[timeframe]
+        start = local // step * step
+    return start - tz_offset
+
+
+def bucket_end(timestamp: int, timeframe: str, tz_offset: int = MOSCOW_OFFSET) -> int:
+    """Последняя секунда периода, в который попадает timestamp"""
+    start = int(bucket_start(np.array([timestamp]), timeframe, tz_offset)[0])
+    if timeframe == "TIME_FRAME_MN":
+        local = datetime.datetime.fromtimestamp(start + tz_offset, datetime.UTC)
+        next_month = (local.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        return int(next_month.timestamp()) - tz_offset - 1
+    step = WEEK if timeframe == "TIME_FRAME_W" else TIMEFRAME_SECONDS[timeframe]
+    return start + step - 1
+
+
+def resample_candles(
+    candles: Candles, timeframe: str, schedule: TradingSchedule | None = None, tz_offset: int = MOSCOW_OFFSET
+) -> Candles:
+    """
+    Агрегировать свечи в таймфрейм timeframe
+
+    Args:
+        candles: Свечи базового таймфрейма, отсортированные по времени
+        timeframe: Целевой таймфрейм (TIME_FRAME_M5 ... TIME_FRAME_MN)
+        schedule: Расписание торгов; свечи вне сессий отбрасываются
+        tz_offset: Смещение часового пояса биржи для границ D/W/MN, сек
+    """
+    if schedule is not None and candles.timeframe in INTRADAY:
+        mask = schedule.contains(candles.timestamp)
+        if not mask.all():
+            candles = Candles(candles.symbol, candles.timeframe, *(getattr(candles, col)[mask] for col in COLUMNS))
+    if not len(candles):
+        return Candles.empty(candles.symbol, timeframe)
+
+    buckets = bucket_start(candles.timestamp, timeframe, tz_offset)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+    return Candles(
+        candles.symbol,
+        timeframe,
+        buckets[starts],
+        candles.open[starts],
+        np.maximum.reduceat(candles.high, starts),
+        np.minimum.reduceat(candles.low, starts),
+        candles.close[ends],
+        np.add.reduceat(candles.volume, starts),
+    )
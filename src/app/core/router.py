@@ -0,0 +1,52 @@
+"""
+Подстановка параметров в API запросы, сформированные LLM
+"""
+
+import re
+import time
+from collections.abc import Callable
+
+from .metrics import SYMBOL_RESOLUTION_SECONDS
+from .tracing import get_tracer
+
+SYMBOL_PLACEHOLDER = re.compile(r"\{symbol:([^}]*)\}")
+ACCOUNT_PLACEHOLDER = "{account_id}"
+_TICKER = re.compile(r"(?<=/)[A-Za-z0-9._-]+@[A-Za-z0-9]+(?=/|$)")
+_ACCOUNT_ID = re.compile(r"(?<=/v1/accounts/)[^/{]+")
+_ORDER_ID = re.compile(r"(?<=/orders/)[^/{]+")
+
+
+def route_template(path: str) -> str:
+    """Шаблон маршрута без параметров: /v1/instruments/{symbol}/quotes/latest (для трассировки и метрик)"""
+    route = SYMBOL_PLACEHOLDER.sub("{symbol}", path.split("?", 1)[0])
+    route = _TICKER.sub("{symbol}", route)
+    route = _ACCOUNT_ID.sub(ACCOUNT_PLACEHOLDER, route)
+    return _ORDER_ID.sub("{order_id}", route)
+
+
+class RequestRouter:
+    """
+    Преобразует path из ответа LLM в готовый запрос к Finam TradeAPI
+
+    Заменяет {account_id} на ID счета и {symbol:Название} на тикер,
+    найденный через переданный резолвер.
+    """
+
+    def __init__(self, resolve_symbol: Callable[[str], str]) -> None:
+        self.resolve_symbol = resolve_symbol
+
+    def resolve(self, path: str, account_id: str | None = None) -> str:
+        """Подставить account_id и тикеры в path"""
+        if account_id and ACCOUNT_PLACEHOLDER in path:
+            path = path.replace(ACCOUNT_PLACEHOLDER, account_id)
+        if "{symbol:" in path:
+            path = SYMBOL_PLACEHOLDER.sub(self._resolve_symbol, path)
+        return path
+
+    def _resolve_symbol(self, match: re.Match[str]) -> str:
+        with get_tracer().span("symbol.resolve", {"symbol.query": match.group(1)}) as span:
+            started = time.perf_counter()
+            symbol = self.resolve_symbol(match.group(1))
+            SYMBOL_RESOLUTION_SECONDS.observe(time.perf_counter() - started)
+            span.set_attribute("symbol.result", symbol)
+        return symbol
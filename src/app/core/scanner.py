@@ -0,0 +1,207 @@
+"""
+Сканер рынка по множеству инструментов
+
+Котировка и последние свечи каждого инструмента загружаются параллельно
+(частоту запросов ограничивает RateLimiter клиента), метрики считаются
+векторно по матрице (инструмент × свеча) для всех загруженных инструментов
+сразу. Результаты отдаются по мере поступления: после каждой пачки
+завершенных загрузок — обновленная таблица лидеров.
+"""
+
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .candles import TIMEFRAME_SECONDS, Candles
+
+if TYPE_CHECKING:
+    from ..adapters import MarketDataFeed
+
+BarsProvider = Callable[[str, str, int, int], Candles]
+"""(symbol, timeframe, start, end) -> свечи"""
+
+METRICS = ("last", "change", "volume_spike", "volatility", "rsi")
+PERIODS_PER_YEAR = {"TIME_FRAME_D": 252, "TIME_FRAME_W": 52, "TIME_FRAME_H1": 252 * 9}
+
+
+def universe(
+    assets: dict[str, Any], exchange: str | None = None, asset_type: str | None = None, limit: int | None = None
+) -> list[str]:
+    """Тикеры из ответа /v1/assets, отфильтрованные по бирже (mic) и типу актива"""
+    symbols = [
+        asset["symbol"]
+        for asset in assets.get("assets") or []
+        if exchange in (None, asset.get("mic")) and asset_type in (None, asset.get("type"))
+    ]
+    return symbols[:limit] if limit else symbols
+
+
+def _quote_last(response: dict[str, Any]) -> float:
+    last = (response.get("quote") or {}).get("last")
+    if isinstance(last, dict):
+        last = last.get("value")
+    return float(last) if last else np.nan
+
+
+def _rsi_matrix(close: np.ndarray, period: int) -> np.ndarray:
+    """RSI по Уайлдеру для каждой строки матрицы (NaN слева — отсутствующая история)"""
+    delta = np.diff(close, axis=1)
+    gain, loss = np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+    rows = close.shape[0]
+    avg_gain, avg_loss, count = np.zeros(rows), np.zeros(rows), np.zeros(rows)
+    # Цикл по времени (десятки свечей), операции — сразу по всем инструментам
+    for t in range(delta.shape[1]):
+        valid = ~np.isnan(delta[:, t])
+        count += valid
+        warm = valid & (count <= period)
+        smooth = valid & (count > period)
+        avg_gain[warm] += gain[warm, t] / period
+        avg_loss[warm] += loss[warm, t] / period
+        avg_gain[smooth] += (gain[smooth, t] - avg_gain[smooth]) / period
+        avg_loss[smooth] += (loss[smooth, t] - avg_loss[smooth]) / period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    return np.where(count >= period, rsi, np.nan)
+
+
+def scan_metrics(
+    close: np.ndarray, volume: np.ndarray, last: np.ndarray, periods_per_year: int = 252, rsi_period: int = 14
+) -> dict[str, np.ndarray]:
+    """
+    Метрики по матрицам закрытий и объемов (строки — инструменты, выравнены по правому краю, NaN слева)
+
+    Returns:
+        last — последняя цена (котировка или закрытие), change — изменение к
+        предыдущему закрытию, volume_spike — объем последней свечи к среднему,
+        volatility — годовая волатильность лог-доходностей, rsi
+    """
+    last = np.where(np.isnan(last), close[:, -1], last)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        previous = close[:, -2] if close.shape[1] > 1 else np.full(len(close), np.nan)
+        change = last / previous - 1.0
+        average_volume = np.nanmean(volume[:, :-1], axis=1) if volume.shape[1] > 1 else np.full(len(volume), np.nan)
+        volume_spike = volume[:, -1] / average_volume
+        log_returns = np.diff(np.log(close), axis=1)
+        volatility = np.nanstd(log_returns, axis=1, ddof=1) * np.sqrt(periods_per_year)
+    return {
+        "last": last,
+        "change": change,
+        "volume_spike": volume_spike,
+        "volatility": volatility,
+        "rsi": _rsi_matrix(close, rsi_period),
+    }
+
+
+@dataclass
+class ScanResult:
+    """Частичный или итоговый результат сканирования"""
+
+    rows: list[dict[str, Any]]
+    done: int
+    total: int
+    errors: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def complete(self) -> bool:
+        return self.done >= self.total
+
+    def top(self, n: int = 20, sort_by: str = "change", descending: bool = True) -> list[dict[str, Any]]:
+        """Первые n строк по метрике (NaN — в конце)"""
+        key = -1.0 if descending else 1.0
+        rows = sorted(self.rows, key=lambda row: (np.isnan(row[sort_by]), key * np.nan_to_num(row[sort_by], nan=0.0)))
+        return rows[:n]
+
+
+class MarketScanner:
+    """
+    Сканер: котировки и свечи по списку инструментов параллельно
+
+    Args:
+        feed: Источник котировок (PollingFeed или LocalFeed)
+        bars: Источник свечей (например, CandleStore.get через BarFetcher)
+        timeframe: Таймфрейм свечей для метрик
+        lookback: Сколько свечей брать для метрик
+        max_workers: Параллельных загрузок
+    """
+
+    def __init__(
+        self,
+        feed: "MarketDataFeed",
+        bars: BarsProvider,
+        timeframe: str = "TIME_FRAME_D",
+        lookback: int = 30,
+        max_workers: int = 8,
+    ) -> None:
+        self.feed = feed
+        self.bars = bars
+        self.timeframe = timeframe
+        self.lookback = lookback
+        self.max_workers = max_workers
+
+    def _load(self, symbol: str, start: int, end: int) -> tuple[float, Candles]:
+        quote = self.feed.fetch_quote(symbol)
+        candles = self.bars(symbol, self.timeframe, start, end)
+        if not len(candles) and "error" in quote:
+            raise RuntimeError(quote["error"])
+        return _quote_last(quote) if "error" not in quote else np.nan, candles
+
+    def _table(self, loaded: dict[str, tuple[float, Candles]]) -> list[dict[str, Any]]:
+        symbols = list(loaded)
+        if not symbols:
+            return []
+        # Матрица свечей, выровненная по последней свече каждого инструмента
+        close = np.full((len(symbols), self.lookback), np.nan)
+        volume = np.full((len(symbols), self.lookback), np.nan)
+        for i, symbol in enumerate(symbols):
+            candles = loaded[symbol][1]
+            n = min(len(candles), self.lookback)
+            if n:
+                close[i, -n:] = candles.close[-n:]
+                volume[i, -n:] = candles.volume[-n:]
+        last = np.array([loaded[symbol][0] for symbol in symbols], dtype=np.float64)
+        metrics = scan_metrics(close, volume, last, PERIODS_PER_YEAR.get(self.timeframe, 252))
+        columns = {name: metrics[name].tolist() for name in METRICS}
+        return [{"symbol": symbol, **{name: columns[name][i] for name in METRICS}} for i, symbol in enumerate(symbols)]
+
+    def iter_scan(self, symbols: list[str], batch: int = 10, now: int | None = None) -> Iterator[ScanResult]:
+        """
+        Сканировать инструменты, отдавая таблицу после каждых batch загрузок
+
+        Последний результат — полный (complete == True). Ошибки загрузки
+        отдельных инструментов не прерывают сканирование.
+        """
+        end = int(time.time()) if now is None else now
+        # Запас на выходные и праздники для дневных и более мелких свечей
+        start = end - int(TIMEFRAME_SECONDS[self.timeframe] * self.lookback * 1.6) - 7 * 86400
+        loaded: dict[str, tuple[float, Candles]] = {}
+        errors: dict[str, str] = {}
+        if not symbols:
+            yield ScanResult([], 0, 0)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as executor:
+            futures = {executor.submit(self._load, symbol, start, end): symbol for symbol in symbols}
+            pending = 0
+            try:
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        loaded[symbol] = future.result()
+                    except Exception as e:
+                        errors[symbol] = str(e)
+                    pending += 1
+                    done = len(loaded) + len(errors)
+                    if pending >= batch or done == len(symbols):
+                        pending = 0
+                        yield ScanResult(self._table(loaded), done, len(symbols), dict(errors))
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def scan(self, symbols: list[str], now: int | None = None) -> ScanResult:
+        """Полный результат сканирования"""
+        *_, result = self.iter_scan(symbols, batch=len(symbols) or 1, now=now)
+        return result
@@ -0,0 +1,260 @@
+"""
+Трассировка этапов хода диалога
+
+Спаны в модели OpenTelemetry (trace_id, span_id, родитель, время начала и
+конца в наносекундах, атрибуты, статус). Текущий спан хранится в
+contextvars, поэтому вложенные вызовы в том же потоке становятся дочерними
+автоматически, а в другом потоке родителя можно передать явно.
+
+Спаны одного локального корня (спан, открытый без текущего родителя)
+экспортируются пачкой при его завершении:
+    JsonFileExporter — строка OTLP/JSON на пачку (читается otlpjsonfile
+        receiver коллектора OpenTelemetry и Jaeger),
+    ConsoleExporter — водопад этапов в консоль.
+
+Экспорт в файл включается переменной APP_TRACE_FILE.
+"""
+
+import contextvars
+import json
+import secrets
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Protocol
+
+from .config import Settings
+
+SERVICE_NAME = "finam-trade-assistant"
+
+
+@dataclass
+class Span:
+    """Отрезок работы с атрибутами"""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "UNSET"
+    status_message: str = ""
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:  # noqa: ANN401
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Спан в формате OTLP/JSON"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": {"UNSET": 0, "OK": 1, "ERROR": 2}[self.status], "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:  # noqa: ANN401
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Exporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+
+class SpanProcessor(Protocol):
+    """Обработчик начала и конца каждого спана в потоке, где он открыт (например, профилировщик)"""
+
+    def on_start(self, span: Span) -> None: ...
+
+    def on_end(self, span: Span) -> None: ...
+
+
+class JsonFileExporter:
+    """Дописывает пачки спанов в файл: одна строка OTLP/JSON (ExportTraceServiceRequest) на пачку"""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in spans]}],
+                }
+            ]
+        }
+        line = json.dumps(request, ensure_ascii=False)
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class ConsoleExporter:
+    """Печатает водопад этапов каждой пачки"""
+
+    def __init__(self, echo: Callable[[str], None] = print, width: int = 40) -> None:
+        self.echo = echo
+        self.width = width
+
+    def export(self, spans: list[Span]) -> None:
+        self.echo(format_waterfall(spans, self.width))
+
+
+def format_waterfall(spans: list[Span], width: int = 40) -> str:
+    """
+    Водопад: этапы в порядке вложенности и начала, полоса — положение на шкале времени
+
+        chat.turn                 0.0  ████████████████████  812.4 ms
+          llm.chat                0.3  ████████              402.1 ms  gen_ai.usage.output_tokens=12
+    """
+    if not spans:
+        return ""
+    start = min(span.start_ns for span in spans)
+    total = max(max(span.end_ns for span in spans) - start, 1)
+    ids = {span.span_id for span in spans}
+    children: dict[str | None, list[Span]] = {}
+    for span in sorted(spans, key=lambda s: s.start_ns):
+        parent = span.parent_id if span.parent_id in ids else None
+        children.setdefault(parent, []).append(span)
+
+    lines = []
+
+    def walk(parent: str | None, depth: int) -> None:
+        for span in children.get(parent, []):
+            offset = min(round((span.start_ns - start) / total * width), width - 1)
+            length = max(1, round((span.end_ns - span.start_ns) / total * width))
+            bar = " " * offset + "█" * min(length, width - offset)
+            attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+            error = " ❌ " + span.status_message if span.status == "ERROR" else ""
+            label = "  " * depth + span.name
+            lines.append(
+                f"{label:<28} {(span.start_ns - start) / 1e6:>8.1f} {bar:<{width}} {span.duration_ms:>8.1f} ms"
+                f"{error}  {attributes}".rstrip()
+            )
+            walk(span.span_id, depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+class Tracer:
+    """Создает спаны и передает завершенные пачки экспортерам"""
+
+    def __init__(self, exporters: list[Exporter] | None = None) -> None:
+        self.exporters: list[Exporter] = list(exporters or [])
+        self.processors: list[SpanProcessor] = []
+        self._current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("span", default=None)
+        self._batch: contextvars.ContextVar[list[Span] | None] = contextvars.ContextVar("batch", default=None)
+
+    def add_exporter(self, exporter: Exporter) -> None:
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter: Exporter) -> None:
+        if exporter in self.exporters:
+            self.exporters.remove(exporter)
+
+    def add_processor(self, processor: SpanProcessor) -> None:
+        self.processors.append(processor)
+
+    def remove_processor(self, processor: SpanProcessor) -> None:
+        if processor in self.processors:
+            self.processors.remove(processor)
+
+    def current_span(self) -> Span | None:
+        return self._current.get()
+
+    @contextmanager
+    def span(self, name: str, attributes: dict[str, Any] | None = None, parent: Span | None = None) -> Iterator[Span]:
+        """
+        Открыть спан
+
+        Args:
+            name: Название этапа
+            attributes: Начальные атрибуты
+            parent: Явный родитель (например, спан хода из потока воркера);
+                по умолчанию — текущий спан контекста
+        """
+        current = self._current.get()
+        parent = parent or current
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes or {}),
+        )
+        batch = self._batch.get() if current is not None else None
+        local_root = batch is None
+        if local_root:
+            batch = []
+        batch.append(span)
+        processors = list(self.processors)
+        if processors:
+            for processor in processors:
+                processor.on_start(span)
+            # Работа обработчиков не входит в длительность спана
+            span.start_ns = time.time_ns()
+        span_token = self._current.set(span)
+        batch_token = self._batch.set(batch)
+        try:
+            yield span
+        except BaseException as e:
+            span.status, span.status_message = "ERROR", f"{type(e).__name__}: {e}".rstrip(": ")
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            for processor in processors:
+                processor.on_end(span)
+            self._current.reset(span_token)
+            self._batch.reset(batch_token)
+            if local_root:
+                for exporter in list(self.exporters):
+                    exporter.export(batch)
+
+
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Общий на процесс трассировщик; APP_TRACE_FILE — файл для экспорта в OTLP/JSON"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+            if path := Settings().trace_file:
+                _tracer.add_exporter(JsonFileExporter(path))
+        return _tracer
+
+
+def current_span() -> Span | None:
+    """Текущий спан контекста (None вне трассировки)"""
+    return get_tracer().current_span()
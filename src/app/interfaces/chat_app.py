@@ -7,21 +7,178 @@ Streamlit веб-интерфейс для AI ассистента трейде
     streamlit run src/app/chat_app.py
 """
 
-import json
-import datetime
+import uuid
 
 import streamlit as st
 
-from src.app.interfaces.__init__ import *
-from src.app.utils import get_asset_from_text
-from src.app.adapters import FinamAPIClient
-from src.app.core import call_llm, get_settings
-from src.app.core.llm import extract_api_request, create_system_prompt
+from src.app.interfaces.theme import create_status_bar, create_welcome_screen, initialize_app
+from src.app.interfaces.visualization import UniversalVisualizationEngine
+from src.app.interfaces.resources import (
+    execute_request,
+    get_finam_client,
+    get_job_manager,
+    get_market_scanner,
+    get_metrics_server,
+    get_portfolio_engine,
+    get_request_router,
+    get_system_prompt,
+)
+from src.app.core import get_settings
+from src.app.core.agent import AgentTurn, run_agent_turn
+from src.app.core.jobs import ChatJob
+from src.app.core.metrics import ACTIVE_SESSIONS
+from src.app.core.scanner import universe
+from src.app.core.tracing import get_tracer
+
+SCAN_SORT = {"Изменение": "change", "Всплеск объема": "volume_spike", "Волатильность": "volatility", "RSI": "rsi"}
+SCAN_LIMIT = 100
+
+
+def render_api_call(api_call: dict) -> None:
+    """Показать выполненный API запрос и ответ"""
+    api_response = api_call["response"]
+    st.info(f"🔍 Выполняю запрос: `{api_call['method']} {api_call['path']}`")
+
+    # Проверяем на ошибки
+    if "error" in api_response:
+        st.error(f"⚠️ Ошибка API: {api_response.get('error')}")
+        if "details" in api_response:
+            st.error(f"Детали: {api_response['details']}")
+
+    with st.expander("📡 Ответ API", expanded=False):
+        st.json(api_response)
+
+
+def render_message(message: dict) -> None:
+    """Показать сообщение истории"""
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+
+        # Показываем API запросы
+        if "api_request" in message:
+            with st.expander("🔍 API запрос"):
+                st.code(f"{message['api_request']['method']} {message['api_request']['path']}", language="http")
+                st.json(message["api_request"]["response"])
+
+
+def render_portfolio(api_token: str | None, api_base_url: str | None, account_id: str) -> None:
+    """Графики портфеля счета: структура по секторам и динамика стоимости"""
+    engine = get_portfolio_engine(api_token, api_base_url, account_id)
+    try:
+        # Из API догружаются только сделки и транзакции после прошлого обновления
+        engine.refresh()
+    except RuntimeError as e:
+        st.error(f"⚠️ Не удалось загрузить портфель: {e}")
+        return
+
+    charts = UniversalVisualizationEngine()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(charts.create_chart("sunburst", {"portfolio": engine.positions()}))
+    with col2:
+        performance = {"portfolio_data": engine.equity_curve().to_frame()}
+        st.plotly_chart(charts.create_chart("performance", performance))
+
+
+@st.fragment
+def render_market_scanner(api_token: str | None, api_base_url: str | None) -> None:
+    """Сканер акций MOEX: таблица лидеров перерисовывается по мере загрузки инструментов"""
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        sort_by = SCAN_SORT[st.selectbox("Сортировка", list(SCAN_SORT), key="scan_sort")]
+    with col2:
+        run = st.button("🔎 Сканировать", use_container_width=True)
+
+    charts = UniversalVisualizationEngine()
+    placeholder = st.empty()
+    result = st.session_state.get("scan_result")
+    if run:
+        assets = execute_request(api_token, api_base_url, "GET", "/v1/assets")
+        symbols = universe(assets, exchange="MISX", asset_type="EQUITIES", limit=SCAN_LIMIT)
+        if not symbols:
+            st.warning(f"⚠️ Список инструментов недоступен: {assets.get('error', 'нет акций MOEX')}")
+            return
+        # Повторный запуск фрагмента не трогает чат; свечи берутся из локального хранилища
+        for result in get_market_scanner(api_token, api_base_url).iter_scan(symbols, batch=10):
+            chart = charts.create_chart("market_scanner", {"result": result, "sort_by": sort_by})
+            placeholder.plotly_chart(chart, key=f"scan_{result.done}")
+        st.session_state.scan_result = result
+    elif result is not None:
+        chart = charts.create_chart("market_scanner", {"result": result, "sort_by": sort_by})
+        placeholder.plotly_chart(chart)
+    if result is not None and result.errors:
+        st.caption(f"Не загружено инструментов: {len(result.errors)}")
+
+
+def submit_chat_turn(api_token: str | None, api_base_url: str | None, account_id: str | None) -> None:
+    """Поставить ответ на последнее сообщение в очередь фоновых воркеров"""
+    router = get_request_router(api_token, api_base_url)
+
+    # Формируем историю для LLM
+    conversation_history = [{"role": "system", "content": get_system_prompt()}]
+    for msg in st.session_state.messages:
+        conversation_history.append({"role": msg["role"], "content": msg["content"]})
+
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+
+    def run(job: ChatJob) -> AgentTurn:
+        return run_agent_turn(
+            conversation_history,
+            execute=lambda method, path: execute_request(api_token, api_base_url, method, path, session_id, job.id),
+            router=router,
+            account_id=account_id,
+            on_status=job.report,
+            on_api_call=job.add_api_call,
+            cancel_event=job.cancel_event,
+        )
+
+    st.session_state.active_job = get_job_manager().submit(session_id, run)
+
+
+@st.fragment(run_every=0.5)
+def render_active_job() -> None:
+    """Прогресс фонового ответа; перерисовывается отдельно от остального приложения"""
+    job = st.session_state.get("active_job")
+    if job is None:
+        return
+
+    if not job.done and not job.cancelled:
+        with st.chat_message("assistant"):
+            for api_call in job.api_calls:
+                render_api_call(api_call)
+            statuses = job.statuses
+            st.caption(f"⏳ {statuses[-1] if statuses else 'В очереди...'}")
+            if st.button("⏹ Остановить", key=f"cancel_{job.id}"):
+                job.cancel()
+                st.rerun(scope="fragment")
+        return
+
+    # Задание завершено или отменено — переносим результат в историю
+    st.session_state.active_job = None
+    get_job_manager().release(job)
+    if job.cancelled:
+        st.session_state.notice = "⏹ Запрос отменен"
+    else:
+        try:
+            turn = job.result()
+        except Exception as e:
+            st.session_state.notice = f"❌ Ошибка: {e}"
+        else:
+            # Сохраняем сообщение ассистента
+            message_data = {"role": "assistant", "content": turn.content}
+            if turn.api_request:
+                message_data["api_request"] = turn.api_request
+            # Отрисовка ответа попадет в трассу хода при следующем проходе скрипта
+            message_data["trace_span"] = turn.span
+            st.session_state.messages.append(message_data)
+    st.rerun()
 
 
 def main() -> None:  # noqa: C901
     """Главная функция Streamlit приложения"""
     initialize_app()
+    get_metrics_server()
+    ACTIVE_SESSIONS.touch(st.session_state.setdefault("session_id", uuid.uuid4().hex))
     
     st.set_page_config(
         page_title="AI Трейдер (Finam)", 
@@ -82,9 +239,13 @@ def main() -> None:  # noqa: C901
             )
             api_base_url = st.text_input("API URL", value="https://api.finam.ru", help="API URL")
             account_id = st.text_input("ID счета", value="", help="Необязательно для заполнения")
+            show_portfolio = st.toggle("📊 Графики портфеля", disabled=not account_id, help="Нужен ID счета")
+            show_scanner = st.toggle("🔎 Сканер рынка", help="Лидеры среди акций MOEX")
 
-        # Статус подключения
-        finam_client = FinamAPIClient(access_token=api_token or None, base_url=api_base_url if api_base_url else None)
+        # Статус подключения (клиент общий для всех сессий с тем же токеном и URL)
+        api_token = api_token or None
+        api_base_url = api_base_url or None
+        finam_client = get_finam_client(api_token, api_base_url)
         
         if not finam_client.access_token:
             st.markdown("""
@@ -137,9 +298,6 @@ def main() -> None:  # noqa: C901
     if "messages" not in st.session_state:
         st.session_state.messages = []
 
-        
-    # Инициализация Finam API клиента
-    finam_client = FinamAPIClient(access_token=api_token or None, base_url=api_base_url if api_base_url else None)
 
     # Проверка токена
     if not finam_client.access_token:
@@ -149,101 +307,40 @@ def main() -> None:  # noqa: C901
     else:
         st.sidebar.success("✅ Finam API токен установлен")
 
+    if show_portfolio and account_id:
+        with st.expander("📊 Портфель", expanded=True):
+            render_portfolio(api_token, api_base_url, account_id)
+
+    if show_scanner:
+        with st.expander("🔎 Сканер рынка", expanded=True):
+            render_market_scanner(api_token, api_base_url)
+
     # Отображение истории сообщений
     for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-
-            # Показываем API запросы
-            if "api_request" in message:
-                with st.expander("🔍 API запрос"):
-                    st.code(f"{message['api_request']['method']} {message['api_request']['path']}", language="http")
-                    st.json(message["api_request"]["response"])
+        if parent := message.pop("trace_span", None):
+            with get_tracer().span("chat.render", {"chat.content_chars": len(message["content"])}, parent=parent):
+                render_message(message)
+        else:
+            render_message(message)
 
+    if notice := st.session_state.pop("notice", None):
+        if notice.startswith("❌"):
+            st.error(notice)
+        else:
+            st.info(notice)
 
-    # Основное поле ввода
-    if prompt := st.chat_input("Напишите ваш вопрос..."):
-        
-        
+    # Основное поле ввода (пока ассистент отвечает, новый вопрос не принимаем)
+    active_job = st.session_state.get("active_job")
+    if prompt := st.chat_input("Напишите ваш вопрос...", disabled=active_job is not None):
         # Добавляем сообщение пользователя
         st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Формируем историю для LLM
-        conversation_history = [{"role": "system", "content": create_system_prompt()}]
-        for msg in st.session_state.messages:
-            conversation_history.append({"role": msg["role"], "content": msg["content"]})
-
-        # Получаем ответ от ассистента
-        with st.chat_message("assistant"), st.spinner("Думаю..."):
-            try:
-                response = call_llm(conversation_history, temperature=0.3)
-                assistant_message = response["choices"][0]["message"]["content"]
-
-                # Проверяем API запрос
-                method, path = extract_api_request(assistant_message)
-
-                api_data = None
-                MAX_REQUESTS = 4
-                for req_num in range(MAX_REQUESTS):
-                    if method is None and path is None:
-                        break
-                    # Подставляем account_id если есть
-                    if account_id and "{account_id}" in path:  # noqa: RUF027
-                        path = path.replace("{account_id}", account_id)
-
-                    if "{symbol:" in path:
-                        start = path.index("{symbol:") + len("{symbol:")
-                        end = path.index("}")
-                        name = path[start: end]
-                        asset = get_asset_from_text(name, finam_client)
-                        path = path.replace(f"{{symbol:{name}}}", asset)
-
-                    # Показываем что делаем запрос
-                    st.info(f"🔍 Выполняю запрос: `{method} {path}`")
-
-                    # Выполняем API запрос
-                    api_response = finam_client.execute_request(method, path)
-
-                    # Проверяем на ошибки
-                    if "error" in api_response:
-                        st.error(f"⚠️ Ошибка API: {api_response.get('error')}")
-                        if "details" in api_response:
-                            st.error(f"Детали: {api_response['details']}")
-
-                    # Показываем результат
-                    with st.expander("📡 Ответ API", expanded=False):
-                        st.json(api_response)
-
-                    api_data = {"method": method, "path": path, "response": api_response}
-
-                    # Добавляем результат в контекст
-                    conversation_history.append({"role": "assistant", "content": assistant_message})
-                    conversation_history.append({
-                        "role": "user",
-                        "content": f"Эндпоинт: {path}\n"
-                                   f"Результат API: {json.dumps(api_response, ensure_ascii=False)[:8192]}\n\n"
-                                   f"Проанализируй.\n"
-                                   f"Также ты можешь отправить другой запрос." if req_num < MAX_REQUESTS - 1 else "",
-                    })
-
-                    # Получаем финальный ответ
-                    response = call_llm(conversation_history, temperature=0.3)
-                    assistant_message = response["choices"][0]["message"]["content"]
-
-                    method, path = extract_api_request(assistant_message)
-
-                st.markdown(assistant_message)
-
-                # Сохраняем сообщение ассистента
-                message_data = {"role": "assistant", "content": assistant_message}
-                if api_data:
-                    message_data["api_request"] = api_data
-                st.session_state.messages.append(message_data)
-
-            except Exception as e:
-                st.error(f"❌ Ошибка: {e}")
+        submit_chat_turn(api_token, api_base_url, account_id or None)
+
+    if st.session_state.get("active_job") is not None:
+        render_active_job()
 
     create_status_bar()
 
@@ -4,28 +4,79 @@
 
 Использование:
     poetry run chat-cli
+    poetry run chat-cli --trace                       # водопад этапов после каждого ответа
+    poetry run chat-cli --trace-file data/interim/traces.jsonl
     python -m src.app.chat_cli
 """
 
 import sys
+import uuid
+from functools import cache, partial
+from pathlib import Path
+from typing import Any
 
 import click
 
 from src.app.adapters import FinamAPIClient
-from src.app.core import call_llm, get_settings
-from src.app.core.llm import create_system_prompt, extract_api_request
+from src.app.core import RequestRouter, get_settings
+from src.app.core.agent import run_agent_turn
+from src.app.core.llm import create_system_prompt
+from src.app.core.orders import OrderPipeline, execute_order_request
+from src.app.core.tracing import ConsoleExporter, JsonFileExporter, get_tracer
+from src.app.utils import AssetIndex
+
+
+def render_api_call(api_call: dict[str, Any]) -> None:
+    """Показать выполненный API запрос и ответ"""
+    api_response = api_call["response"]
+    with get_tracer().span("chat.render", {"render.kind": "api_response"}):
+        # Проверяем на ошибки
+        if "error" in api_response:
+            click.echo(f"   ⚠️  Ошибка API: {api_response.get('error')}", err=True)
+            if "details" in api_response:
+                click.echo(f"   Детали: {api_response['details']}", err=True)
+        else:
+            click.echo(f"   📡 Ответ API: {api_response}\n")
+
+
+def render_status(status: str) -> None:
+    if status.startswith("Выполняю запрос"):
+        click.echo(f"\n   🔍 {status}")
 
 
 @click.command()
 @click.option("--account-id", default=None, help="ID счета для работы (опционально)")
 @click.option("--api-token", default=None, help="Finam API токен (или используйте FINAM_ACCESS_TOKEN)")
-def main(account_id: str | None, api_token: str | None) -> None:  # noqa: C901
+@click.option("--trace", is_flag=True, help="Печатать водопад этапов (LLM, тикеры, Finam API, вывод) после ответа")
+@click.option("--trace-file", type=click.Path(path_type=Path), default=None, help="Дописывать спаны в файл OTLP/JSON")
+def main(account_id: str | None, api_token: str | None, trace: bool, trace_file: Path | None) -> None:  # noqa: C901
     """Запустить интерактивный CLI чат с AI ассистентом"""
     settings = get_settings()
 
     # Инициализируем клиент Finam API
     finam_client = FinamAPIClient(access_token=api_token)
 
+    @cache
+    def asset_index() -> AssetIndex:
+        return AssetIndex.from_response(finam_client.get_assets())
+
+    router = RequestRouter(lambda name: asset_index().lookup(name))
+    pipelines: dict[str, OrderPipeline] = {}
+
+    def execute(method: str, path: str, turn_id: str) -> dict[str, Any]:
+        # Выставление и отмена ордеров — через конвейер счета (проверка и идемпотентность в пределах хода)
+        def pipeline(account: str) -> OrderPipeline:
+            return pipelines.setdefault(account, OrderPipeline(finam_client, account))
+
+        response = execute_order_request(pipeline, method, path, turn_id)
+        return finam_client.execute_request(method, path) if response is None else response
+
+    tracer = get_tracer()
+    if trace:
+        tracer.add_exporter(ConsoleExporter(lambda text: click.echo(f"\n⏱️  Этапы ответа:\n{text}")))
+    if trace_file:
+        tracer.add_exporter(JsonFileExporter(trace_file))
+
     # Проверяем подключение
     if finam_client.access_token:
         click.echo("✅ Finam API токен установлен")
@@ -66,44 +117,20 @@ def main(account_id: str | None, api_token: str | None) -> None:  # noqa: C901
             # Добавляем вопрос в историю
             conversation_history.append({"role": "user", "content": user_input})
 
-            # Получаем ответ от LLM
+            # Ход агента: LLM -> запрос к API -> анализ; все этапы — в одной трассе
             click.echo("🤖 Ассистент: ", nl=False)
-            response = call_llm(conversation_history, temperature=0.3)
-            assistant_message = response["choices"][0]["message"]["content"]
-
-            # Проверяем, есть ли API запрос
-            method, path = extract_api_request(assistant_message)
-
-            if method and path:
-                # Подставляем account_id если есть
-                if account_id and "{account_id}" in path:  # noqa: RUF027
-                    path = path.replace("{account_id}", account_id)
-
-                # Выполняем API запрос
-                click.echo(f"\n   🔍 Выполняю запрос: {method} {path}")
-                api_response = finam_client.execute_request(method, path)
-
-                # Проверяем на ошибки
-                if "error" in api_response:
-                    click.echo(f"   ⚠️  Ошибка API: {api_response.get('error')}", err=True)
-                    if "details" in api_response:
-                        click.echo(f"   Детали: {api_response['details']}", err=True)
-                else:
-                    click.echo(f"   📡 Ответ API: {api_response}\n")
-
-                # Добавляем результат API в контекст
-                conversation_history.append({"role": "assistant", "content": assistant_message})
-                conversation_history.append({
-                    "role": "user",
-                    "content": f"Результат API запроса: {api_response}\n\nПроанализируй это.",
-                })
-
-                # Получаем финальный ответ
-                response = call_llm(conversation_history, temperature=0.3)
-                assistant_message = response["choices"][0]["message"]["content"]
-
-            click.echo(f"{assistant_message}\n")
-            conversation_history.append({"role": "assistant", "content": assistant_message})
+            with tracer.span("cli.turn"):
+                turn = run_agent_turn(
+                    conversation_history,
+                    execute=partial(execute, turn_id=uuid.uuid4().hex),
+                    router=router,
+                    account_id=account_id,
+                    on_status=render_status,
+                    on_api_call=render_api_call,
+                )
+                with tracer.span("chat.render", {"render.kind": "answer"}):
+                    click.echo(f"{turn.content}\n")
+            conversation_history.append({"role": "assistant", "content": turn.content})
 
         except KeyboardInterrupt:
             click.echo("\n\n👋 До свидания!")
@@ -0,0 +1,316 @@
+"""
+Общие для процесса ресурсы Streamlit приложения
+
+Клиенты, индекс активов и роутер создаются один раз на пару (токен, base URL)
+и переиспользуются всеми сессиями и перезапусками скрипта. Данные Finam,
+которые меняются редко, кэшируются через st.cache_data с TTL.
+"""
+
+import re
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import streamlit as st
+
+from src.app.adapters import FinamAPIClient, LocalFeed, PollingFeed, RateLimiter
+from src.app.core import MarketDataHub, RequestRouter, get_settings
+from src.app.core.bars import BarFetcher
+from src.app.core.candles import CandleFetchError, Candles, CandleStore, parse_time
+from src.app.core.jobs import JobManager
+from src.app.core.ledger import Ledger
+from src.app.core.llm import create_system_prompt
+from src.app.core.metrics import CACHE_MISSES, CACHE_REQUESTS, CHAT_JOBS_ACTIVE, MetricsServer, start_metrics_server
+from src.app.core.orders import OrderPipeline, execute_order_request
+from src.app.core.portfolio import DEFAULT_SECTOR, PortfolioEngine
+from src.app.core.resample import TradingSchedule
+from src.app.core.scanner import MarketScanner
+from src.app.core.tracing import current_span
+from src.app.utils import AssetIndex
+
+REFERENCE_TTL = 3600  # биржи, инструменты, расписания, параметры
+MARKET_TTL = 5  # лента сделок
+_CACHE_METRICS = {
+    source: (CACHE_REQUESTS.labels(source), CACHE_MISSES.labels(source)) for source in ("reference", "market")
+}
+
+_HUB_ROUTE = re.compile(r"^/v1/instruments/(?P<symbol>[^/?]+)/(?P<kind>quotes/latest|orderbook)$")
+_DEPTH_PARAM = re.compile(r"[?&]depth=(\d+)")
+_BARS_ROUTE = re.compile(r"^/v1/instruments/(?P<symbol>[^/?]+)/bars$")
+_HISTORY_ROUTE = re.compile(r"^/v1/accounts/(?P<account_id>[^/?]+)/(?P<kind>trades|transactions)$")
+
+
+class _UncachedResponse(Exception):
+    """Ответ с ошибкой, который не должен попасть в кэш"""
+
+    def __init__(self, response: dict[str, Any]) -> None:
+        super().__init__(response.get("error"))
+        self.response = response
+
+
+@st.cache_resource(show_spinner=False)
+def get_finam_client(access_token: str | None, base_url: str | None) -> FinamAPIClient:
+    """Общий клиент Finam API для токена и base URL"""
+    return FinamAPIClient(access_token=access_token, base_url=base_url)
+
+
+@st.cache_resource(show_spinner=False, ttl=REFERENCE_TTL)
+def get_asset_index(access_token: str | None, base_url: str | None) -> AssetIndex:
+    """Индекс активов для поиска тикера по названию компании"""
+    client = get_finam_client(access_token, base_url)
+    index = AssetIndex.from_response(client.execute_request("GET", "/v1/assets"))
+    if not index:
+        # Исключения не кэшируются — при следующем обращении попробуем снова
+        raise LookupError("Список активов недоступен")
+    return index
+
+
+@st.cache_resource(show_spinner=False)
+def get_request_router(access_token: str | None, base_url: str | None) -> RequestRouter:
+    """Роутер для подстановки тикеров и счета в path"""
+
+    def resolve_symbol(name: str) -> str:
+        try:
+            return get_asset_index(access_token, base_url).lookup(name)
+        except LookupError:
+            return ""
+
+    return RequestRouter(resolve_symbol)
+
+
+@st.cache_resource(show_spinner=False)
+def get_market_data_hub(access_token: str | None, base_url: str | None) -> MarketDataHub:
+    """Хаб котировок и стаканов с фоновым обновлением подписок"""
+    settings = get_settings()
+    if settings.market_feed == "local":
+        feed, budget = LocalFeed(), None
+    else:
+        client = get_finam_client(access_token, base_url)
+        feed = PollingFeed(client)
+        # Фоновый опрос расходует только свою долю лимита клиента, остальное остается запросам чата
+        limiter = client.rate_limiter
+        budget = RateLimiter(max(1, int(limiter.rate * settings.market_data_rate_share)), limiter.per).try_acquire
+    hub = MarketDataHub(
+        feed, interval=settings.market_data_interval, max_age=settings.market_data_max_age, poll_budget=budget
+    )
+    return hub.start()
+
+
+@st.cache_resource(show_spinner=False)
+def get_market_scanner(access_token: str | None, base_url: str | None) -> MarketScanner:
+    """Сканер рынка: котировки из источника хаба (без подписок), свечи — из локального хранилища"""
+    feed = get_market_data_hub(access_token, base_url).feed
+    fetcher = BarFetcher(get_finam_client(access_token, base_url))
+
+    def bars(symbol: str, timeframe: str, start: int, end: int) -> Candles:
+        try:
+            return get_candle_store().get(symbol, timeframe, start, end, fetch=fetcher)
+        except CandleFetchError as e:
+            raise RuntimeError(e.response.get("error")) from e
+
+    return MarketScanner(feed, bars)
+
+
+@st.cache_resource(show_spinner=False)
+def get_candle_store() -> CandleStore:
+    """Локальное хранилище свечей, общее для всех сессий"""
+    return CandleStore(get_settings().candle_store_dir or None)
+
+
+def read_candles(
+    access_token: str | None, base_url: str | None, symbol: str, timeframe: str, start: str, end: str
+) -> dict[str, Any]:
+    """Свечи через локальное хранилище: из API догружаются только недостающие интервалы"""
+    fetcher = BarFetcher(get_finam_client(access_token, base_url))
+
+    def schedules(symbol: str) -> TradingSchedule | None:
+        return get_trading_schedule(access_token, base_url, symbol)
+
+    try:
+        candles = get_candle_store().get(symbol, timeframe, start, end, fetch=fetcher, schedules=schedules)
+    except CandleFetchError as e:
+        return e.response
+    return candles.to_response()
+
+
+def get_trading_schedule(access_token: str | None, base_url: str | None, symbol: str) -> TradingSchedule | None:
+    """Торговые окна инструмента для агрегации свечей; None, если расписание недоступно"""
+    try:
+        response = _fetch_reference(access_token, base_url, f"/v1/assets/{symbol}/schedule")
+    except _UncachedResponse:
+        return None
+    return TradingSchedule.from_response(response)
+
+
+@st.cache_resource(show_spinner=False)
+def get_ledger() -> Ledger:
+    """Локальный журнал сделок и транзакций, общий для всех сессий"""
+    return Ledger(get_settings().ledger_path or ":memory:")
+
+
+def read_account_history(
+    access_token: str | None, base_url: str | None, account_id: str, kind: str, params: dict[str, list[str]]
+) -> dict[str, Any]:
+    """Сделки или транзакции счета из локального журнала; из API догружаются только новые записи"""
+    client = get_finam_client(access_token, base_url)
+    fetch = client.get_trades if kind == "trades" else client.get_transactions
+    start, end, limit = (params.get(key, [""])[0] for key in ("interval.start_time", "interval.end_time", "limit"))
+    start = parse_time(start) if start else None
+    end = parse_time(end) if end else None
+    ledger = get_ledger()
+    try:
+        ledger.sync(account_id, kind, fetch, start, end)
+    except RuntimeError as e:
+        return {"error": str(e)}
+    return ledger.records(account_id, kind, start, end, limit=int(limit) if limit.isdigit() else None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_portfolio_engine(access_token: str | None, base_url: str | None, account_id: str) -> PortfolioEngine:
+    """
+    Портфель счета; история сделок хранится в процессе и догружается через refresh()
+
+    Позиции оцениваются по дневным свечам из локального хранилища, сектор
+    инструмента — тип актива из справочника /v1/assets.
+    """
+    client = get_finam_client(access_token, base_url)
+    fetcher = BarFetcher(client)
+
+    def prices(symbol: str, start: int, end: int) -> Candles:
+        try:
+            return get_candle_store().get(symbol, "TIME_FRAME_D", start, end, fetch=fetcher)
+        except CandleFetchError:
+            return Candles.empty(symbol, "TIME_FRAME_D")
+
+    def sectors(symbol: str) -> str:
+        try:
+            return get_asset_index(access_token, base_url).asset_type(symbol) or DEFAULT_SECTOR
+        except LookupError:
+            return DEFAULT_SECTOR
+
+    return PortfolioEngine(client, account_id, prices=prices, sectors=sectors)
+
+
+@st.cache_resource(show_spinner=False)
+def get_order_pipeline(access_token: str | None, base_url: str | None, account_id: str) -> OrderPipeline:
+    """Конвейер ордеров счета; параметры инструментов берутся из кэша справочных данных"""
+    return OrderPipeline(
+        get_finam_client(access_token, base_url),
+        account_id,
+        reference=lambda path: execute_request(access_token, base_url, "GET", path),
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_manager() -> JobManager:
+    """Пул фоновых воркеров для ответов в чате, общий для всех сессий"""
+    manager = JobManager(max_workers=get_settings().chat_workers)
+    CHAT_JOBS_ACTIVE.set_function(lambda: manager.active)
+    return manager
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics_server() -> MetricsServer | None:
+    """Сервер метрик Prometheus на отдельном порту (APP_METRICS_PORT, 0 — выключен)"""
+    port = get_settings().metrics_port
+    return start_metrics_server(port) if port else None
+
+
+@st.cache_data(show_spinner=False, ttl=60)
+def get_system_prompt() -> str:
+    """Системный промпт (содержит текущее время, поэтому обновляется раз в минуту)"""
+    return create_system_prompt()
+
+
+def _mark_cache(**attributes: Any) -> None:  # noqa: ANN401
+    """Атрибуты кэша у спана текущего запроса (cache.source, cache.hit)"""
+    if span := current_span():
+        span.set_attributes({f"cache.{key}": value for key, value in attributes.items()})
+
+
+def _fetch(access_token: str | None, base_url: str | None, path: str, source: str) -> dict[str, Any]:
+    # Вызывается только при промахе кэша
+    _mark_cache(hit=False)
+    _CACHE_METRICS[source][1].inc()
+    response = get_finam_client(access_token, base_url).execute_request("GET", path)
+    if "error" in response:
+        raise _UncachedResponse(response)
+    return response
+
+
+@st.cache_data(show_spinner=False, ttl=REFERENCE_TTL)
+def _fetch_reference(access_token: str | None, base_url: str | None, path: str) -> dict[str, Any]:
+    return _fetch(access_token, base_url, path, "reference")
+
+
+@st.cache_data(show_spinner=False, ttl=MARKET_TTL)
+def _fetch_market(access_token: str | None, base_url: str | None, path: str) -> dict[str, Any]:
+    return _fetch(access_token, base_url, path, "market")
+
+
+def _read_local(
+    access_token: str | None, base_url: str | None, route: str, path: str, session_id: str
+) -> dict[str, Any] | None:
+    """GET из хаба рыночных данных, хранилища свечей или журнала счета; None — маршрут не локальный"""
+    if match := _HUB_ROUTE.match(route):
+        _mark_cache(source="hub")
+        hub = get_market_data_hub(access_token, base_url)
+        if match["kind"] == "orderbook":
+            depth = _DEPTH_PARAM.search(path)
+            return hub.get_orderbook(match["symbol"], int(depth[1]) if depth else 10, session_id=session_id)
+        return hub.get_quote(match["symbol"], session_id=session_id)
+    if match := _BARS_ROUTE.match(route):
+        params = parse_qs(urlsplit(path).query)
+        timeframe, start, end = (
+            params.get(key, [""])[0] for key in ("timeframe", "interval.start_time", "interval.end_time")
+        )
+        if timeframe and start and end:
+            _mark_cache(source="candles")
+            return read_candles(access_token, base_url, match["symbol"], timeframe, start, end)
+    if match := _HISTORY_ROUTE.match(route):
+        _mark_cache(source="ledger")
+        return read_account_history(
+            access_token, base_url, match["account_id"], match["kind"], parse_qs(urlsplit(path).query)
+        )
+    return None
+
+
+def execute_request(
+    access_token: str | None, base_url: str | None, method: str, path: str, session_id: str = "", turn_id: str = ""
+) -> dict[str, Any]:
+    """
+    Выполнить запрос к Finam API, используя кэш для read-only данных
+
+    Котировки и стакан отдаются хабом рыночных данных (инструмент остается
+    в подписке сессии), свечи — локальным хранилищем (старшие таймфреймы по
+    возможности агрегируются из младших), сделки и транзакции счета —
+    локальным журналом. Выставление и отмена ордеров идут через конвейер ордеров
+    счета (проверка по параметрам инструмента, ключ идемпотентности из turn_id).
+    Остальные данные счета и прочие не-GET запросы всегда идут в API напрямую.
+    """
+    route = path.split("?", 1)[0]
+    order_response = execute_order_request(
+        lambda account_id: get_order_pipeline(access_token, base_url, account_id), method, path, turn_id
+    )
+    if order_response is not None:
+        _mark_cache(source="orders")
+        return order_response
+    fetch = None
+    if method.upper() == "GET":
+        local_response = _read_local(access_token, base_url, route, path, session_id)
+        if local_response is not None:
+            return local_response
+        if route.startswith("/v1/exchanges") or (route.startswith("/v1/assets") and route != "/v1/assets/clock"):
+            fetch = _fetch_reference
+        elif route.startswith("/v1/instruments/") and route.endswith("/trades/latest"):
+            fetch = _fetch_market
+
+    if fetch is None:
+        _mark_cache(source="api")
+        return get_finam_client(access_token, base_url).execute_request(method, path)
+    source = "reference" if fetch is _fetch_reference else "market"
+    _mark_cache(source=source, hit=True)
+    _CACHE_METRICS[source][0].inc()
+    try:
+        return fetch(access_token, base_url, path)
+    except _UncachedResponse as e:
+        return e.response
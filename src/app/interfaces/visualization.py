@@ -1,27 +1,38 @@
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from __future__ import annotations
+
+import numpy as np
 from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from plotly.colors import qualitative  # только палитры, без plotly.express и pandas
+
+from src.app.core.candles import COLUMNS, Candles, parse_time
+from src.app.core.downsample import downsample_candles, lttb, ohlc_buckets
+from src.app.core.indicators import IndicatorParams, IndicatorStream, compute_indicators
+from src.app.core.orderbook import ASK, BID
+from src.app.lazy import lazy_module
+
+# pandas и Plotly импортируются при построении первого графика, а не при импорте модуля
+pd = lazy_module("pandas")
+px = lazy_module("plotly.express")
+go = lazy_module("plotly.graph_objects")
 
 # ==========================================
 # Конфигурации визуализаций (читаемый формат)
 # ==========================================
 
-@dataclass
+@dataclass(frozen=True)
 class ChartConfig:
-    """Базовая конфигурация для всех графиков"""
+    """Базовая конфигурация для всех графиков (неизменяемая, общая для всех вызовов)"""
     title: str
     paper_bgcolor: str = "rgba(0,0,0,0)"
     plot_bgcolor: str = "rgba(0,0,0,0)"
     font_color: str = "#e6e1ff"
-    margin: Dict[str, int] = None
-    
-    def __post_init__(self):
-        if self.margin is None:
-            self.margin = {"l": 20, "r": 20, "t": 40, "b": 20}
+    margin: Dict[str, int] = field(default_factory=lambda: {"l": 20, "r": 20, "t": 40, "b": 20})
+    layout: Dict[str, Any] = field(default_factory=dict)  # оси и прочие настройки layout графика
 
-@dataclass
+@dataclass(frozen=True)
 class ColorScheme:
     """Цветовые схемы для графиков"""
     primary: str = "#7c3aed"
@@ -29,11 +40,12 @@ class ColorScheme:
     accent: str = "#10b981"
     danger: str = "#ef4444"
     warning: str = "#f59e0b"
-    colors_qualitative: List[str] = None
-    
-    def __post_init__(self):
-        if self.colors_qualitative is None:
-            self.colors_qualitative = px.colors.qualitative.Set3
+    colors_qualitative: List[str] = field(default_factory=lambda: list(qualitative.Set3))
+
+# Большие ряды прореживаются до бюджета точек; выше порога — WebGL трейсы
+MAX_LINE_POINTS = 2000
+MAX_CANDLES = 1000
+WEBGL_THRESHOLD = 1000
 
 # ==========================================
 # Специфичные конфигурации для каждого типа графика
@@ -57,7 +69,8 @@ VISUALIZATION_CONFIGS = {
         "config": ChartConfig(
             title="Динамика стоимости портфеля",
             paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)"
+            plot_bgcolor="rgba(0,0,0,0)",
+            layout={"xaxis_title": "Дата", "yaxis_title": "Стоимость"}
         ),
         "colors": ColorScheme(),
         "traces": {
@@ -92,6 +105,16 @@ VISUALIZATION_CONFIGS = {
                 "align": "left",
                 "font": {"color": "white", "size": 11}
             }
+        },
+        "top_n": 20,
+        "sort_by": "change",
+        "columns": {
+            "symbol": {"title": "Тикер", "format": "{}"},
+            "last": {"title": "Цена", "format": "{:.2f}"},
+            "change": {"title": "Изм., %", "format": "{:+.2%}"},
+            "volume_spike": {"title": "Объем / средний", "format": "{:.1f}x"},
+            "volatility": {"title": "Волатильность", "format": "{:.0%}"},
+            "rsi": {"title": "RSI", "format": "{:.0f}"}
         }
     },
     
@@ -100,25 +123,47 @@ VISUALIZATION_CONFIGS = {
         "config": ChartConfig(
             title="Технический анализ {symbol}",
             paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)"
+            plot_bgcolor="rgba(0,0,0,0)",
+            layout={"xaxis_title": "Дата", "yaxis_title": "Цена", "xaxis_rangeslider_visible": False}
         ),
         "colors": ColorScheme(),
         "indicators": {
             "sma_20": {"color": "warning", "width": 1},
             "sma_50": {"color": "danger", "width": 1},
+            "ema_20": {"color": "secondary", "width": 1},
+            "bollinger": {"color": "secondary", "width": 1, "dash": "dot"},
+            "vwap": {"color": "primary", "width": 1, "dash": "dashdot"},
             "support": {"color": "accent", "dash": "dash"},
             "resistance": {"color": "danger", "dash": "dash"}
         }
     },
     
+    "orderbook": {
+        "type": "bar",
+        "config": ChartConfig(
+            title="Стакан {symbol}",
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(0,0,0,0)",
+            layout={"xaxis_title": "Объем", "yaxis_title": "Цена", "barmode": "overlay"}
+        ),
+        "colors": ColorScheme(),
+        "levels": 10,
+        "sides": {
+            BID: {"name": "Покупка", "color": "accent"},
+            ASK: {"name": "Продажа", "color": "danger"}
+        }
+    },
+    
     "rsi": {
         "type": "line", 
         "config": ChartConfig(
             title="Индикатор RSI (Relative Strength Index)",
             paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)"
+            plot_bgcolor="rgba(0,0,0,0)",
+            layout={"yaxis_range": [0, 100]}
         ),
         "colors": ColorScheme(),
+        "period": 14,
         "levels": {
             "overbought": {"value": 70, "color": "danger", "text": "Перекупленность"},
             "oversold": {"value": 30, "color": "accent", "text": "Перепроданность"},
@@ -127,6 +172,22 @@ VISUALIZATION_CONFIGS = {
     }
 }
 
+@lru_cache(maxsize=None)
+def get_chart_template(chart_type: str) -> go.layout.Template:
+    """
+    Шаблон Plotly с оформлением графика: собирается один раз на тип графика
+
+    Фигуры получают копию шаблона, поэтому общий объект не меняется.
+    """
+    chart_config = VISUALIZATION_CONFIGS[chart_type]["config"]
+    return go.layout.Template(layout=go.Layout(
+        paper_bgcolor=chart_config.paper_bgcolor,
+        plot_bgcolor=chart_config.plot_bgcolor,
+        font=dict(color=chart_config.font_color),
+        margin=chart_config.margin,
+        **chart_config.layout
+    ))
+
 # ==========================================
 # Движок визуализаций
 # ==========================================
@@ -184,96 +245,260 @@ class UniversalVisualizationEngine:
             marker=dict(colors=colors)
         ))
         
-        self._apply_layout(fig, config["config"], **kwargs)
+        self._apply_layout(fig, "sunburst", **kwargs)
         return fig
     
     def _create_performance(self, data: Dict, config: Dict, **kwargs) -> go.Figure:
-        """График производительности"""
+        """
+        График производительности
+        
+        kwargs:
+            x_range: (start, end) — видимый интервал; точки считаются только для него
+            max_points: Точек на линию после LTTB (0 — без прореживания)
+        """
         portfolio_data = data.get("portfolio_data")
         benchmark_data = data.get("benchmark_data")
+        max_points = kwargs.get("max_points", MAX_LINE_POINTS)
         
         fig = go.Figure()
         
-        # Портфель
-        portfolio_config = config["traces"]["portfolio"]
-        fig.add_trace(go.Scatter(
-            x=portfolio_data['datetime'],
-            y=portfolio_data['value'],
-            name=portfolio_config["name"],
-            line=dict(
-                color=getattr(self.default_colors, portfolio_config["line_color"]),
-                width=portfolio_config["line_width"]
-            )
-        ))
-        
-        # Бенчмарк
-        if benchmark_data is not None:
-            benchmark_config = config["traces"]["benchmark"]
-            fig.add_trace(go.Scatter(
-                x=benchmark_data['datetime'],
-                y=benchmark_data['value'],
-                name=benchmark_config["name"],
+        for key, frame in (("portfolio", portfolio_data), ("benchmark", benchmark_data)):
+            if frame is None:
+                continue
+            trace_config = config["traces"][key]
+            x, y = self._downsample_line(frame['datetime'], frame['value'], max_points, kwargs.get("x_range"))
+            fig.add_trace(self._scatter(len(x))(
+                x=x,
+                y=y,
+                name=trace_config["name"],
                 line=dict(
-                    color=getattr(self.default_colors, benchmark_config["line_color"]),
-                    width=benchmark_config["line_width"],
-                    dash=benchmark_config.get("line_dash")
+                    color=getattr(self.default_colors, trace_config["line_color"]),
+                    width=trace_config["line_width"],
+                    dash=trace_config.get("line_dash")
                 )
             ))
         
-        self._apply_layout(fig, config["config"], **kwargs)
-        fig.update_layout(
-            xaxis_title="Дата",
-            yaxis_title="Стоимость"
-        )
+        self._apply_layout(fig, "performance", **kwargs)
+        fig.update_layout(uirevision="performance")
         return fig
     
     def _create_technical_analysis(self, data: Dict, config: Dict, **kwargs) -> go.Figure:
-        """Технический анализ"""
-        historical_data = data.get("historical_data")
-        indicators = data.get("indicators", {})
+        """
+        Технический анализ: свечи и индикаторы, рассчитанные по всей истории
+        
+        Индикаторы считаются по полной истории, на график попадает видимый
+        интервал, укрупненный до max_candles свечей (OHLC сохраняется).
+        При приближении график можно перестроить с x_range — детализация
+        вырастет до исходных свечей (свечи за интервал берутся из CandleStore).
+        
+        kwargs:
+            x_range: (start, end) — видимый интервал
+            max_candles: Свечей на графике (0 — без укрупнения)
+        """
         symbol = data.get("symbol", "")
+        full = self._as_candles(data.get("historical_data"), symbol, data.get("timeframe", ""))
+        requested = data.get("indicators")
+        lo, hi = self._visible_slice(full.timestamp, kwargs.get("x_range"))
+        max_candles = kwargs.get("max_candles", MAX_CANDLES) or len(full)
+        visible = Candles(full.symbol, full.timeframe, *(getattr(full, col)[lo:hi] for col in COLUMNS))
+        candles = downsample_candles(visible, max_candles)
+        # Индикаторы берутся на последней свече каждой укрупненной группы
+        _, ends = ohlc_buckets(len(visible), max_candles)
+        x = pd.to_datetime(candles.timestamp, unit="s", utc=True)
         
         fig = go.Figure()
         
         # Свечной график
         fig.add_trace(go.Candlestick(
-            x=historical_data['datetime'],
-            open=historical_data['open'],
-            high=historical_data['high'],
-            low=historical_data['low'],
-            close=historical_data['close'],
-            name=f"{symbol} Цены"
+            x=x,
+            open=candles.open,
+            high=candles.high,
+            low=candles.low,
+            close=candles.close,
+            name=f"{symbol} Цены",
+            meta="candles"
         ))
         
-        # Индикаторы
-        for indicator, params in config["indicators"].items():
-            if indicator in indicators and indicators[indicator]:
-                if indicator.startswith('sma_'):
-                    values = [indicators[indicator]] * len(historical_data)
-                    fig.add_trace(go.Scatter(
-                        x=historical_data['datetime'],
-                        y=values,
-                        name=indicator.upper(),
-                        line=dict(
-                            color=getattr(self.default_colors, params["color"]),
-                            width=params["width"]
-                        )
-                    ))
-                elif indicator in ['support', 'resistance']:
+        # Индикаторы: без явного списка рисуются все из конфигурации
+        names = [
+            name for name in config["indicators"]
+            if requested is None or (name in requested and (not isinstance(requested, dict) or requested[name]))
+        ]
+        periods = {kind: tuple(int(name.split("_")[1]) for name in names if name.startswith(f"{kind}_"))
+                   for kind in ("sma", "ema")}
+        series = compute_indicators(full, IndicatorParams(sma=periods["sma"], ema=periods["ema"]))
+        scatter = self._scatter(len(x))
+        
+        def visible_series(key: str) -> np.ndarray:
+            return series[key][lo:hi][ends]
+        
+        for indicator in names:
+            params = config["indicators"][indicator]
+            color = getattr(self.default_colors, params["color"])
+            line = dict(color=color, width=params.get("width", 1), dash=params.get("dash"))
+            if indicator.startswith(('sma_', 'ema_')) or indicator == 'vwap':
+                fig.add_trace(scatter(
+                    x=x, y=visible_series(indicator), name=indicator.upper(), line=line, meta=indicator
+                ))
+            elif indicator == 'bollinger':
+                for key, name in (("bb_upper", "BB верх"), ("bb_lower", "BB низ")):
+                    fig.add_trace(scatter(x=x, y=visible_series(key), name=name, line=line, meta=key))
+            elif indicator in ['support', 'resistance']:
+                # Явно заданный уровень или последнее значение скользящего уровня
+                value = requested.get(indicator) if isinstance(requested, dict) else None
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    value = series[indicator][hi - 1] if hi > lo else float("nan")
+                if np.isfinite(value):
                     fig.add_hline(
-                        y=indicators[indicator],
+                        y=value,
                         line_dash=params["dash"],
-                        line_color=getattr(self.default_colors, params["color"]),
+                        line_color=color,
+                        name=indicator,
                         annotation_text=indicator.capitalize()
                     )
         
-        chart_config = config["config"]
-        chart_config.title = chart_config.title.format(symbol=symbol)
-        self._apply_layout(fig, chart_config, **kwargs)
-        fig.update_layout(
-            xaxis_title="Дата",
-            yaxis_title="Цена"
+        self._apply_layout(fig, "technical_analysis", config["config"].title.format(symbol=symbol), **kwargs)
+        fig.update_layout(uirevision=symbol)
+        return fig
+    
+    def _create_rsi(self, data: Dict, config: Dict, **kwargs) -> go.Figure:
+        """RSI по истории цен с уровнями перекупленности и перепроданности"""
+        candles = self._as_candles(data.get("historical_data"), data.get("symbol", ""), data.get("timeframe", ""))
+        period = data.get("period", config["period"])
+        values = compute_indicators(candles, IndicatorParams(rsi=period))["rsi"]
+        x, y = self._downsample_line(
+            candles.timestamp, values, kwargs.get("max_points", MAX_LINE_POINTS), kwargs.get("x_range")
+        )
+        
+        fig = go.Figure(self._scatter(len(x))(
+            x=x,
+            y=y,
+            name=f"RSI {period}",
+            line=dict(color=self.default_colors.primary, width=2)
+        ))
+        for level in config["levels"].values():
+            fig.add_hline(
+                y=level["value"],
+                line_dash="dash",
+                line_color=getattr(self.default_colors, level["color"]),
+                annotation_text=level["text"]
+            )
+        
+        self._apply_layout(fig, "rsi", **kwargs)
+        return fig
+    
+    @staticmethod
+    def _scatter(points: int) -> type:
+        """go.Scattergl для больших рядов (рендер через WebGL), иначе go.Scatter"""
+        return go.Scattergl if points > WEBGL_THRESHOLD else go.Scatter
+    
+    @staticmethod
+    def _visible_slice(timestamp: np.ndarray, x_range: Optional[tuple]) -> tuple:
+        """Границы [lo, hi) индексов, попадающих в x_range (даты, ISO строки или секунды UTC)"""
+        if not x_range:
+            return 0, len(timestamp)
+        start, end = (
+            value if isinstance(value, (int, np.integer)) else parse_time(pd.Timestamp(value).to_pydatetime())
+            for value in x_range
+        )
+        return (
+            int(np.searchsorted(timestamp, start, side="left")),
+            int(np.searchsorted(timestamp, end, side="right"))
+        )
+    
+    def _downsample_line(self, x: Any, y: Any, max_points: int, x_range: Optional[tuple] = None) -> tuple:
+        """Точки линии в видимом интервале, прореженные LTTB до max_points"""
+        seconds = x if isinstance(x, np.ndarray) and x.dtype.kind == "i" else self._to_seconds(x)
+        y = np.asarray(y, dtype=float)
+        lo, hi = self._visible_slice(seconds, x_range)
+        seconds, y = seconds[lo:hi], y[lo:hi]
+        if max_points:
+            keep = lttb(seconds, np.nan_to_num(y, nan=np.nanmean(y) if np.isfinite(y).any() else 0.0), max_points)
+            seconds, y = seconds[keep], y[keep]
+        return pd.to_datetime(seconds, unit="s", utc=True), y
+    
+    @staticmethod
+    def _to_seconds(values: Any) -> np.ndarray:
+        """Даты (Series, список, ISO строки) -> секунды UTC"""
+        delta = pd.to_datetime(values, utc=True) - pd.Timestamp(0, tz="UTC")
+        return np.asarray(delta // pd.Timedelta(seconds=1), dtype=np.int64)
+    
+    @staticmethod
+    def _as_candles(historical_data: Any, symbol: str = "", timeframe: str = "") -> Candles:
+        """Candles или DataFrame с колонками datetime, open, high, low, close[, volume] -> Candles"""
+        if isinstance(historical_data, Candles):
+            return historical_data
+        timestamp = UniversalVisualizationEngine._to_seconds(historical_data['datetime'])
+        if 'volume' in historical_data:
+            volume = historical_data['volume'].to_numpy(dtype=float)
+        else:
+            volume = np.zeros(len(historical_data))
+        return Candles(
+            symbol,
+            timeframe,
+            timestamp,
+            *(historical_data[col].to_numpy(dtype=float) for col in ("open", "high", "low", "close")),
+            volume,
         )
+    
+    def _create_market_scanner(self, data: Dict, config: Dict, **kwargs) -> go.Figure:
+        """Таблица лидеров сканера рынка (можно перерисовывать по частичным результатам)"""
+        result = data.get("result")
+        sort_by = data.get("sort_by", config["sort_by"])
+        top_n = data.get("top_n", config["top_n"])
+        if result is not None:
+            rows = result.top(top_n, sort_by)
+        else:
+            rows = data.get("rows", [])[:top_n]
+        
+        columns = config["columns"]
+        
+        def cell(value: Any, fmt: str) -> str:
+            if isinstance(value, float) and not np.isfinite(value):
+                return "—"
+            return fmt.format(value)
+        
+        styles = config["table_styles"]
+        fig = go.Figure(go.Table(
+            header=dict(values=[column["title"] for column in columns.values()], **styles["header"]),
+            cells=dict(
+                values=[[cell(row.get(name, np.nan), column["format"]) for row in rows]
+                        for name, column in columns.items()],
+                **styles["cells"]
+            )
+        ))
+        
+        title = None
+        if result is not None and not result.complete:
+            title = f"Загружено {result.done} из {result.total}"
+        self._apply_layout(fig, "market_scanner", title, **kwargs)
+        return fig
+    
+    def _create_orderbook(self, data: Dict, config: Dict, **kwargs) -> go.Figure:
+        """Стакан: объемы по уровням цен для каждой стороны"""
+        book = data["orderbook"]
+        levels = data.get("levels", config["levels"])
+        
+        fig = go.Figure()
+        for side, params in config["sides"].items():
+            prices, sizes = book.levels(side, levels)
+            fig.add_trace(go.Bar(
+                x=sizes,
+                y=prices,
+                orientation="h",
+                name=params["name"],
+                marker_color=getattr(self.default_colors, params["color"])
+            ))
+        
+        if book.mid is not None:
+            fig.add_hline(
+                y=book.mid,
+                line_dash="dot",
+                line_color=self.default_colors.secondary,
+                annotation_text=f"Спред {book.spread:g}"
+            )
+        
+        self._apply_layout(fig, "orderbook", config["config"].title.format(symbol=book.symbol), **kwargs)
         return fig
     
     def _create_generic_chart(self, data: Dict, config: Dict, **kwargs) -> go.Figure:
@@ -281,20 +506,79 @@ class UniversalVisualizationEngine:
         # Здесь можно добавить логику для других типов графиков
         raise NotImplementedError(f"Chart type generic creation not implemented")
     
-    def _apply_layout(self, fig: go.Figure, chart_config: ChartConfig, **kwargs):
-        """Применение настроек layout"""
-        layout_updates = {
-            "title": chart_config.title,
-            "paper_bgcolor": chart_config.paper_bgcolor,
-            "plot_bgcolor": chart_config.plot_bgcolor,
-            "font": dict(color=chart_config.font_color),
-            "margin": chart_config.margin
-        }
+    def _apply_layout(self, fig: go.Figure, chart_type: str, title: Optional[str] = None, **kwargs):
+        """Применение предсобранного шаблона, заголовка и layout_updates из kwargs"""
+        fig.update_layout(
+            template=get_chart_template(chart_type),
+            title=self.configs[chart_type]["config"].title if title is None else title,
+            **kwargs.get('layout_updates', {})
+        )
+
+class LiveCandleChart:
+    """
+    Живой свечной график: обновляется без перестроения фигуры
+    
+    Фигура строится один раз по последним window свечам. update() дописывает
+    новую свечу или двигает последнюю (тот же timestamp), пересчитывая только
+    последние значения индикаторов через IndicatorStream; самые старые свечи
+    уходят за левый край. Оформление и зум (uirevision) сохраняются.
+    """
+    
+    def __init__(
+        self,
+        candles: Candles,
+        symbol: str = "",
+        indicators: Optional[List[str]] = None,
+        window: int = MAX_CANDLES,
+        engine: Optional[UniversalVisualizationEngine] = None
+    ):
+        self.engine = engine or UniversalVisualizationEngine()
+        self.window = window
+        x_range = (int(candles.timestamp[-window]), int(candles.timestamp[-1])) if len(candles) > window else None
+        self.figure = self.engine.create_chart(
+            "technical_analysis",
+            {"historical_data": candles, "symbol": symbol or candles.symbol, "indicators": indicators},
+            x_range=x_range,
+            max_candles=0
+        )
+        self.stream = IndicatorStream.from_candles(candles)
+        self.last_timestamp = int(candles.timestamp[-1]) if len(candles) else None
+    
+    def update(self, timestamp: int, open: float, high: float, low: float, close: float, volume: float) -> go.Figure:
+        """Добавить свечу или обновить текущую; возвращает ту же фигуру"""
+        replace_last = timestamp == self.last_timestamp
+        values = self.stream.update(timestamp, high, low, close, volume, replace=replace_last)
+        x = pd.Timestamp(timestamp, unit="s", tz="UTC")
+        candle = {"x": x, "open": open, "high": high, "low": low, "close": close}
         
-        # Обновление из kwargs
-        layout_updates.update(kwargs.get('layout_updates', {}))
+        with self.figure.batch_update():
+            for trace in self.figure.data:
+                if trace.meta == "candles":
+                    point = candle
+                elif trace.meta in values:
+                    point = {"x": x, "y": values[trace.meta]}
+                else:
+                    continue
+                for key, value in point.items():
+                    setattr(trace, key, self._push(getattr(trace, key), value, replace_last))
+            # Уровни поддержки/сопротивления: линия и подпись
+            for shape in self.figure.layout.shapes:
+                if shape.name in values and np.isfinite(values[shape.name]):
+                    shape.y0 = shape.y1 = values[shape.name]
+                    for annotation in self.figure.layout.annotations:
+                        if annotation.text == shape.name.capitalize():
+                            annotation.y = values[shape.name]
         
-        fig.update_layout(**layout_updates)
+        self.last_timestamp = timestamp
+        return self.figure
+    
+    def _push(self, values: Any, value: Any, replace_last: bool) -> np.ndarray:
+        values = np.asarray(values if values is not None else [])
+        if replace_last and len(values):
+            values = values.copy()
+            values[-1] = value
+            return values
+        return np.append(values[-(self.window - 1):] if self.window > 1 else values[:0], value)
 
 # ==========================================
 # Использование
@@ -359,10 +643,24 @@ def get_required_data_structure(chart_type: str) -> Dict:
             "portfolio_data": "DataFrame с колонками ['datetime', 'value']",
             "benchmark_data": "Optional[DataFrame] с колонками ['datetime', 'value']" 
         },
+        "market_scanner": {
+            "result": "ScanResult из MarketScanner.iter_scan/scan (src.app.core.scanner) или rows: List[Dict]",
+            "sort_by": "Optional[str] - метрика сортировки (change, volume_spike, volatility, rsi)",
+            "top_n": "Optional[int] - количество строк"
+        },
+        "orderbook": {
+            "orderbook": "OrderBook - стакан (src.app.core.orderbook)",
+            "levels": "Optional[int] - количество уровней на сторону"
+        },
         "technical_analysis": {
-            "historical_data": "DataFrame с OHLC данными",
-            "indicators": "Dict с техническими индикаторами",
+            "historical_data": "DataFrame с OHLC данными или Candles из CandleStore",
+            "indicators": "Optional[List[str] | Dict] - индикаторы (sma_20, ema_20, bollinger, vwap, support, resistance); "
+                          "в Dict можно задать уровни support/resistance числом",
             "symbol": "str - тикер инструмента"
+        },
+        "rsi": {
+            "historical_data": "DataFrame с OHLC данными или Candles из CandleStore",
+            "period": "Optional[int] - период RSI"
         }
     }
     return structures.get(chart_type, {})
\ No newline at end of file
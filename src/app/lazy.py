@@ -0,0 +1,55 @@
+"""
+Отложенный импорт модулей и атрибутов пакетов
+
+Точки входа (chat-cli, calculate-metrics, evaluate) не должны платить при
+старте за тяжелые зависимости, которые им не нужны: Streamlit, pandas,
+Plotly. Пакеты отдают публичные имена через __getattr__ модуля (PEP 562):
+подмодуль импортируется при первом обращении к имени.
+"""
+
+import importlib
+from collections.abc import Callable
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule:
+    """Модуль, который импортируется при первом обращении к атрибуту"""
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:  # noqa: ANN401
+        value = getattr(importlib.import_module(self._name), attr)
+        self.__dict__[attr] = value  # следующие обращения — обычный поиск атрибута
+        return value
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}>"
+
+
+def lazy_module(name: str) -> ModuleType:
+    """Заменитель `import name` с импортом при первом использовании"""
+    return LazyModule(name)  # type: ignore[return-value]
+
+
+def lazy_exports(package: str, exports: dict[str, str]) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    __getattr__ и __dir__ для пакета с отложенной загрузкой подмодулей
+
+    Args:
+        package: __name__ пакета
+        exports: Имя -> относительный подмодуль, в котором оно определено
+    """
+
+    def __getattr__(name: str) -> Any:  # noqa: ANN401
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name], package), name)
+        importlib.import_module(package).__dict__[name] = value  # следующие обращения — без __getattr__
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*vars(importlib.import_module(package)), *exports})
+
+    return __getattr__, __dir__
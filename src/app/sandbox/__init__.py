@@ -0,0 +1,7 @@
+"""Локальные имитаторы внешних API для офлайн разработки, нагрузочных тестов и бенчмарков"""
+
+from .finam import FinamSimulator
+from .http import Faults, Request, SandboxServer
+from .openrouter import OpenRouterSimulator
+
+__all__ = ["Faults", "FinamSimulator", "OpenRouterSimulator", "Request", "SandboxServer"]
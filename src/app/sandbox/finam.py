@@ -0,0 +1,564 @@
+"""
+Офлайн имитатор Finam TradeAPI
+
+Реализует эндпоинты из системного промпта (create_system_prompt): справочник
+активов и бирж, котировки, стакан, лента сделок, свечи, счета, ордера,
+сделки, транзакции и сессии. Данные синтетические, но согласованные:
+котировки и стакан — LocalFeed, свечи — детерминированная функция времени,
+последняя свеча которой заканчивается у текущей котировки, рыночные ордера
+исполняются по котировке и меняют позиции, деньги, сделки и транзакции счета.
+"""
+
+import base64
+import datetime
+import hashlib
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from ..adapters import LocalFeed
+from ..core.candles import TIMEFRAME_SECONDS, format_time, parse_time
+from ..core.resample import DAY, MOSCOW_OFFSET, bucket_start
+from .http import Request, Response, Router, error
+
+MAX_BARS = 10_000
+SESSION_TTL = 15 * 60
+TRADING_HOURS = (10 * 3600, 18 * 3600 + 50 * 60)  # основная сессия MOEX, время московское
+
+# symbol, ticker, название, тип, ISIN, лот, знаков после запятой, шаг цены (в единицах 10^-decimals)
+ASSETS = (
+    ("SBER@MISX", "SBER", "Сбербанк России ПАО ао", "EQUITIES", "RU0009029540", 10, 2, 1),
+    ("GAZP@MISX", "GAZP", "ГАЗПРОМ ао", "EQUITIES", "RU0007661625", 10, 2, 1),
+    ("LKOH@MISX", "LKOH", "НК ЛУКОЙЛ", "EQUITIES", "RU0009024277", 1, 1, 5),
+    ("ROSN@MISX", "ROSN", "Роснефть", "EQUITIES", "RU000A0J2Q06", 1, 2, 5),
+    ("YDEX@MISX", "YDEX", "Яндекс", "EQUITIES", "RU000A107T19", 1, 1, 5),
+    ("MTLR@MISX", "MTLR", "Мечел ао", "EQUITIES", "RU000A0DKXV5", 1, 2, 1),
+    ("MOEX@MISX", "MOEX", "Московская Биржа", "EQUITIES", "RU000A0JR4A1", 10, 2, 1),
+    ("GMKN@MISX", "GMKN", "ГМК Норникель", "EQUITIES", "RU0007288411", 10, 2, 2),
+    ("VTBR@MISX", "VTBR", "Банк ВТБ", "EQUITIES", "RU000A0JP5V6", 1, 2, 1),
+    ("T@MISX", "T", "Т-Технологии", "EQUITIES", "RU000A107UL4", 1, 1, 2),
+    ("AAPL@XNGS", "AAPL", "Apple Inc.", "EQUITIES", "US0378331005", 1, 2, 1),
+    ("SU26238RMFS4@MISX", "SU26238RMFS4", "ОФЗ 26238", "BONDS", "RU000A1038V6", 1, 3, 1),
+    ("SiZ5@RTSX", "SiZ5", "Si-12.25 Доллар США - Российский рубль", "FUTURES", "", 1, 0, 1),
+    ("NGZ5@RTSX", "NGZ5", "NG-12.25 Природный газ", "FUTURES", "", 1, 3, 1),
+    ("BRZ5@RTSX", "BRZ5", "BR-12.25 Нефть Brent", "FUTURES", "", 1, 2, 1),
+)
+EXCHANGES = {"MISX": "Московская Биржа", "RTSX": "Срочный рынок МосБиржи", "XNGS": "NASDAQ"}
+
+
+def _value(value: float, digits: int = 2) -> dict[str, str]:
+    return {"value": f"{value:.{digits}f}"}
+
+
+def _money(amount: float, currency: str = "RUB") -> dict[str, Any]:
+    units = int(amount)
+    return {"currency_code": currency, "units": str(units), "nanos": round((amount - units) * 1e9)}
+
+
+def _number(value: Any) -> float:  # noqa: ANN401
+    if isinstance(value, dict):
+        value = value.get("value")
+    return float(value or 0)
+
+
+def _hash_uniform(seed: int, keys: np.ndarray) -> np.ndarray:
+    """Детерминированные U(0, 1) для каждого ключа (splitmix64)"""
+    with np.errstate(over="ignore"):
+        z = keys.astype(np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def _symbol_seed(seed: int, symbol: str, salt: str = "") -> int:
+    return int.from_bytes(hashlib.sha256(f"{seed}:{symbol}:{salt}".encode()).digest()[:7], "big")
+
+
+def _jwt(claims: dict[str, Any]) -> str:
+    def encode(part: dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.sandbox"
+
+
+@dataclass
+class SimAccount:
+    """Состояние счета имитатора"""
+
+    account_id: str
+    cash: float
+    positions: dict[str, list[float]] = field(default_factory=dict)  # symbol -> [quantity, average_price]
+    orders: dict[str, dict[str, Any]] = field(default_factory=dict)
+    trades: list[dict[str, Any]] = field(default_factory=list)
+    transactions: list[dict[str, Any]] = field(default_factory=list)
+
+
+class FinamSimulator:
+    """
+    Имитатор Finam TradeAPI (обработчик для SandboxServer)
+
+    Args:
+        accounts: Счета, которые существуют в имитаторе
+        seed: Зерно синтетических данных
+        initial_cash: Стартовый депозит каждого счета
+        history_days: Глубина синтетической истории сделок по счетам
+    """
+
+    def __init__(
+        self,
+        accounts: tuple[str, ...] = ("ACC-001-A", "FIN-203-B"),
+        seed: int = 0,
+        initial_cash: float = 1_000_000.0,
+        history_days: int = 60,
+    ) -> None:
+        self.seed = seed
+        self.feed = LocalFeed(seed=seed)
+        self.assets = {row[0]: row for row in ASSETS}
+        self._anchors: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._sessions: dict[str, float] = {}
+        self.accounts = {account_id: SimAccount(account_id, 0.0) for account_id in accounts}
+        now = int(time.time())
+        for account_id in accounts:
+            self._seed_history(self.accounts[account_id], initial_cash, now - history_days * DAY, now)
+        self.router = Router()
+        for method, pattern, handler in (
+            ("POST", "/v1/sessions", self.create_session),
+            ("POST", "/v1/sessions/details", self.session_details),
+            ("GET", "/v1/exchanges", self.exchanges),
+            ("GET", "/v1/assets", self.asset_list),
+            ("GET", "/v1/assets/clock", self.clock),
+            ("GET", "/v1/assets/(?P<symbol>[^/]+)", self.asset),
+            ("GET", "/v1/assets/(?P<symbol>[^/]+)/params", self.asset_params),
+            ("GET", "/v1/assets/(?P<symbol>[^/]+)/schedule", self.schedule),
+            ("GET", "/v1/assets/(?P<symbol>[^/]+)/options", self.options),
+            ("GET", "/v1/instruments/(?P<symbol>[^/]+)/quotes/latest", self.quote),
+            ("GET", "/v1/instruments/(?P<symbol>[^/]+)/orderbook", self.orderbook),
+            ("GET", "/v1/instruments/(?P<symbol>[^/]+)/trades/latest", self.latest_trades),
+            ("GET", "/v1/instruments/(?P<symbol>[^/]+)/bars", self.bars),
+            ("GET", "/v1/accounts/(?P<account_id>[^/]+)", self.account),
+            ("GET", "/v1/accounts/(?P<account_id>[^/]+)/orders", self.orders),
+            ("POST", "/v1/accounts/(?P<account_id>[^/]+)/orders", self.create_order),
+            ("GET", "/v1/accounts/(?P<account_id>[^/]+)/orders/(?P<order_id>[^/]+)", self.order),
+            ("DELETE", "/v1/accounts/(?P<account_id>[^/]+)/orders/(?P<order_id>[^/]+)", self.cancel_order),
+            ("GET", "/v1/accounts/(?P<account_id>[^/]+)/trades", self.trades),
+            ("GET", "/v1/accounts/(?P<account_id>[^/]+)/transactions", self.transactions),
+        ):
+            self.router.add(method, pattern, handler)
+
+    def __call__(self, request: Request) -> Response:
+        if not request.path.startswith("/v1/sessions") and not request.auth:
+            return error(401, "Authorization header is required", 16)
+        return self.router(request)
+
+    # Синтетические цены
+
+    def _anchor(self, symbol: str) -> float:
+        """Цена, к которой сходятся свечи (первая котировка LocalFeed)"""
+        with self._lock:
+            if symbol not in self._anchors:
+                self._anchors[symbol] = _number(self.feed.fetch_quote(symbol)["quote"]["last"])
+            return self._anchors[symbol]
+
+    def _log_path(self, symbol: str, timestamp: np.ndarray) -> np.ndarray:
+        """Логарифм цены как функция времени: сумма циклов с разными периодами и случайными фазами"""
+        seed = _symbol_seed(self.seed, symbol)
+        phases = _hash_uniform(seed, np.arange(4)) * 2 * np.pi
+        t = timestamp.astype(np.float64)
+        periods = (365 * DAY, 61 * DAY, 9 * DAY, DAY * 0.7)
+        amplitudes = (0.18, 0.07, 0.03, 0.008)
+        return sum(a * np.sin(2 * np.pi * t / p + phi) for a, p, phi in zip(amplitudes, periods, phases, strict=True))
+
+    def _grid(self, timeframe: str, start: int, end: int) -> np.ndarray:
+        """Начала свечей в торговое время MOEX, пересекающихся с [start, end]"""
+        step = TIMEFRAME_SECONDS[timeframe]
+        fine = min(step, DAY)
+        first = int(bucket_start(np.array([start]), timeframe)[0])
+        probe = np.arange(first, end + 1, fine, dtype=np.int64)
+        local = probe + MOSCOW_OFFSET
+        weekday = (local // DAY + 3) % 7  # 1970-01-01 — четверг
+        trading = weekday < 5
+        if step < DAY:
+            seconds = local % DAY
+            trading &= (seconds >= TRADING_HOURS[0]) & (seconds < TRADING_HOURS[1])
+        return np.unique(bucket_start(probe[trading], timeframe))[-MAX_BARS:]
+
+    def candles(self, symbol: str, timeframe: str, start: int, end: int) -> dict[str, np.ndarray]:
+        """Свечи инструмента: детерминированы для (seed, symbol, timeframe, timestamp)"""
+        now = int(time.time())
+        timestamp = self._grid(timeframe, start, min(end, now))
+        step = TIMEFRAME_SECONDS[timeframe]
+        seed = _symbol_seed(self.seed, symbol, timeframe)
+        scale = 0.004 * np.sqrt(min(step, DAY) / 3600)
+        close_ts = np.minimum(timestamp + step, now)
+        noise = (_hash_uniform(seed, timestamp) - 0.5) * 2 * scale
+        base = self._anchor(symbol) * np.exp(-self._log_path(symbol, np.array([now]))[0])
+        close = base * np.exp(self._log_path(symbol, close_ts) + noise)
+        # Открытие — закрытие предыдущей свечи (первой — значение пути в момент открытия)
+        open_ = np.empty_like(close)
+        open_[1:] = close[:-1]
+        open_[:1] = base * np.exp(self._log_path(symbol, timestamp[:1]))
+        high = np.maximum(open_, close) * (1 + _hash_uniform(seed + 1, timestamp) * scale)
+        low = np.minimum(open_, close) * (1 - _hash_uniform(seed + 2, timestamp) * scale)
+        volume = np.round(np.exp(8 + 2 * _hash_uniform(seed + 3, timestamp)) * np.sqrt(step / 60))
+        digits = self.assets[symbol][6] if symbol in self.assets else 2
+        return {
+            "timestamp": timestamp,
+            "open": np.round(open_, digits),
+            "high": np.round(high, digits),
+            "low": np.round(low, digits),
+            "close": np.round(close, digits),
+            "volume": volume,
+        }
+
+    def last_price(self, symbol: str) -> float:
+        return _number(self.feed.fetch_quote(symbol)["quote"]["last"])
+
+    # Сессии
+
+    def create_session(self, request: Request) -> Response:
+        secret = (request.body or {}).get("secret")
+        if not secret:
+            return error(400, "secret is required")
+        expires_at = time.time() + SESSION_TTL
+        token = _jwt({
+            "sub": hashlib.sha256(secret.encode()).hexdigest()[:16],
+            "exp": int(expires_at),
+            "jti": uuid.uuid4().hex,
+        })
+        with self._lock:
+            self._sessions[token] = expires_at
+        return 200, {"token": token}
+
+    def session_details(self, request: Request) -> Response:
+        token = (request.body or {}).get("token") or request.auth
+        expires_at = self._sessions.get(token)
+        if expires_at is None or expires_at < time.time():
+            return error(401, "Token is expired or invalid", 16)
+        return 200, {
+            "created_at": format_time(int(expires_at - SESSION_TTL)),
+            "expires_at": format_time(int(expires_at)),
+            "md_permissions": [{"quote_level": "QUOTE_LEVEL_DEPTH_OF_BOOK", "mic": mic} for mic in EXCHANGES],
+            "account_ids": list(self.accounts),
+            "readonly": False,
+        }
+
+    # Справочники
+
+    def exchanges(self, request: Request) -> Response:
+        return 200, {"exchanges": [{"mic": mic, "name": name} for mic, name in EXCHANGES.items()]}
+
+    def _asset(self, symbol: str) -> dict[str, Any]:
+        symbol, ticker, name, asset_type, isin, _, _, _ = self.assets[symbol]
+        mic = symbol.split("@")[1]
+        return {
+            "symbol": symbol,
+            "id": str(_symbol_seed(0, symbol) % 10**6),
+            "ticker": ticker,
+            "mic": mic,
+            "isin": isin,
+            "type": asset_type,
+            "name": name,
+        }
+
+    def asset_list(self, request: Request) -> Response:
+        return 200, {"assets": [self._asset(symbol) for symbol in self.assets]}
+
+    def clock(self, request: Request) -> Response:
+        return 200, {"timestamp": datetime.datetime.now(datetime.UTC).isoformat()}
+
+    def asset(self, request: Request, symbol: str) -> Response:
+        if symbol not in self.assets:
+            return error(404, f"Asset {symbol} not found", 5)
+        _, _, _, asset_type, _, lot, decimals, min_step = self.assets[symbol]
+        board = {"EQUITIES": "TQBR", "BONDS": "TQOB", "FUTURES": "RFUD"}[asset_type]
+        return 200, {
+            **self._asset(symbol),
+            "board": board,
+            "decimals": decimals,
+            "min_step": str(min_step),
+            "lot_size": _value(lot, 1),
+        }
+
+    def asset_params(self, request: Request, symbol: str) -> Response:
+        if symbol not in self.assets:
+            return error(404, f"Asset {symbol} not found", 5)
+        risk = 0.2 if self.assets[symbol][3] == "EQUITIES" else 0.12
+        available = {"value": "AVAILABLE_ON", "halted_days": 0}
+        price = self.last_price(symbol)
+        return 200, {
+            "symbol": symbol,
+            "account_id": request.query.get("account_id", ""),
+            "tradeable": True,
+            "longable": available,
+            "shortable": available,
+            "long_risk_rate": _value(risk * 100),
+            "long_collateral": _money(price * risk),
+            "short_risk_rate": _value(risk * 150),
+            "short_collateral": _money(price * risk * 1.5),
+        }
+
+    def schedule(self, request: Request, symbol: str) -> Response:
+        day = int(time.time()) // DAY * DAY - MOSCOW_OFFSET
+        sessions = [
+            ("OPENING_AUCTION", 9 * 3600 + 50 * 60, TRADING_HOURS[0]),
+            ("CORE_TRADING", *TRADING_HOURS),
+            ("CLOSING_AUCTION", TRADING_HOURS[1], TRADING_HOURS[1] + 10 * 60),
+            ("EVENING_TRADING", 19 * 3600 + 5 * 60, 23 * 3600 + 50 * 60),
+        ]
+        return 200, {
+            "symbol": symbol,
+            "sessions": [
+                {"type": kind, "interval": {"start_time": format_time(day + lo), "end_time": format_time(day + hi)}}
+                for kind, lo, hi in sessions
+            ],
+        }
+
+    def options(self, request: Request, symbol: str) -> Response:
+        return 200, {"symbol": symbol, "options": []}
+
+    # Рыночные данные
+
+    def quote(self, request: Request, symbol: str) -> Response:
+        return 200, self.feed.fetch_quote(symbol)
+
+    def orderbook(self, request: Request, symbol: str) -> Response:
+        return 200, self.feed.fetch_orderbook(symbol, int(request.query.get("depth") or 10))
+
+    def latest_trades(self, request: Request, symbol: str) -> Response:
+        last = self.last_price(symbol)
+        now = time.time()
+        u = _hash_uniform(_symbol_seed(self.seed, symbol, "tape"), np.arange(int(now), int(now) + 40))
+        trades = [
+            {
+                "trade_id": f"{int(now * 1000) + i}",
+                "mpid": "",
+                "timestamp": format_time(int(now) - 20 + i),
+                "price": _value(last * (1 + (u[i] - 0.5) * 0.002)),
+                "size": _value(1 + int(u[i + 20] * 100), 0),
+                "side": "SIDE_BUY" if u[i + 20] > 0.5 else "SIDE_SELL",
+            }
+            for i in range(20)
+        ]
+        return 200, {"symbol": symbol, "trades": trades}
+
+    def bars(self, request: Request, symbol: str) -> Response:
+        timeframe = request.query.get("timeframe", "TIME_FRAME_D")
+        if timeframe not in TIMEFRAME_SECONDS:
+            return error(400, f"Unknown timeframe {timeframe}")
+        now = int(time.time())
+        try:
+            end = parse_time(request.query["interval.end_time"]) if "interval.end_time" in request.query else now
+            start = (
+                parse_time(request.query["interval.start_time"])
+                if "interval.start_time" in request.query
+                else end - 100 * TIMEFRAME_SECONDS[timeframe]
+            )
+        except ValueError as e:
+            return error(400, f"Invalid interval: {e}")
+        candles = self.candles(symbol, timeframe, start, end)
+        bars = [
+            {
+                "timestamp": format_time(ts),
+                **{name: _value(candles[name][i], 6) for name in ("open", "high", "low", "close", "volume")},
+            }
+            for i, ts in enumerate(candles["timestamp"].tolist())
+        ]
+        return 200, {"symbol": symbol, "bars": bars}
+
+    # Счета и ордера
+
+    def _account(self, account_id: str) -> SimAccount | None:
+        return self.accounts.get(account_id)
+
+    def _fill(
+        self, account: SimAccount, symbol: str, side: str, quantity: float, price: float, ts: int, order_id: str = ""
+    ) -> None:
+        """Исполнить сделку: позиция, деньги, сделка и транзакции (вызывается под self._lock)"""
+        sign = 1.0 if side == "SIDE_BUY" else -1.0
+        position = account.positions.setdefault(symbol, [0.0, 0.0])
+        held, average = position
+        new_quantity = held + sign * quantity
+        if held * sign >= 0 and new_quantity:
+            position[1] = (held * average + sign * quantity * price) / new_quantity
+        elif held * new_quantity < 0:
+            position[1] = price
+        position[0] = new_quantity
+        if not new_quantity:
+            del account.positions[symbol]
+        amount = -sign * quantity * price
+        commission = round(abs(amount) * 0.0005, 2)
+        account.cash += amount - commission
+        trade = {
+            "trade_id": uuid.uuid4().hex[:12],
+            "symbol": symbol,
+            "price": _value(price),
+            "size": _value(quantity, 0),
+            "side": side,
+            "timestamp": format_time(ts),
+            "order_id": order_id,
+            "account_id": account.account_id,
+        }
+        account.trades.append(trade)
+        account.transactions.append({
+            "id": uuid.uuid4().hex[:12],
+            "category": "TRADE",
+            "timestamp": format_time(ts),
+            "symbol": symbol,
+            "change": _money(amount),
+            "trade": {"size": trade["size"], "price": trade["price"]},
+        })
+        account.transactions.append({
+            "id": uuid.uuid4().hex[:12],
+            "category": "COMMISSION",
+            "timestamp": format_time(ts),
+            "symbol": symbol,
+            "change": _money(-commission),
+        })
+
+    def _seed_history(self, account: SimAccount, cash: float, start: int, end: int) -> None:
+        """Депозит и несколько покупок по дневным закрытиям за последние дни"""
+        account.cash = cash
+        account.transactions.append({
+            "id": uuid.uuid4().hex[:12],
+            "category": "DEPOSIT",
+            "timestamp": format_time(start),
+            "symbol": "",
+            "change": _money(cash),
+        })
+        u = _hash_uniform(_symbol_seed(self.seed, account.account_id), np.arange(12))
+        equities = [symbol for symbol, row in self.assets.items() if row[3] == "EQUITIES" and "@MISX" in symbol]
+        for i in range(6):
+            symbol = equities[int(u[i] * len(equities))]
+            ts = int(start + (end - start) * (i + 1) / 8)
+            daily = self.candles(symbol, "TIME_FRAME_D", ts - 7 * DAY, ts)
+            if not len(daily["close"]):
+                continue
+            price = float(daily["close"][-1])
+            lot = self.assets[symbol][5]
+            quantity = max(lot, int(cash * 0.08 / price / lot) * lot)
+            self._fill(account, symbol, "SIDE_BUY", quantity, price, ts)
+
+    def account(self, request: Request, account_id: str) -> Response:
+        account = self._account(account_id)
+        if account is None:
+            return error(404, f"Account {account_id} not found", 5)
+        with self._lock:
+            positions = dict(account.positions)
+            cash = account.cash
+        rows, value, unrealized = [], 0.0, 0.0
+        for symbol, (quantity, average) in positions.items():
+            price = self.last_price(symbol)
+            pnl = (price - average) * quantity
+            value += price * quantity
+            unrealized += pnl
+            rows.append({
+                "symbol": symbol,
+                "quantity": _value(quantity, 0),
+                "average_price": _value(average),
+                "current_price": _value(price),
+                "unrealized_pnl": _value(pnl),
+                "daily_pnl": _value(0),
+            })
+        return 200, {
+            "account_id": account_id,
+            "type": "UNION",
+            "status": "ACCOUNT_ACTIVE",
+            "equity": _value(cash + value),
+            "unrealized_profit": _value(unrealized),
+            "positions": rows,
+            "cash": [_money(cash)],
+            "portfolio_mc": {
+                "available_cash": _money(cash),
+                "initial_margin": _money(value * 0.2),
+                "maintenance_margin": _money(value * 0.1),
+            },
+        }
+
+    def orders(self, request: Request, account_id: str) -> Response:
+        account = self._account(account_id)
+        if account is None:
+            return error(404, f"Account {account_id} not found", 5)
+        with self._lock:
+            return 200, {"orders": list(account.orders.values())}
+
+    def order(self, request: Request, account_id: str, order_id: str) -> Response:
+        account = self._account(account_id)
+        if account is None or order_id not in account.orders:
+            return error(404, f"Order {order_id} not found", 5)
+        return 200, account.orders[order_id]
+
+    def create_order(self, request: Request, account_id: str) -> Response:
+        account = self._account(account_id)
+        if account is None:
+            return error(404, f"Account {account_id} not found", 5)
+        order = dict(request.body or {})
+        symbol, side = order.get("symbol", ""), order.get("side", "")
+        quantity = _number(order.get("quantity"))
+        order_type = order.get("type", "ORDER_TYPE_MARKET")
+        if symbol not in self.assets:
+            return error(400, f"Unknown symbol {symbol}")
+        if side not in ("SIDE_BUY", "SIDE_SELL"):
+            return error(400, f"Invalid side {side}")
+        lot = self.assets[symbol][5]
+        if quantity <= 0 or quantity % lot:
+            return error(400, f"Quantity must be a positive multiple of lot size {lot}")
+        if order_type not in ("ORDER_TYPE_MARKET", "ORDER_TYPE_LIMIT"):
+            return error(400, f"Unsupported order type {order_type}")
+        limit = _number(order.get("limit_price"))
+        if order_type == "ORDER_TYPE_LIMIT" and limit <= 0:
+            return error(400, "limit_price is required for limit orders")
+        price = self.last_price(symbol)
+        marketable = order_type == "ORDER_TYPE_MARKET" or (limit >= price if side == "SIDE_BUY" else limit <= price)
+        now = int(time.time())
+        with self._lock:
+            client_order_id = order.get("client_order_id")
+            for existing in account.orders.values():
+                # Повторный client_order_id — возвращаем уже созданный ордер
+                if client_order_id and existing["order"].get("client_order_id") == client_order_id:
+                    return 200, existing
+            order_id = uuid.uuid4().hex[:12]
+            state = {
+                "order_id": order_id,
+                "exec_id": "",
+                "status": "ORDER_STATUS_FILLED" if marketable else "ORDER_STATUS_NEW",
+                "order": {**order, "account_id": account_id},
+                "transact_at": format_time(now),
+            }
+            if marketable:
+                self._fill(account, symbol, side, quantity, price, now, order_id)
+            account.orders[order_id] = state
+        return 200, state
+
+    def cancel_order(self, request: Request, account_id: str, order_id: str) -> Response:
+        account = self._account(account_id)
+        if account is None or order_id not in account.orders:
+            return error(404, f"Order {order_id} not found", 5)
+        with self._lock:
+            state = account.orders[order_id]
+            if state["status"] != "ORDER_STATUS_NEW":
+                return error(400, f"Order {order_id} is {state['status']}", 9)
+            state["status"] = "ORDER_STATUS_CANCELED"
+        return 200, state
+
+    def _history(self, request: Request, account_id: str, kind: str) -> Response:
+        account = self._account(account_id)
+        if account is None:
+            return error(404, f"Account {account_id} not found", 5)
+        start = parse_time(request.query["interval.start_time"]) if "interval.start_time" in request.query else 0
+        end = parse_time(request.query["interval.end_time"]) if "interval.end_time" in request.query else 2**62
+        with self._lock:
+            records = [r for r in getattr(account, kind) if start <= parse_time(r["timestamp"]) <= end]
+        return 200, {kind: records}
+
+    def trades(self, request: Request, account_id: str) -> Response:
+        return self._history(request, account_id, "trades")
+
+    def transactions(self, request: Request, account_id: str) -> Response:
+        return self._history(request, account_id, "transactions")
@@ -0,0 +1,215 @@
+"""
+Локальный HTTP сервер для имитаторов внешних API
+
+Сервер на стандартной библиотеке (ThreadingHTTPServer) принимает запрос,
+передает его приложению-имитатору и перед ответом добавляет искусственные
+сбои: задержку из логнормального распределения, случайные ошибки 5xx и
+ограничение частоты запросов (429) на каждый ключ авторизации.
+"""
+
+import json
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+from ..adapters import RateLimiter
+
+
+@dataclass(frozen=True)
+class Faults:
+    """
+    Искусственные задержки и сбои
+
+    Args:
+        latency_ms: Медиана задержки ответа (мс)
+        latency_sigma: Разброс задержки (sigma логнормального распределения)
+        error_rate: Доля запросов, на которые отвечать ошибкой 500/503
+        rate_limit: Запросов в минуту на ключ авторизации (0 — без ограничения)
+        seed: Зерно генератора задержек и ошибок
+    """
+
+    latency_ms: float = 0.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    rate_limit: int = 0
+    seed: int | None = None
+
+
+@dataclass
+class Request:
+    """Запрос к имитатору"""
+
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: Any = None
+
+    @property
+    def auth(self) -> str:
+        return self.headers.get("authorization", "")
+
+
+Response = tuple[int, dict[str, Any] | Iterator[str]]
+"""(HTTP статус, JSON ответ или поток строк Server-Sent Events)"""
+
+App = Callable[[Request], Response]
+
+
+class SandboxServer:
+    """
+    HTTP сервер имитатора
+
+    Args:
+        app: Обработчик запросов
+        host: Адрес
+        port: Порт (0 — любой свободный)
+        faults: Задержки и сбои
+    """
+
+    def __init__(self, app: App, host: str = "127.0.0.1", port: int = 0, faults: Faults | None = None) -> None:
+        self.app = app
+        self.faults = faults or Faults()
+        self.stats: Counter[int] = Counter()
+        self._rng = random.Random(self.faults.seed)
+        self._limiters: dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _fault(self, request: Request) -> Response | None:
+        """Задержка и, возможно, искусственная ошибка вместо ответа приложения"""
+        faults = self.faults
+        with self._lock:
+            delay = self._rng.lognormvariate(0, faults.latency_sigma) * faults.latency_ms / 1000
+            failed = self._rng.random() < faults.error_rate
+            limiter = None
+            if faults.rate_limit:
+                limiter = self._limiters.setdefault(request.auth, RateLimiter(faults.rate_limit, per=60.0))
+        if delay:
+            time.sleep(delay)
+        if limiter is not None and not limiter.try_acquire():
+            return error(429, "Too many requests", 8)
+        if failed:
+            return error(503, "Service unavailable (injected)", 14)
+        return None
+
+    def handle(self, request: Request) -> Response:
+        response = self._fault(request)
+        if response is None:
+            try:
+                response = self.app(request)
+            except Exception as e:
+                response = error(500, f"{type(e).__name__}: {e}", 13)
+        with self._lock:
+            self.stats[response[0]] += 1
+        return response
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: ANN401
+                pass
+
+            def setup(self) -> None:
+                super().setup()
+                # Заголовки и тело пишутся отдельно — без TCP_NODELAY Nagle добавляет ~40 мс к ответу
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _dispatch(self) -> None:
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+                headers = {key.lower(): value for key, value in self.headers.items()}
+                status, payload = server.handle(
+                    Request(self.command, parts.path, dict(parse_qsl(parts.query)), headers, body)
+                )
+                if isinstance(payload, dict):
+                    data = json.dumps(payload, ensure_ascii=False).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                # Потоковый ответ: события SSE, соединение закрывается в конце
+                self.send_response(status)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                for event in payload:
+                    self.wfile.write(f"data: {event}\n\n".encode())
+                    self.wfile.flush()
+
+            do_GET = do_POST = do_DELETE = do_PUT = _dispatch
+
+        return Handler
+
+    def start(self) -> str:
+        """Запустить сервер в фоновом потоке; возвращает базовый URL"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sandbox-server", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "SandboxServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def error(status: int, message: str, code: int = 3) -> Response:
+    """Ответ с ошибкой в формате gRPC-gateway (как у Finam API)"""
+    return status, {"code": code, "message": message, "details": []}
+
+
+@dataclass
+class Router:
+    """Таблица маршрутов: (метод, регулярное выражение пути) -> обработчик"""
+
+    routes: list[tuple[str, re.Pattern[str], Callable[..., Response]]] = field(default_factory=list)
+
+    def add(self, method: str, pattern: str, handler: Callable[..., Response]) -> None:
+        self.routes.append((method, re.compile(f"^{pattern}$"), handler))
+
+    def __call__(self, request: Request) -> Response:
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            if method == request.method:
+                return handler(request, **match.groupdict())
+            allowed = True
+        return error(405, "Method not allowed", 12) if allowed else error(404, f"Not found: {request.path}", 5)
@@ -0,0 +1,147 @@
+"""
+Локальный заменитель OpenRouter (/chat/completions в формате OpenAI)
+
+Ответы детерминированы: на вопрос пользователя возвращается запрос из
+ближайшего по rapidfuzz примера train.csv ("API_REQUEST: METHOD /path"),
+на сообщение с результатом API (follow-up агента) — короткий анализ без
+нового запроса. Время генерации задается скоростью в токенах в секунду,
+ответ может отдаваться потоком (stream=True, Server-Sent Events), usage
+считается приближенно (слова и знаки препинания).
+"""
+
+import csv
+import json
+import re
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from rapidfuzz import fuzz, process
+
+from .http import Request, Response, Router, error
+
+DEFAULT_TRAIN_FILE = Path("data/processed/train.csv")
+FALLBACK_ANSWER = "API_REQUEST: GET /v1/assets"
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_PIECE = re.compile(r"\s*\S+")
+
+
+def train_answer(row: dict[str, str]) -> str:
+    """Эталонный ответ LLM для строки train.csv (request встречается и с методом, и без него)"""
+    request = row["request"]
+    if request.startswith("/"):
+        request = f"{row['type']} {request}"
+    return f"API_REQUEST: {request}"
+
+
+def count_tokens(text: str) -> int:
+    """Приближенное число токенов: слова и знаки препинания"""
+    return len(_TOKEN.findall(text))
+
+
+class OpenRouterSimulator:
+    """
+    Обработчик /chat/completions для SandboxServer
+
+    Args:
+        train_file: Примеры вопрос -> запрос (train.csv, разделитель ";")
+        tokens_per_second: Скорость генерации ответа (0 — мгновенно)
+        model: Имя модели в ответе, если запрос его не указал
+    """
+
+    def __init__(
+        self,
+        train_file: Path | str = DEFAULT_TRAIN_FILE,
+        tokens_per_second: float = 0.0,
+        model: str = "sandbox/train-lookup",
+    ) -> None:
+        self.tokens_per_second = tokens_per_second
+        self.model = model
+        self.questions: list[str] = []
+        self.answers: list[str] = []
+        path = Path(train_file)
+        if path.exists():
+            with path.open(encoding="utf-8") as f:
+                for row in csv.DictReader(f, delimiter=";"):
+                    self.questions.append(row["question"].strip().lower())
+                    self.answers.append(train_answer(row))
+        self.exact = dict(zip(self.questions, self.answers, strict=True))
+        self.router = Router()
+        self.router.add("POST", "(?:/api/v1)?/chat/completions", self.chat_completions)
+        self.router.add("GET", "(?:/api/v1)?/models", self.models)
+
+    def __call__(self, request: Request) -> Response:
+        return self.router(request)
+
+    def answer(self, messages: list[dict[str, Any]]) -> str:
+        """Детерминированный ответ на последнее сообщение пользователя"""
+        question = next((str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), "")
+        if question.startswith("Эндпоинт:"):
+            endpoint = question.split("\n", 1)[0].removeprefix("Эндпоинт:").strip()
+            return f"Данные по запросу {endpoint} получены. Ключевые значения приведены в ответе API выше."
+        question = question.strip().lower()
+        if (answer := self.exact.get(question)) is not None:
+            return answer
+        best = process.extractOne(question, self.questions, scorer=fuzz.token_set_ratio) if self.questions else None
+        return self.answers[best[2]] if best else FALLBACK_ANSWER
+
+    def chat_completions(self, request: Request) -> Response:
+        body = request.body or {}
+        messages = body.get("messages")
+        if not isinstance(messages, list) or not messages:
+            return error(400, "messages is required")
+        pieces = _PIECE.findall(self.answer(messages))
+        finish_reason = "stop"
+        if body.get("max_tokens") and len(pieces) > int(body["max_tokens"]):
+            pieces, finish_reason = pieces[: int(body["max_tokens"])], "length"
+        usage = {
+            "prompt_tokens": sum(count_tokens(str(m.get("content", ""))) for m in messages),
+            "completion_tokens": len(pieces),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion = {
+            "id": f"gen-{uuid.uuid4().hex[:16]}",
+            "created": int(time.time()),
+            "model": body.get("model") or self.model,
+        }
+        if body.get("stream"):
+            return 200, self._stream(completion, pieces, finish_reason, usage)
+        if self.tokens_per_second:
+            time.sleep(len(pieces) / self.tokens_per_second)
+        return 200, {
+            **completion,
+            "object": "chat.completion",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(pieces)},
+                    "finish_reason": finish_reason,
+                }
+            ],
+            "usage": usage,
+        }
+
+    def _stream(
+        self, completion: dict[str, Any], pieces: list[str], finish_reason: str, usage: dict[str, int]
+    ) -> Iterator[str]:
+        delay = 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+        def chunk(delta: dict[str, str], finish: str | None = None, **extra: Any) -> str:  # noqa: ANN401
+            choice = {"index": 0, "delta": delta, "finish_reason": finish}
+            return json.dumps(
+                {**completion, "object": "chat.completion.chunk", "choices": [choice], **extra}, ensure_ascii=False
+            )
+
+        yield chunk({"role": "assistant", "content": ""})
+        for piece in pieces:
+            if delay:
+                time.sleep(delay)
+            yield chunk({"content": piece})
+        yield chunk({}, finish_reason, usage=usage)
+        yield "[DONE]"
+
+    def models(self, request: Request) -> Response:
+        return 200, {"data": [{"id": self.model, "name": "Sandbox train.csv lookup", "context_length": 128_000}]}
@@ -1,7 +1,7 @@
 from src.app.adapters import FinamAPIClient
 
 import re
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 
 rus_to_eng = {
     'а': 'a','б': 'b','в': 'v','г': 'g','д': 'd','е': 'e','ё': 'yo','ж': 'zh',
@@ -32,18 +32,31 @@ def similarity(name: str, assets: list[str]) -> list[float]:
     return res
 
 
+class AssetIndex:
+    """Индекс активов с заранее нормализованными названиями для быстрого поиска тикера"""
+
+    def __init__(self, assets: list[dict]) -> None:
+        self.names = [asset["name"] for asset in assets]
+        self.symbols = [asset["symbol"] for asset in assets]
+        self.types = {asset["symbol"]: asset.get("type", "") for asset in assets}
+        self.normalized = [normalize_company_name(name) for name in self.names]
+
+    @classmethod
+    def from_response(cls, response: dict) -> "AssetIndex":
+        return cls(response.get("assets") or [])
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def asset_type(self, symbol: str) -> str:
+        return self.types.get(symbol, "")
+
+    def lookup(self, name: str) -> str:
+        if not self.symbols:
+            return ""
+        best = process.extractOne(normalize_company_name(name), self.normalized, scorer=fuzz.ratio, processor=None)
+        return self.symbols[best[2]]
+
+
 def get_asset_from_text(name: str, finam_client: FinamAPIClient) -> str:
-    assets = finam_client.get_assets().get("assets")
-    if assets is None:
-        return ""
-    asset_names = [asset["name"] for asset in assets]
-    asset_symbol = [asset["symbol"] for asset in assets]
-    asset_similarity = similarity(name, asset_names)
-
-    max_ind = 0
-    for ind, sim in enumerate(asset_similarity):
-        if sim > asset_similarity[max_ind]:
-            max_ind = ind
-
-    symbol = asset_symbol[max_ind]
-    return symbol
+    return AssetIndex.from_response(finam_client.get_assets()).lookup(name)
@@ -0,0 +1,25 @@
+"""Хранилище свечей (src/app/core/candles.py): агрегация младших таймфреймов без загрузчика"""
+
+import numpy as np
+
+from src.app.core.candles import Candles, CandleStore
+
+HOUR = 3600
+
+
+def hourly(hours: int) -> Candles:
+    close = np.arange(1.0, hours + 1)
+    prices = (close, close + 0.5, close - 0.5, close)
+    return Candles("SBER@MISX", "TIME_FRAME_H1", np.arange(hours, dtype=np.int64) * HOUR, *prices, np.ones(hours))
+
+
+def test_get_resamples_without_fetcher() -> None:
+    store = CandleStore(tz_offset=0)
+    store.add(hourly(8), 0, 8 * HOUR - 1)
+
+    candles = store.get("SBER@MISX", "TIME_FRAME_H4", 0, 8 * HOUR - 1)
+
+    assert candles.timestamp.tolist() == [0, 4 * HOUR]
+    assert (candles.open.tolist(), candles.close.tolist(), candles.volume.tolist()) == ([1.0, 5.0], [4.0, 8.0], [4, 4])
+    # Интервал, который нельзя построить из H1, без загрузчика остается пустым
+    assert len(store.get("SBER@MISX", "TIME_FRAME_H4", 8 * HOUR, 12 * HOUR - 1)) == 0
@@ -0,0 +1,43 @@
+"""Локальный журнал сделок (src/app/core/ledger.py): ключи записей без id и формат ответа"""
+
+from typing import Any
+
+from src.app.core.candles import format_time, parse_time
+from src.app.core.ledger import TRADES, TRANSACTIONS, Ledger
+
+NOW = parse_time("2025-01-10T12:00:00Z")
+
+
+def fill(price: float, size: float) -> dict[str, Any]:
+    # Исполнения одного ордера в одну секунду, без trade_id/id
+    return {
+        "timestamp": format_time(NOW),
+        "symbol": "SBER@MISX",
+        "side": "SIDE_BUY",
+        "price": {"value": str(price)},
+        "size": {"value": str(size)},
+        "order_id": "ORD-1",
+    }
+
+
+def test_fills_without_id_in_one_second_are_kept() -> None:
+    trades = [fill(100.0, 1.0), fill(100.5, 2.0), fill(100.0, 1.0)]
+    ledger = Ledger()
+
+    def fetch(account_id: str, start: str, end: str) -> dict[str, Any]:
+        return {"account_id": account_id, TRADES: trades}
+
+    assert ledger.sync("ACC-1", TRADES, fetch, now=NOW + 60) == 3
+    assert ledger.sync("ACC-1", TRADES, fetch, now=NOW + 120) == 0  # повторный запрос той же секунды
+
+    stats = ledger.trade_stats("ACC-1")
+    assert (stats["count"], stats["volume"], stats["turnover"]) == (3, 4.0, 401.0)
+
+
+def test_records_keep_api_response_shape() -> None:
+    ledger = Ledger()
+    ledger.add("ACC-1", TRADES, [fill(100.0, 1.0)])
+    ledger.add("ACC-1", TRANSACTIONS, [{"timestamp": format_time(NOW), "category": "COMMISSION", "change": 1}])
+
+    assert ledger.records("ACC-1", TRADES) == {"account_id": "ACC-1", TRADES: [fill(100.0, 1.0)]}
+    assert list(ledger.records("ACC-1", TRANSACTIONS)) == ["account_id", TRANSACTIONS]
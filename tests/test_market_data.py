@@ -0,0 +1,72 @@
+"""Хаб рыночных данных (src/app/core/market_data.py): фоновый опрос и глубина стакана"""
+
+from typing import Any
+
+from src.app.adapters import LocalFeed
+from src.app.core.market_data import ORDERBOOK, QUOTE, MarketDataHub
+
+
+class CountingFeed(LocalFeed):
+    """LocalFeed, который запоминает запросы"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[tuple[str, str]] = []
+
+    def fetch_quote(self, symbol: str) -> dict[str, Any]:
+        self.calls.append((QUOTE, symbol))
+        return super().fetch_quote(symbol)
+
+    def fetch_orderbook(self, symbol: str, depth: int = 10) -> dict[str, Any]:
+        self.calls.append((ORDERBOOK, symbol))
+        return super().fetch_orderbook(symbol, depth)
+
+
+def sides(response: dict[str, Any]) -> tuple[int, int]:
+    rows = response["orderbook"]["rows"]
+    return sum("sell_size" in row for row in rows), sum("buy_size" in row for row in rows)
+
+
+def test_refresh_polls_only_subscribed_kind() -> None:
+    feed = CountingFeed()
+    hub = MarketDataHub(feed)
+    hub.get_quote("SBER@MISX", session_id="a")
+    hub.get_orderbook("GAZP@MISX", depth=5, session_id="b")
+    feed.calls.clear()
+
+    hub.refresh()
+
+    assert sorted(feed.calls) == [(ORDERBOOK, "GAZP@MISX"), (QUOTE, "SBER@MISX")]
+
+
+def test_refresh_respects_poll_budget_and_rotates() -> None:
+    feed = CountingFeed()
+    tokens = [True, False] * 3
+    hub = MarketDataHub(feed, poll_budget=lambda: tokens.pop(0))
+    for symbol in ("SBER@MISX", "GAZP@MISX", "LKOH@MISX"):
+        hub.get_quote(symbol)
+    feed.calls.clear()
+
+    for _ in range(3):
+        hub.refresh()
+
+    # Один запрос на обновление, каждый раз — самая устаревшая подписка
+    assert sorted(symbol for _, symbol in feed.calls) == ["GAZP@MISX", "LKOH@MISX", "SBER@MISX"]
+
+
+def test_orderbook_is_truncated_to_requested_depth() -> None:
+    feed = CountingFeed()
+    hub = MarketDataHub(feed, depth=10)
+
+    fetched = hub.get_orderbook("SBER@MISX", depth=5)
+    cached = hub.get_orderbook("SBER@MISX", depth=3)
+
+    assert sides(fetched) == (5, 5)
+    assert sides(cached) == (3, 3)
+    assert sides(hub.get_orderbook("SBER@MISX", depth=10)) == (10, 10)
+    assert len(feed.calls) == 1
+    best_ask = min(float(row["price"]["value"]) for row in cached["orderbook"]["rows"] if "sell_size" in row)
+    best_bid = max(float(row["price"]["value"]) for row in cached["orderbook"]["rows"] if "buy_size" in row)
+    full = hub.get_orderbook("SBER@MISX", depth=10)["orderbook"]["rows"]
+    assert best_ask == min(float(row["price"]["value"]) for row in full if "sell_size" in row)
+    assert best_bid == max(float(row["price"]["value"]) for row in full if "buy_size" in row)
@@ -0,0 +1,78 @@
+"""Конвейер ордеров (src/app/core/orders.py): запросы чата и кэш параметров инструмента"""
+
+from typing import Any
+
+from src.app.core.orders import OrderPipeline, execute_order_request
+
+ASSET = {"lot_size": {"value": "10"}, "min_step": "1", "decimals": 2}
+PARAMS = {"tradeable": True, "longable": {"value": "AVAILABLE"}}
+
+
+class Client:
+    """Заменитель FinamAPIClient: справочник и ордера счета в памяти"""
+
+    def __init__(self, params: dict[str, Any] = PARAMS) -> None:
+        self.params = params
+        self.created: list[dict[str, Any]] = []
+        self.cancelled: list[str] = []
+        self.orders = [
+            {"order_id": "O1", "status": "ORDER_STATUS_NEW", "order": {"symbol": "SBER@MISX"}},
+            {"order_id": "O2", "status": "ORDER_STATUS_NEW", "order": {"symbol": "GAZP@MISX"}},
+            {"order_id": "O3", "status": "ORDER_STATUS_FILLED", "order": {"symbol": "SBER@MISX"}},
+        ]
+
+    def execute_request(self, method: str, path: str) -> dict[str, Any]:
+        return self.params if "/params" in path else ASSET
+
+    def create_order(self, account_id: str, order: dict[str, Any]) -> dict[str, Any]:
+        self.created.append(order)
+        return {"order_id": f"N{len(self.created)}", "account_id": account_id, "status": "ORDER_STATUS_NEW"}
+
+    def cancel_order(self, account_id: str, order_id: str) -> dict[str, Any]:
+        self.cancelled.append(order_id)
+        return {"order_id": order_id, "status": "ORDER_STATUS_CANCELED"}
+
+    def get_orders(self, account_id: str) -> dict[str, Any]:
+        return {"orders": self.orders}
+
+
+def test_chat_order_is_validated_and_idempotent_within_turn() -> None:
+    client = Client()
+    pipeline = OrderPipeline(client, "ACC-1")
+    path = "/v1/accounts/ACC-1/orders?symbol=SBER@MISX&side=SIDE_BUY&quantity=20&type=ORDER_TYPE_MARKET"
+
+    first = execute_order_request(lambda _: pipeline, "POST", path, scope="turn-1")
+    repeated = execute_order_request(lambda _: pipeline, "POST", path, scope="turn-1")
+    next_turn = execute_order_request(lambda _: pipeline, "POST", path, scope="turn-2")
+
+    assert first == repeated == {"order_id": "N1", "account_id": "ACC-1", "status": "ORDER_STATUS_NEW"}
+    assert next_turn["order_id"] == "N2"
+    assert client.created[0]["quantity"] == {"value": "20"}
+
+    rejected = execute_order_request(lambda _: pipeline, "POST", path.replace("=20", "=15"), scope="turn-1")
+    assert rejected["type"] == "OrderValidationError"
+    assert len(client.created) == 2
+
+
+def test_chat_cancel_intents() -> None:
+    client = Client()
+    pipeline = OrderPipeline(client, "ACC-1")
+
+    assert execute_order_request(lambda _: pipeline, "DELETE", "/v1/accounts/ACC-1/orders/O9")["order_id"] == "O9"
+    response = execute_order_request(lambda _: pipeline, "DELETE", "/v1/accounts/ACC-1/orders?symbol=SBER@MISX")
+
+    assert [order["order_id"] for order in response["orders"]] == ["O1"]
+    assert client.cancelled == ["O9", "O1"]
+    assert execute_order_request(lambda _: pipeline, "GET", "/v1/accounts/ACC-1/orders") is None
+    assert execute_order_request(lambda _: pipeline, "POST", "/v1/sessions") is None
+
+
+def test_rules_are_not_cached_when_params_fail() -> None:
+    client = Client(params={"error": "timeout"})
+    pipeline = OrderPipeline(client, "ACC-1")
+
+    assert pipeline.rules("SBER@MISX").tradeable
+    client.params = {"tradeable": False}
+    assert not pipeline.rules("SBER@MISX").tradeable
+    client.params = {"error": "timeout"}
+    assert not pipeline.rules("SBER@MISX").tradeable  # успешный ответ кэшируется
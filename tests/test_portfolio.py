@@ -0,0 +1,52 @@
+"""Инкрементальная догрузка истории в PortfolioEngine не учитывает сделки дважды"""
+
+from typing import Any
+
+from src.app.core.candles import format_time, parse_time
+from src.app.core.portfolio import PortfolioEngine
+
+NOW = parse_time("2025-01-10T12:00:00Z")
+
+
+def fill(seconds: int, price: float, size: float = 1.0, side: str = "SIDE_BUY") -> dict[str, Any]:
+    # Сделка без trade_id/id: дубли отсекаются только по составному ключу
+    return {
+        "timestamp": format_time(NOW + seconds),
+        "symbol": "SBER@MISX",
+        "side": side,
+        "price": {"value": str(price)},
+        "size": {"value": str(size)},
+        "order_id": "ORD-1",
+    }
+
+
+class History:
+    """Заменитель FinamAPIClient: интервал [start, end] включительно"""
+
+    def __init__(self, trades: list[dict[str, Any]]) -> None:
+        self.trades = trades
+
+    def get_trades(self, account_id: str, start: str, end: str) -> dict[str, Any]:
+        lo, hi = parse_time(start), parse_time(end)
+        return {"account_id": account_id, "trades": [t for t in self.trades if lo <= parse_time(t["timestamp"]) <= hi]}
+
+    def get_transactions(self, account_id: str, start: str, end: str) -> dict[str, Any]:
+        return {"account_id": account_id, "transactions": []}
+
+    def get_account(self, account_id: str) -> dict[str, Any]:
+        return {"account_id": account_id, "positions": [], "cash": []}
+
+
+def test_refresh_skips_boundary_trades_without_id() -> None:
+    # Два одинаковых исполнения и еще одно по другой цене в одну секунду
+    history = History([fill(0, 100.0), fill(0, 100.0), fill(0, 101.0)])
+    engine = PortfolioEngine(history, "ACC-1").refresh(now=NOW + 60)
+    assert engine.trades["quantity"].sum() == 3
+
+    history.trades.append(fill(0, 100.0))  # третье такое же исполнение в ту же секунду
+    history.trades.append(fill(30, 102.0, side="SIDE_SELL"))
+    engine.refresh(now=NOW + 120)
+    engine.refresh(now=NOW + 180)
+
+    assert engine.trades["quantity"].tolist() == [1.0, 1.0, 1.0, 1.0, -1.0]
+    assert engine.trades["price"].tolist() == [100.0, 100.0, 101.0, 100.0, 102.0]
@@ -0,0 +1,43 @@
+"""Профилировщик (src/app/core/profiling.py) не приписывает свою работу этапам"""
+
+import time
+from pathlib import Path
+
+from src.app.core.profiling import profile
+from src.app.core.tracing import get_tracer
+
+
+def busy(seconds: float) -> list[list[int]]:
+    data = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        data.append(list(range(100)))
+    return data
+
+
+def test_profile_snapshots_only_top_level_stages(tmp_path: Path) -> None:
+    tracer = get_tracer()
+    with profile("nested", tmp_path, interval=0.001, memory_depth=1) as result:
+        for _ in range(3):
+            with tracer.span("stage"):
+                for _ in range(5):
+                    with tracer.span("inner"):
+                        busy(0.005)
+
+    assert result.calls == {"nested;stage;inner": 15, "nested;stage": 3, "nested": 1}
+    assert set(result.allocations) == {"nested", "nested;stage"}
+    assert result.samples
+    assert not any(";profiling.py:" in stack or ";tracemalloc.py:" in stack for stack in result.samples)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_profile_memory_depth_zero_snapshots_whole_block(tmp_path: Path) -> None:
+    with profile("flat", tmp_path, memory_depth=0), get_tracer().span("stage"):
+        busy(0.005)
+
+    assert set(result_stages(tmp_path)) == {"flat"}
+
+
+def result_stages(directory: Path) -> list[str]:
+    report = next(directory.glob("*.allocations.txt")).read_text(encoding="utf-8")
+    return [line.split(" ")[1] for line in report.splitlines() if line.startswith("== ")]
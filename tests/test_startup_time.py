@@ -0,0 +1,35 @@
+"""Бюджет холодного старта точек входа (см. scripts/startup_time.py)"""
+
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from scripts.startup_time import ENTRY_POINTS, EntryPoint, measure
+
+ROOT = Path(__file__).resolve().parents[1]
+RUNS = 3
+# Медленная машина / CI: STARTUP_TIME_SCALE=2 растягивает бюджеты, как --scale у скрипта
+SCALE = float(os.getenv("STARTUP_TIME_SCALE", "1.0"))
+
+
+@pytest.mark.parametrize("entry", ENTRY_POINTS, ids=lambda entry: entry.name)
+def test_entry_point_within_budget(entry: EntryPoint) -> None:
+    measure(entry)  # прогрев: компиляция .pyc и кэш файловой системы
+    samples = [measure(entry) for _ in range(RUNS)]
+
+    median = statistics.median(total for total, _, _ in samples)
+    assert median <= entry.budget_ms * SCALE, f"{entry.name}: {median:.1f} ms > {entry.budget_ms * SCALE:.0f} ms"
+    forbidden = set().union(*(loaded for _, _, loaded in samples))
+    assert not forbidden, f"{entry.name} imports {', '.join(sorted(forbidden))} at startup"
+
+
+def test_package_imports_as_app(tmp_path: Path) -> None:
+    # pyproject собирает пакет как app (из src): ленивые __init__ не должны ссылаться на src.
+    code = "import app.adapters, app.core, app.interfaces; app.core.Settings; app.adapters.RateLimiter"
+    env = {**os.environ, "PYTHONPATH": str(ROOT / "src")}
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
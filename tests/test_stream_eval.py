@@ -0,0 +1,111 @@
+"""Потоковая оценка (scripts/stream_eval.py) совпадает с evaluate.py и calculate_metrics.py"""
+
+from pathlib import Path
+
+import pytest
+
+from scripts.calculate_metrics import calculate_accuracy, load_csv
+from scripts.evaluate import evaluate
+from scripts.stream_eval import calculate_accuracy_stream, evaluate_stream
+
+HEADER = "uid;type;request\n"
+PUBLIC = [f"p{i};GET;/v1/assets/T{i}@MISX" for i in range(40)]
+PRIVATE = [f"q{i};POST;/v1/accounts/{{account_id}}/orders" for i in range(40)] + ["p0;GET;/v1/assets/T0@MISX"]
+PREDICTIONS = [
+    *(f"p{i};GET;/v1/assets/T{i}@MISX" for i in range(40) if i % 7),
+    *(f"p{i};GET;/v1/assets/T{i}@MISX/params" for i in range(40) if not i % 7),
+    *(f"q{i};POST;/v1/accounts/{{account_id}}/orders" for i in range(40) if i % 5),
+    *(f"q{i};DELETE;/v1/accounts/{{account_id}}/orders" for i in range(40) if not i % 5),
+    "p1;GET;/wrong",
+    "p1;GET;/v1/assets/T1@MISX",  # повтор uid: побеждает последняя строка
+]
+MALFORMED = [
+    "",  # пустая строка
+    "p3;GET;/v1/assets/T3@MISX;extra",  # лишнее поле (DictReader кладет его под ключ None)
+    "q2;POST;/v1/accounts/{account_id}/orders?a=1;b=2",
+    '"q3";"POST";"/v1/accounts/{account_id}/orders\nsecond line"',  # перевод строки в кавычках
+    "p4;GET;/wrong;extra",
+    "p4;GET;/v1/assets/T4@MISX",  # повтор после отвергнутой строки: побеждает последняя
+    "  p5 ; GET ;  /v1/assets/T5@MISX  ",
+    "x1;GET;/v1/unknown;extra",
+]
+
+
+def write(path: Path, lines: list[str], header: str = HEADER) -> str:
+    path.write_text(header + "\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def truth(tmp_path: Path) -> tuple[str, str]:
+    return write(tmp_path / "public.csv", PUBLIC), write(tmp_path / "private.csv", PRIVATE)
+
+
+@pytest.mark.parametrize("lines", [PREDICTIONS, PREDICTIONS + MALFORMED], ids=["clean", "malformed"])
+def test_evaluate_stream_matches_evaluate(tmp_path: Path, truth: tuple[str, str], lines: list[str]) -> None:
+    public, private = truth
+    submission = write(tmp_path / "submission.csv", lines)
+
+    assert evaluate_stream(submission, private, public, chunk_mb=1) == evaluate(submission, private, public)
+
+
+def test_evaluate_stream_matches_evaluate_on_valid_submission(tmp_path: Path, truth: tuple[str, str]) -> None:
+    public, private = truth
+    lines = [*PUBLIC, *PRIVATE, "p2;GET;/v1/assets/T2@MISX/schedule;extra", "q9;POST;/x;y;z"]
+    submission = write(tmp_path / "submission.csv", lines)
+
+    result = evaluate_stream(submission, private, public, chunk_mb=1)
+    assert result["metrics"].get("validation_passed")
+    assert result == evaluate(submission, private, public)
+
+
+@pytest.mark.parametrize(
+    "lines",
+    [
+        [*PREDICTIONS, "p6;GET"],  # недостающее поле — evaluate.load_csv_data не читает файл
+        [],
+        ["", "   "],
+    ],
+    ids=["short-row", "empty", "blank"],
+)
+def test_evaluate_stream_matches_evaluate_failures(tmp_path: Path, truth: tuple[str, str], lines: list[str]) -> None:
+    public, private = truth
+    submission = write(tmp_path / "submission.csv", lines)
+
+    expected = evaluate(submission, private, public)
+    assert expected["errors"]
+    assert evaluate_stream(submission, private, public, chunk_mb=1) == expected
+
+
+def test_evaluate_stream_reports_broken_test_file(tmp_path: Path, truth: tuple[str, str]) -> None:
+    public, _ = truth
+    private = write(tmp_path / "private.csv", ["q1;POST"])
+    submission = write(tmp_path / "submission.csv", PREDICTIONS)
+
+    assert evaluate_stream(submission, private, public, chunk_mb=1) == evaluate(submission, private, public)
+
+
+@pytest.mark.parametrize("lines", [PREDICTIONS, PREDICTIONS + MALFORMED], ids=["clean", "malformed"])
+def test_calculate_accuracy_stream_matches_calculate_accuracy(
+    tmp_path: Path, truth: tuple[str, str], lines: list[str]
+) -> None:
+    public, _ = truth
+    pred_file = write(tmp_path / "submission.csv", lines)
+
+    expected = calculate_accuracy(load_csv(Path(pred_file)), load_csv(Path(public)))
+    assert calculate_accuracy_stream(pred_file, public, chunk_mb=1, keep_errors=True) == expected
+
+
+def test_rejected_rows_keep_their_order_across_blocks(tmp_path: Path) -> None:
+    uids = [f"u{i}" for i in range(40000)]
+    true_file = write(tmp_path / "truth.csv", [f"{uid};GET;/v1/assets/{uid}@MISX" for uid in uids])
+    lines = []
+    for i, uid in enumerate(uids):
+        # Две строки на uid подряд (побеждает вторая), лишнее поле то в первой, то во второй
+        pair = [f"{uid};GET;/v1/assets/{uid}@MISX", f"{uid};GET;/wrong"][:: 1 if i % 2 else -1]
+        broken = i % 3
+        lines += [f"{line};extra" if broken == position else line for position, line in enumerate(pair)]
+    pred_file = write(tmp_path / "submission.csv", lines)  # ~2.5 МБ: несколько блоков по 1 МБ
+
+    expected = calculate_accuracy(load_csv(Path(pred_file)), load_csv(Path(true_file)))
+    assert calculate_accuracy_stream(pred_file, true_file, chunk_mb=1, keep_errors=True) == expected